@@ -1,4 +1,5 @@
 from agno.agent import Agent
+from utils.model_clients import agent_model
 
 class CommunicationAgent:
     """
@@ -10,7 +11,7 @@ class CommunicationAgent:
     def __init__(self):
         self.agent = Agent(
             name="Communication_Agent",
-            model="google:gemini-2.0-flash",
+            model=agent_model(),
             instructions="""You are a professional banking communications specialist.
             Generate clear, friendly, and professional customer messages.
             Maintain appropriate tone based on decision outcome.
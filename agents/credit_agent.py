@@ -1,4 +1,7 @@
 from agno.agent import Agent
+from utils.model_clients import agent_model
+from utils.agent_llm import analyze, attach_analysis
+from agents.features import AgeBucket, CreditSector, DocumentFlags, features_of
 
 class CreditAgent:
     """
@@ -7,16 +10,21 @@ class CreditAgent:
     cash flow analysis, and industry-specific risk models
     """
     
-    def __init__(self):
+    INPUT_FIELDS = ("financials", "documents", "industry", "business_age", "employees")
+    
+    def __init__(self, defer_llm=False):
         self.agent = Agent(
             name="Credit_Agent",
-            model="google:gemini-2.0-flash",
+            model=agent_model(),
             instructions="""You are a banking credit risk analyst.
             Evaluate creditworthiness using financial statements, debt ratios,
             cash flow analysis, and business performance metrics.
             Apply industry-specific credit models."""
         )
         
+        # Return scores immediately and resolve llm_analysis in the background
+        self.defer_llm = defer_llm
+        
     def run(self, input_data):
         """
         Execute comprehensive credit risk assessment
@@ -29,16 +37,16 @@ class CreditAgent:
             - financial_ratios: Key metrics
             - risk_factors: Identified concerns
         """
+        features = features_of(input_data)
         financials = input_data.get("financials", {})
-        revenue = financials.get("revenue", 0)
+        revenue = features.revenue
         debt = financials.get("debt", 0)
         cash_flow_positive = financials.get("cash_flow_positive", False)
         debt_to_income = financials.get("debt_to_income", 0)
         
-        business_age = input_data.get("business_age", "")
-        industry = input_data.get("industry", "").lower()
-        employees = input_data.get("employees", 0)
-        documents = input_data.get("documents", {})
+        age_bucket = features.age_bucket
+        industry = features.industry
+        employees = features.employees
         
         score = 0
         risk_factors = []
@@ -96,13 +104,13 @@ class CreditAgent:
             risk_factors.append("Negative cash flow - unable to meet obligations")
         
         # === Business Maturity (15 points) ===
-        if "5+" in business_age:
+        if age_bucket == AgeBucket.FIVE_PLUS_YEARS:
             score += 15
             maturity_rating = "Mature"
-        elif "3-5" in business_age:
+        elif age_bucket == AgeBucket.THREE_TO_FIVE_YEARS:
             score += 12
             maturity_rating = "Established"
-        elif "1-2" in business_age:
+        elif age_bucket == AgeBucket.ONE_TO_TWO_YEARS:
             score += 7
             maturity_rating = "Growing"
             risk_factors.append("Limited operating history")
@@ -112,18 +120,14 @@ class CreditAgent:
             risk_factors.append("New business - insufficient track record")
         
         # === Industry Risk Assessment (10 points) ===
-        stable_industries = ["healthcare", "education", "saas", "consulting"]
-        volatile_industries = ["restaurant", "retail", "construction"]
-        high_risk_industries = ["crypto", "gambling", "cannabis"]
-        
-        if industry in stable_industries:
+        if features.credit_sector == CreditSector.STABLE:
             score += 10
             industry_risk = "Low"
-        elif industry in volatile_industries:
+        elif features.credit_sector == CreditSector.VOLATILE:
             score += 5
             industry_risk = "Medium"
             risk_factors.append(f"Volatile industry: {industry}")
-        elif industry in high_risk_industries:
+        elif features.credit_sector == CreditSector.HIGH_RISK:
             score += 0
             industry_risk = "High"
             risk_factors.append(f"High-risk industry: {industry} - requires enhanced monitoring")
@@ -132,9 +136,9 @@ class CreditAgent:
             industry_risk = "Medium"
         
         # === Financial Documentation (Bonus) ===
-        if documents.get("financial_statement") and documents.get("bank_statement"):
+        if features.has_document(DocumentFlags.FINANCIAL_STATEMENT | DocumentFlags.BANK_STATEMENT):
             score += 5  # Bonus for complete financial docs
-        elif not documents.get("bank_statement"):
+        elif not features.has_document(DocumentFlags.BANK_STATEMENT):
             risk_factors.append("No bank statements - limited financial visibility")
         
         # === Employee Base Assessment ===
@@ -181,9 +185,9 @@ class CreditAgent:
             interest_rate = 15.0
         
         # Cap credit limits based on maturity
-        if "less than 1 year" in business_age.lower():
+        if age_bucket == AgeBucket.LESS_THAN_1_YEAR:
             credit_limit = min(credit_limit, 50000)
-        elif "1-2" in business_age:
+        elif age_bucket == AgeBucket.ONE_TO_TWO_YEARS:
             credit_limit = min(credit_limit, 150000)
         
         credit_limit = round(credit_limit, -3)  # Round to nearest thousand
@@ -208,10 +212,9 @@ class CreditAgent:
         else:
             loan_products = ["Not Eligible"]
         
-        llm_analysis = self.agent.run(f"Analyze credit risk for business with revenue ₹{revenue/100000:.1f}L, debt ratio {debt_to_income:.2f}, credit score {score}. Risk level: {risk_level}. Provide brief assessment in 2 to 3 lines only.")
-        llm_response = str(llm_analysis.content) if hasattr(llm_analysis, 'content') else str(llm_analysis)
+        llm_response = analyze(self.agent, f"Analyze credit risk for business with revenue ₹{revenue/100000:.1f}L, debt ratio {debt_to_income:.2f}, credit score {score}. Risk level: {risk_level}. Provide brief assessment in 2 to 3 lines only.", defer=self.defer_llm)
 
-        return {
+        return attach_analysis({
             "credit_score": score,
             "risk_level": risk_level,
             "credit_limit": credit_limit,
@@ -226,4 +229,4 @@ class CreditAgent:
             "loan_products": loan_products,
             "monitoring_required": risk_level in ["HIGH", "VERY_HIGH"],
             "llm_analysis": llm_response
-        }
\ No newline at end of file
+        })
\ No newline at end of file
@@ -0,0 +1,331 @@
+import os
+import sys
+import json
+import time
+import string
+import hashlib
+import operator
+import threading
+from collections.abc import Mapping
+
+DEFAULT_POLICY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "policies", "orchestrator_policy.json")
+
+# Comparison operators available in policy clauses
+OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "le": operator.le,
+    "gt": operator.gt,
+    "ge": operator.ge,
+    "in": lambda value, options: value in options,
+    "not_in": lambda value, options: value not in options,
+    "between": lambda value, bounds: bounds[0] <= value <= bounds[1],
+    "truthy": lambda value, expected: bool(value) == expected
+}
+
+RULE_SECTIONS = [
+    # (section, default decision, default hitl_required)
+    ("hard_stops", "REJECT", False),
+    ("review_triggers", "HUMAN_REVIEW", True),
+    ("auto_approve", "APPROVE", False),
+    ("default", "HUMAN_REVIEW", True)
+]
+
+
+class PolicyError(ValueError):
+    """Raised when a policy file cannot be compiled"""
+
+
+class Outcome:
+    """Result of evaluating a policy against one application"""
+
+    __slots__ = ("rule_id", "decision", "reasoning", "hitl_required", "risk_factors", "approval_conditions", "policy_version")
+
+    def __init__(self, rule_id, decision, reasoning, hitl_required, risk_factors, approval_conditions, policy_version):
+        self.rule_id = rule_id
+        self.decision = decision
+        self.reasoning = reasoning
+        self.hitl_required = hitl_required
+        self.risk_factors = risk_factors
+        self.approval_conditions = approval_conditions
+        self.policy_version = policy_version
+
+
+class _CompiledRule:
+    __slots__ = ("rule_id", "predicate", "decision", "hitl_required", "reasoning", "risk_factors", "approval_conditions")
+
+    def __init__(self, rule_id, predicate, decision, hitl_required, reasoning, risk_factors, approval_conditions):
+        self.rule_id = rule_id
+        self.predicate = predicate
+        self.decision = decision
+        self.hitl_required = hitl_required
+        self.reasoning = reasoning
+        self.risk_factors = risk_factors
+        self.approval_conditions = approval_conditions
+
+
+class DecisionPolicy:
+    """
+    Compiled Decision Table
+    Immutable snapshot of an orchestrator policy file. Field lookups,
+    threshold references and clauses are resolved once at compile time into
+    plain closures; evaluation walks the rules in order and stops at the
+    first match (hard stops, then HITL triggers, then auto-approve, then default).
+    """
+
+    def __init__(self, document, digest=""):
+        if not isinstance(document, Mapping):
+            raise PolicyError("Policy must be a JSON object")
+        self.document = document
+        self.digest = digest
+        self.version = f"{document.get('version', 'unversioned')}+{digest[:8]}" if digest else str(document.get("version", "unversioned"))
+        self.thresholds = document.get("thresholds", {})
+        self._rules = []
+
+        try:
+            self._compile(document)
+        except PolicyError:
+            raise
+        except (AttributeError, TypeError, ValueError, KeyError, IndexError) as e:
+            # Valid JSON of the wrong shape (e.g. a rule that is a string)
+            raise PolicyError(f"Malformed policy: {type(e).__name__}: {e}") from e
+
+        if not self._rules or self._rules[-1].predicate is not None:
+            raise PolicyError("Policy needs a 'default' rule without conditions as its last rule")
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "rb") as policy_file:
+            raw = policy_file.read()
+        try:
+            document = json.loads(raw.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise PolicyError(f"Invalid policy file {path}: {e}")
+        return cls(document, hashlib.sha256(raw).hexdigest())
+
+    def evaluate(self, input_data):
+        """
+        Evaluate the decision table
+
+        Returns:
+            - Outcome with the decision, formatted reasoning, the risk factors
+              and approval conditions added by the matching rule, and the
+              policy version
+        """
+        values = {name: getter(input_data) for name, getter in self._fields}
+
+        for rule in self._rules:
+            if rule.predicate is None or rule.predicate(values):
+                context = dict(self.thresholds)
+                context.update(values)
+                return Outcome(
+                    rule.rule_id,
+                    rule.decision,
+                    rule.reasoning.format_map(context),
+                    rule.hitl_required,
+                    [factor.format_map(context) for factor in rule.risk_factors],
+                    list(rule.approval_conditions),
+                    self.version
+                )
+
+    # ========================================
+    # Compilation
+    # ========================================
+
+    def _compile(self, document):
+        if not isinstance(self.thresholds, Mapping):
+            raise PolicyError("'thresholds' must be an object")
+        fields = document.get("fields", {})
+        if not isinstance(fields, Mapping):
+            raise PolicyError("'fields' must be an object of field name -> spec")
+
+        self._fields = [self._compile_field(name, spec) for name, spec in fields.items()]
+        self._field_names = {name for name, _ in self._fields}
+
+        for section, decision, hitl_required in RULE_SECTIONS:
+            rules = document.get(section)
+            if rules is None:
+                continue
+            if isinstance(rules, dict):
+                rules = [rules]
+            if not isinstance(rules, list):
+                raise PolicyError(f"'{section}' must be a rule or a list of rules")
+            for rule in rules:
+                if not isinstance(rule, Mapping):
+                    raise PolicyError(f"'{section}' entries must be rule objects, got {rule!r}")
+                self._rules.append(self._compile_rule(rule, decision, hitl_required))
+
+    def _compile_field(self, name, spec):
+        path = spec.get("path", name).split(".")
+        default = spec.get("default")
+        divide = spec.get("divide")
+        join = spec.get("join")
+
+        def getter(input_data):
+            value = input_data
+            for key in path:
+                if not isinstance(value, Mapping) or key not in value:
+                    value = default
+                    break
+                value = value[key]
+            if divide:
+                value = value / divide
+            if join is not None:
+                value = join.join(value)
+            return value
+
+        return name, getter
+
+    def _compile_rule(self, rule, default_decision, default_hitl):
+        rule_id = rule.get("id", "unnamed")
+        clauses = rule.get("when")
+        predicate = self._compile_all(clauses, rule_id) if clauses else None
+
+        if "reasoning" not in rule:
+            raise PolicyError(f"Rule '{rule_id}' has no reasoning")
+
+        risk_factors = tuple(rule.get("risk_factors", []))
+        for template in (rule["reasoning"],) + risk_factors:
+            self._check_template(template, rule_id)
+
+        return _CompiledRule(
+            rule_id,
+            predicate,
+            rule.get("decision", default_decision),
+            rule.get("hitl_required", default_hitl),
+            rule["reasoning"],
+            risk_factors,
+            tuple(rule.get("approval_conditions", []))
+        )
+
+    def _check_template(self, template, rule_id):
+        """Reject templates whose placeholders are not a declared field or a threshold"""
+        if not isinstance(template, str):
+            raise PolicyError(f"Rule '{rule_id}' has a non-text template {template!r}")
+        formatter = string.Formatter()
+        try:
+            placeholders = [name for _, name, _, _ in formatter.parse(template) if name is not None]
+        except ValueError as e:
+            raise PolicyError(f"Rule '{rule_id}' has a malformed template {template!r}: {e}")
+
+        for placeholder in placeholders:
+            root = placeholder.split(".", 1)[0].split("[", 1)[0]
+            if root in self._field_names:
+                continue  # Field values are only known at decision time
+            if root not in self.thresholds:
+                raise PolicyError(f"Rule '{rule_id}' template uses unknown placeholder '{{{placeholder}}}'")
+            try:
+                formatter.get_field(placeholder, (), self.thresholds)
+            except (LookupError, AttributeError, TypeError) as e:
+                raise PolicyError(f"Rule '{rule_id}' template placeholder '{{{placeholder}}}' does not resolve: {e}")
+
+    def _compile_all(self, clauses, rule_id):
+        predicates = [self._compile_clause(clause, rule_id) for clause in clauses]
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda values: all(predicate(values) for predicate in predicates)
+
+    def _compile_clause(self, clause, rule_id):
+        if "any" in clause:
+            predicates = [self._compile_clause(option, rule_id) for option in clause["any"]]
+            return lambda values: any(predicate(values) for predicate in predicates)
+        if "all" in clause:
+            return self._compile_all(clause["all"], rule_id)
+
+        field = clause.get("field")
+        if field not in self._field_names:
+            raise PolicyError(f"Rule '{rule_id}' references undeclared field '{field}'")
+
+        operators = [key for key in clause if key != "field"]
+        if len(operators) != 1 or operators[0] not in OPERATORS:
+            raise PolicyError(f"Rule '{rule_id}' needs exactly one operator out of {sorted(OPERATORS)}")
+
+        compare = OPERATORS[operators[0]]
+        expected = self._resolve(clause[operators[0]], rule_id)
+        if isinstance(expected, list):
+            expected = tuple(expected)
+        if operators[0] == "between" and not (isinstance(expected, tuple) and len(expected) == 2):
+            raise PolicyError(f"Rule '{rule_id}' needs a [low, high] pair for 'between'")
+        if operators[0] in ("in", "not_in") and not isinstance(expected, (tuple, str)):
+            raise PolicyError(f"Rule '{rule_id}' needs a list for '{operators[0]}'")
+        return lambda values: compare(values[field], expected)
+
+    def _resolve(self, value, rule_id):
+        """Replace "$section.key" threshold references with their values"""
+        if not (isinstance(value, str) and value.startswith("$")):
+            return value
+
+        resolved = self.thresholds
+        for key in value[1:].split("."):
+            if not isinstance(resolved, dict) or key not in resolved:
+                raise PolicyError(f"Rule '{rule_id}' references unknown threshold '{value}'")
+            resolved = resolved[key]
+        return resolved
+
+
+class PolicyStore:
+    """
+    Hot-Reloadable Policy Holder
+    Serves the current compiled DecisionPolicy snapshot. The policy file is
+    re-checked at most every check_interval seconds; a changed file is
+    compiled off to the side and swapped in atomically. A file that fails to
+    compile is reported (last_error and stderr) and the previous snapshot
+    stays active until the file changes again.
+    """
+
+    def __init__(self, path=None, check_interval=1.0):
+        self.path = path or os.getenv("ORCHESTRATOR_POLICY_PATH", DEFAULT_POLICY_PATH)
+        self.check_interval = check_interval
+        self.last_error = None
+
+        self._lock = threading.Lock()
+        self._mtime = os.stat(self.path).st_mtime_ns
+        self._snapshot = DecisionPolicy.from_file(self.path)
+        self._next_check = time.monotonic() + check_interval
+
+    def current(self):
+        """Return the active snapshot, reloading it first if the file changed"""
+        if time.monotonic() >= self._next_check:
+            self._maybe_reload()
+        return self._snapshot
+
+    def reload(self):
+        """Force a reload; returns the active snapshot"""
+        with self._lock:
+            self._load()
+        return self._snapshot
+
+    def _maybe_reload(self):
+        if not self._lock.acquire(blocking=False):
+            return  # Another thread is already checking
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                self.last_error = str(e)
+                return
+            if mtime != self._mtime:
+                self._load()
+        finally:
+            self._lock.release()
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            self.last_error = str(e)
+            return
+        try:
+            snapshot = DecisionPolicy.from_file(self.path)
+        except Exception as e:
+            # Keep deciding with the previous snapshot; the rejected file is
+            # not compiled again until it changes
+            self._mtime = mtime
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"Rejected policy {self.path}, keeping {self._snapshot.version}: {self.last_error}", file=sys.stderr)
+            return
+        self._mtime = mtime
+        self._snapshot = snapshot
+        self.last_error = None
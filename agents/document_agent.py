@@ -1,5 +1,7 @@
 from agno.agent import Agent
-import re
+from utils.model_clients import agent_model
+from utils.agent_llm import analyze, attach_analysis
+from agents.features import AgeBucket, IndustryTags, features_of
 
 class DocumentAgent:
     """
@@ -7,15 +9,20 @@ class DocumentAgent:
     Implements comprehensive document validation following regulatory standards
     """
     
-    def __init__(self):
+    INPUT_FIELDS = ("documents", "industry", "business_age")
+    
+    def __init__(self, defer_llm=False):
         self.agent = Agent(
             name="Document_Agent",
-            model="google:gemini-2.0-flash",
+            model=agent_model(),
             instructions="""You are a banking document verification specialist.
             Analyze business documents for completeness, validity, and regulatory compliance.
             Check for red flags, inconsistencies, and missing critical information."""
         )
         
+        # Return scores immediately and resolve llm_analysis in the background
+        self.defer_llm = defer_llm
+        
         # Required documents by category
         self.critical_docs = ["tax_id", "license", "bank_statement"]
         self.recommended_docs = ["financial_statement"]
@@ -32,17 +39,12 @@ class DocumentAgent:
             - verification_score: 0-100 score
             - status: COMPLETE/INCOMPLETE/CRITICAL_MISSING
         """
-        documents = input_data.get("documents", {})
-        business_age = input_data.get("business_age", "")
-        industry = input_data.get("industry", "").lower()
+        features = features_of(input_data)
+        business_age = features.business_age
+        industry = features.industry
         
         # Extract document status
-        extracted = {
-            "tax_id": documents.get("tax_id", False),
-            "license": documents.get("license", False),
-            "bank_statement": documents.get("bank_statement", False),
-            "financial_statement": documents.get("financial_statement", False)
-        }
+        extracted = features.document_inventory()
         
         # Identify missing documents
         missing_critical = [k for k in self.critical_docs if not extracted.get(k)]
@@ -64,11 +66,11 @@ class DocumentAgent:
             score += 30
         
         # Bonus for mature businesses with all docs
-        if "5+" in business_age and score >= 90:
+        if features.age_bucket == AgeBucket.FIVE_PLUS_YEARS and score >= 90:
             score = min(100, score + 10)
         
         # Penalty for high-risk industries without full documentation
-        if industry in ["crypto", "gambling", "cannabis"] and score < 100:
+        if features.has_tag(IndustryTags.RESTRICTED) and score < 100:
             score -= 10
             score = max(0, score)
         
@@ -90,19 +92,18 @@ class DocumentAgent:
         if not extracted.get("bank_statement"):
             warnings.append("Banking history unavailable - limits credit assessment")
         
-        if industry in ["crypto", "gambling"] and not extracted.get("financial_statement"):
+        if features.has_tag(IndustryTags.ENHANCED_DOCUMENTATION) and not extracted.get("financial_statement"):
             warnings.append("High-risk industry requires enhanced documentation")
         
         # Document quality assessment
         quality_issues = []
-        if "less than 1 year" in business_age.lower() and not extracted.get("financial_statement"):
+        if features.age_bucket == AgeBucket.LESS_THAN_1_YEAR and not extracted.get("financial_statement"):
             quality_issues.append("New business requires financial projections")
 
-        llm_analysis = self.agent.run(f"Analyze these documents for a {industry} business with {business_age} operating history: {extracted}. Provide risk assessment in 2 to 3 lines only.")
-        llm_response = str(llm_analysis.content) if hasattr(llm_analysis, 'content') else str(llm_analysis)
+        llm_response = analyze(self.agent, f"Analyze these documents for a {industry} business with {business_age} operating history: {extracted}. Provide risk assessment in 2 to 3 lines only.", defer=self.defer_llm)
 
         
-        return {
+        return attach_analysis({
             "extracted_data": extracted,
             "missing_fields": missing_critical,
             "warnings": warnings,
@@ -113,4 +114,4 @@ class DocumentAgent:
             "total_documents": sum([1 for v in extracted.values() if v]),
             "required_documents": len(self.critical_docs),
             "llm_analysis": llm_response
-        }
\ No newline at end of file
+        })
\ No newline at end of file
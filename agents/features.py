@@ -0,0 +1,235 @@
+from enum import IntEnum, IntFlag
+from functools import lru_cache
+
+# ========================================
+# Application features
+#
+# The rule-based agents (documents, KYC/AML, credit, products) and the
+# columnar batch scorer all read the same handful of facts out of the raw
+# application. extract_features() parses them once into an immutable
+# ApplicationFeatures record; OnboardingPipeline attaches it to every stage
+# input under FEATURES_KEY and the agents read it via features_of().
+# ========================================
+
+FEATURES_KEY = "features"
+
+
+class AgeBucket(IntEnum):
+    """Operating history bucket of the Business Age answer"""
+    UNKNOWN = 0
+    LESS_THAN_1_YEAR = 1
+    ONE_TO_TWO_YEARS = 2
+    THREE_TO_FIVE_YEARS = 3
+    FIVE_PLUS_YEARS = 4
+
+
+class DocumentFlags(IntFlag):
+    """Submitted documents as a bitmask"""
+    NONE = 0
+    TAX_ID = 1
+    LICENSE = 2
+    BANK_STATEMENT = 4
+    FINANCIAL_STATEMENT = 8
+
+
+# Application document key -> flag
+DOCUMENT_FLAGS = {
+    "tax_id": DocumentFlags.TAX_ID,
+    "license": DocumentFlags.LICENSE,
+    "bank_statement": DocumentFlags.BANK_STATEMENT,
+    "financial_statement": DocumentFlags.FINANCIAL_STATEMENT
+}
+
+
+class AMLRisk(IntEnum):
+    """KYC/AML risk class of an industry"""
+    UNCLASSIFIED = 0
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+
+
+class CreditSector(IntEnum):
+    """Credit risk class of an industry"""
+    UNCLASSIFIED = 0
+    STABLE = 1
+    VOLATILE = 2
+    HIGH_RISK = 3
+
+
+class IndustryTags(IntFlag):
+    """Document, product and program rules that key off the industry"""
+    NONE = 0
+    RESTRICTED = 1                  # Penalised when documentation is incomplete
+    ENHANCED_DOCUMENTATION = 2      # Needs a financial statement
+    STARTUP_PROGRAM = 4
+    INNOVATION_BANKING = 8
+    TECH_SERVICES = 16
+    MERCHANT_SERVICES = 32
+    INDUSTRIAL_SERVICES = 64
+    PROFESSIONAL_SERVICES = 128
+
+
+# ========================================
+# Central industry taxonomy
+# (lower-cased industry -> AML risk, credit sector, tags)
+# Industries not listed are UNCLASSIFIED with no tags.
+# ========================================
+
+INDUSTRY_TAXONOMY = {
+    "crypto": (AMLRisk.HIGH, CreditSector.HIGH_RISK, IndustryTags.RESTRICTED | IndustryTags.ENHANCED_DOCUMENTATION),
+    "gambling": (AMLRisk.HIGH, CreditSector.HIGH_RISK, IndustryTags.RESTRICTED | IndustryTags.ENHANCED_DOCUMENTATION),
+    "cannabis": (AMLRisk.HIGH, CreditSector.HIGH_RISK, IndustryTags.RESTRICTED),
+    "money services": (AMLRisk.HIGH, CreditSector.UNCLASSIFIED, IndustryTags.NONE),
+    "jewelry": (AMLRisk.HIGH, CreditSector.UNCLASSIFIED, IndustryTags.NONE),
+    "real estate": (AMLRisk.MEDIUM, CreditSector.UNCLASSIFIED, IndustryTags.NONE),
+    "construction": (AMLRisk.MEDIUM, CreditSector.VOLATILE, IndustryTags.INDUSTRIAL_SERVICES),
+    "import/export": (AMLRisk.MEDIUM, CreditSector.UNCLASSIFIED, IndustryTags.NONE),
+    "saas": (
+        AMLRisk.LOW, CreditSector.STABLE,
+        IndustryTags.TECH_SERVICES | IndustryTags.STARTUP_PROGRAM | IndustryTags.INNOVATION_BANKING
+    ),
+    "healthcare": (AMLRisk.LOW, CreditSector.STABLE, IndustryTags.PROFESSIONAL_SERVICES),
+    "education": (AMLRisk.LOW, CreditSector.STABLE, IndustryTags.NONE),
+    "consulting": (AMLRisk.LOW, CreditSector.STABLE, IndustryTags.STARTUP_PROGRAM),
+    "restaurant": (AMLRisk.UNCLASSIFIED, CreditSector.VOLATILE, IndustryTags.MERCHANT_SERVICES),
+    "retail": (AMLRisk.UNCLASSIFIED, CreditSector.VOLATILE, IndustryTags.MERCHANT_SERVICES),
+    "e-commerce": (AMLRisk.UNCLASSIFIED, CreditSector.UNCLASSIFIED, IndustryTags.MERCHANT_SERVICES),
+    "manufacturing": (AMLRisk.UNCLASSIFIED, CreditSector.UNCLASSIFIED, IndustryTags.INDUSTRIAL_SERVICES),
+    "professional services": (AMLRisk.UNCLASSIFIED, CreditSector.UNCLASSIFIED, IndustryTags.PROFESSIONAL_SERVICES),
+    "tech": (
+        AMLRisk.UNCLASSIFIED, CreditSector.UNCLASSIFIED,
+        IndustryTags.TECH_SERVICES | IndustryTags.STARTUP_PROGRAM | IndustryTags.INNOVATION_BANKING
+    ),
+    "software": (AMLRisk.UNCLASSIFIED, CreditSector.UNCLASSIFIED, IndustryTags.TECH_SERVICES)
+}
+
+UNCLASSIFIED_INDUSTRY = (AMLRisk.UNCLASSIFIED, CreditSector.UNCLASSIFIED, IndustryTags.NONE)
+
+
+class ApplicationFeatures:
+    """
+    Application Features Record
+    Immutable, slotted snapshot of the application fields the rule-based
+    agents score on. Build it with extract_features().
+    """
+
+    __slots__ = (
+        "industry", "business_age", "age_bucket", "documents", "doc_count",
+        "revenue", "employees", "aml_risk", "credit_sector", "industry_tags"
+    )
+
+    def __init__(self, industry, business_age, age_bucket, documents, doc_count,
+                 revenue, employees, aml_risk, credit_sector, industry_tags):
+        set_slot = object.__setattr__
+        set_slot(self, "industry", industry)
+        set_slot(self, "business_age", business_age)
+        set_slot(self, "age_bucket", age_bucket)
+        set_slot(self, "documents", documents)
+        set_slot(self, "doc_count", doc_count)
+        set_slot(self, "revenue", revenue)
+        set_slot(self, "employees", employees)
+        set_slot(self, "aml_risk", aml_risk)
+        set_slot(self, "credit_sector", credit_sector)
+        set_slot(self, "industry_tags", industry_tags)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ApplicationFeatures is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("ApplicationFeatures is immutable")
+
+    def __reduce__(self):
+        return (ApplicationFeatures, tuple(getattr(self, name) for name in self.__slots__))
+
+    def __eq__(self, other):
+        if not isinstance(other, ApplicationFeatures):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"ApplicationFeatures({fields})"
+
+    def has_document(self, flags):
+        """True when every document in flags was submitted"""
+        return self.documents & flags == flags
+
+    def has_tag(self, tag):
+        return bool(self.industry_tags & tag)
+
+    def document_inventory(self):
+        """Document key -> submitted (bool), in DOCUMENT_FLAGS order"""
+        return {key: bool(self.documents & flag) for key, flag in DOCUMENT_FLAGS.items()}
+
+
+def extract_features(app_data):
+    """
+    Parse an application dict into an ApplicationFeatures record
+
+    Applies the same defaults the agents used for missing fields.
+    """
+    documents = app_data.get("documents", {})
+    flags = DocumentFlags.NONE
+    for key, flag in DOCUMENT_FLAGS.items():
+        if documents.get(key):
+            flags |= flag
+
+    industry, aml_risk, credit_sector, tags = _industry_profile(app_data.get("industry", ""))
+    business_age = app_data.get("business_age", "")
+
+    return ApplicationFeatures(
+        industry=industry,
+        business_age=business_age,
+        age_bucket=_age_bucket(business_age),
+        documents=flags,
+        doc_count=sum([1 for doc in documents.values() if doc]),
+        revenue=_number(app_data.get("financials", {}).get("revenue", 0)),
+        employees=app_data.get("employees", 0) or 0,
+        aml_risk=aml_risk,
+        credit_sector=credit_sector,
+        industry_tags=tags
+    )
+
+
+def features_of(input_data):
+    """The features attached by the pipeline, or freshly extracted ones for a direct agent call"""
+    features = input_data.get(FEATURES_KEY)
+    if isinstance(features, ApplicationFeatures):
+        return features
+    return extract_features(input_data)
+
+
+# Industry and age answers come from small vocabularies, so their parsing is memoised
+
+@lru_cache(maxsize=1024)
+def _industry_profile(industry):
+    normalized = str(industry or "").strip().lower()
+    return (normalized,) + INDUSTRY_TAXONOMY.get(normalized, UNCLASSIFIED_INDUSTRY)
+
+
+@lru_cache(maxsize=256)
+def _age_bucket(business_age):
+    text = str(business_age or "")
+    if "5+" in text:
+        return AgeBucket.FIVE_PLUS_YEARS
+    if "3-5" in text:
+        return AgeBucket.THREE_TO_FIVE_YEARS
+    if "1-2" in text:
+        return AgeBucket.ONE_TO_TWO_YEARS
+    if "less than 1 year" in text.lower():
+        return AgeBucket.LESS_THAN_1_YEAR
+    return AgeBucket.UNKNOWN
+
+
+def _number(value):
+    """Numeric value of a form field (0 when missing or unparseable)"""
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(str(value).replace(",", "").replace("$", "").strip() or 0)
+    except ValueError:
+        return 0
\ No newline at end of file
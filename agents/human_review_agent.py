@@ -1,4 +1,6 @@
 from agno.agent import Agent
+from utils.model_clients import agent_model
+from utils.agent_llm import analyze, attach_analysis
 
 class HumanReviewAgent:
     """
@@ -7,14 +9,17 @@ class HumanReviewAgent:
     for manual review by banking officers
     """
     
-    def __init__(self):
+    def __init__(self, defer_llm=False):
         self.agent = Agent(
             name="Human_Review_Agent",
-            model="google:gemini-2.0-flash",
+            model=agent_model(),
             instructions="""You are a senior banking analyst preparing cases for human review.
             Summarize all relevant information clearly and concisely.
             Highlight key decision factors, risks, and recommendations."""
         )
+        
+        # Return scores immediately and resolve llm_analysis in the background
+        self.defer_llm = defer_llm
     
     def run(self, input_data):
         """
@@ -180,10 +185,9 @@ Rationale: {recommendation_rationale}
             suggested_docs.append("PEP Risk Assessment Form")
             suggested_docs.append("Enhanced Background Check")
         
-        llm_analysis = self.agent.run(f"Prepare review summary for human officer. Credit: {credit_score}, Compliance: {compliance_score}, Risk: {risk_level}, Key concerns: {key_concerns}. Provide recommendation in 2 to 3 lines only.")
-        llm_response = str(llm_analysis.content) if hasattr(llm_analysis, 'content') else str(llm_analysis)
+        llm_response = analyze(self.agent, f"Prepare review summary for human officer. Credit: {credit_score}, Compliance: {compliance_score}, Risk: {risk_level}, Key concerns: {key_concerns}. Provide recommendation in 2 to 3 lines only.", defer=self.defer_llm)
 
-        return {
+        return attach_analysis({
             "summary": summary,
             "options": options,
             "key_concerns": key_concerns,
@@ -195,7 +199,7 @@ Rationale: {recommendation_rationale}
             "review_required_by": "Banking Officer or Senior Underwriter",
             "escalation_required": edd_required or risk_level == "CRITICAL",
             "llm_analysis": llm_response
-        }
+        })
     
     def _score_rating(self, score):
         """Convert numeric score to rating"""
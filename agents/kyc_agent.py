@@ -1,4 +1,7 @@
 from agno.agent import Agent
+from utils.model_clients import agent_model
+from utils.agent_llm import analyze, attach_analysis
+from agents.features import AMLRisk, AgeBucket, features_of
 
 class KYCAgent:
     """
@@ -7,20 +10,20 @@ class KYCAgent:
     following BSA/AML, OFAC, and CIP regulations
     """
     
-    def __init__(self):
+    INPUT_FIELDS = ("identity", "business_profile", "documents", "industry", "business_age")
+    
+    def __init__(self, defer_llm=False):
         self.agent = Agent(
             name="KYC_Agent",
-            model="google:gemini-2.0-flash",
+            model=agent_model(),
             instructions="""You are a banking KYC/AML compliance specialist.
             Perform comprehensive identity verification, sanctions screening, PEP checks,
             and adverse media screening. Assess AML risk based on industry, geography, 
             and transaction patterns."""
         )
         
-        # Risk categorization
-        self.high_risk_industries = ["crypto", "gambling", "cannabis", "money services", "jewelry"]
-        self.medium_risk_industries = ["real estate", "construction", "import/export"]
-        self.low_risk_industries = ["saas", "healthcare", "education", "consulting"]
+        # Return scores immediately and resolve llm_analysis in the background
+        self.defer_llm = defer_llm
         
     def run(self, input_data):
         """
@@ -33,11 +36,10 @@ class KYCAgent:
             - risk_level: LOW/MEDIUM/HIGH/CRITICAL
             - risk_factors: List of identified risks
         """
+        features = features_of(input_data)
         identity = input_data.get("identity", {})
-        documents = input_data.get("documents", {})
-        industry = input_data.get("industry", "").lower()
+        industry = features.industry
         business_profile = input_data.get("business_profile", {})
-        business_age = input_data.get("business_age", "")
         
         score = 0
         risk_factors = []
@@ -57,12 +59,16 @@ class KYCAgent:
         elif pep_status == "flagged":
             score -= 20
             risk_factors.append("PEP (Politically Exposed Person) flagged")
+        elif pep_status == "potential_match":
+            risk_factors.append("Possible PEP name match - manual disposition required")
         
         if sanctions_status == "clear":
             score += 10
         elif sanctions_status == "flagged":
             score = 0  # Auto-fail on sanctions hit
             risk_factors.append("OFAC/Sanctions list match - CRITICAL")
+        elif sanctions_status == "potential_match":
+            risk_factors.append("Possible sanctions list name match - manual disposition required")
         
         # === Adverse Media Check (10 points) ===
         if not identity.get("adverse_media", True):
@@ -71,7 +77,7 @@ class KYCAgent:
             risk_factors.append("Negative news/adverse media found")
         
         # === Document Verification (15 points) ===
-        doc_count = sum([1 for doc in documents.values() if doc])
+        doc_count = features.doc_count
         if doc_count >= 4:
             score += 15
         elif doc_count == 3:
@@ -82,15 +88,15 @@ class KYCAgent:
             risk_factors.append("Insufficient documentation for identity verification")
         
         # === Industry Risk Assessment (20 points) ===
-        if industry in self.high_risk_industries:
+        if features.aml_risk == AMLRisk.HIGH:
             score -= 30
             risk_factors.append(f"High-risk industry: {industry}")
             industry_risk = "HIGH"
-        elif industry in self.medium_risk_industries:
+        elif features.aml_risk == AMLRisk.MEDIUM:
             score -= 10
             risk_factors.append(f"Medium-risk industry: {industry}")
             industry_risk = "MEDIUM"
-        elif industry in self.low_risk_industries:
+        elif features.aml_risk == AMLRisk.LOW:
             score += 20
             industry_risk = "LOW"
         else:
@@ -124,11 +130,11 @@ class KYCAgent:
             risk_factors.append("Transactions with high-risk jurisdictions - CRITICAL")
         
         # === Business Maturity Bonus ===
-        if "5+" in business_age:
+        if features.age_bucket == AgeBucket.FIVE_PLUS_YEARS:
             score += 10
-        elif "3-5" in business_age:
+        elif features.age_bucket == AgeBucket.THREE_TO_FIVE_YEARS:
             score += 5
-        elif "less than 1 year" in business_age.lower():
+        elif features.age_bucket == AgeBucket.LESS_THAN_1_YEAR:
             score -= 5
             risk_factors.append("New business - limited operating history")
         
@@ -171,10 +177,9 @@ class KYCAgent:
             edd_required = True
             risk_factors.append("Enhanced Due Diligence (EDD) required")
         
-        llm_analysis = self.agent.run(f"Analyze KYC/AML risk for {industry} business. Compliance score: {score}, Risk level: {risk_level}, Risk factors: {risk_factors}. Provide brief assessment in 2 to 3 lines only.")
-        llm_response = str(llm_analysis.content) if hasattr(llm_analysis, 'content') else str(llm_analysis)
+        llm_response = analyze(self.agent, f"Analyze KYC/AML risk for {industry} business. Compliance score: {score}, Risk level: {risk_level}, Risk factors: {risk_factors}. Provide brief assessment in 2 to 3 lines only.", defer=self.defer_llm)
 
-        return {
+        return attach_analysis({
             "compliance_score": score,
             "kyc_status": kyc_status,
             "risk_level": risk_level,
@@ -184,4 +189,4 @@ class KYCAgent:
             "industry_risk": industry_risk,
             "recommendation": "Approve" if kyc_status == "PASSED" else "Reject" if kyc_status == "FAILED" else "Human Review",
             "llm_analysis": llm_response
-        }
\ No newline at end of file
+        })
\ No newline at end of file
@@ -0,0 +1,408 @@
+import queue
+import threading
+import contextvars
+from contextlib import nullcontext
+from agents.orchestrator_agent import OrchestratorAgent
+from agents.document_agent import DocumentAgent
+from agents.kyc_agent import KYCAgent
+from agents.credit_agent import CreditAgent
+from agents.product_agent import ProductAgent
+from agents.communication_agent import CommunicationAgent
+from agents.human_review_agent import HumanReviewAgent
+from agents.screening_agent import ScreeningAgent
+from agents.features import FEATURES_KEY, extract_features
+from agents.stage_results import KYCStatus, StageResults, stage_result
+from utils.stage_scheduler import PipelineRun, Stage, StageScheduler, changed_fields
+from utils.agent_llm import collect_prompts, skip_narratives, stream_tokens
+from utils.deadlines import budget_from_env, llm_deadline
+from utils.tracing import span
+
+# Pipeline event kinds, in the order a stage produces them
+STAGE_STARTED = "stage_started"     # The stage began running
+SCORES_READY = "scores_ready"       # Rule-based result available (narrative may still be pending)
+TOKEN = "token"                     # A chunk of the stage's streamed LLM narrative
+STAGE_DONE = "stage_done"           # Record final, narrative included
+PIPELINE_DONE = "pipeline_done"     # Run finished and every emitted stage is done
+
+# Receiver of PipelineEvents for the run active in this context
+_event_sink = contextvars.ContextVar("pipeline_event_sink", default=None)
+
+
+class PipelineEvent:
+    """
+    One step of a streamed pipeline run
+
+    Attributes:
+        - kind: One of the event kinds above
+        - stage: Stage name (None for PIPELINE_DONE)
+        - result: Stage record for SCORES_READY and STAGE_DONE
+        - text: Narrative chunk for TOKEN
+        - run: PipelineRun for PIPELINE_DONE
+    """
+
+    __slots__ = ("kind", "stage", "result", "text", "run")
+
+    def __init__(self, kind, stage=None, result=None, text=None, run=None):
+        self.kind = kind
+        self.stage = stage
+        self.result = result
+        self.text = text
+        self.run = run
+
+    def __repr__(self):
+        return f"PipelineEvent({self.kind!r}, {self.stage!r})"
+
+
+class OnboardingPipeline:
+    """
+    Onboarding Pipeline Definition
+    Wires the onboarding agents into a dependency graph so that the
+    independent assessments (screening, documents, credit, then KYC/AML)
+    run concurrently while the halt rules of the sequential flow still apply
+    """
+
+    # Stage order used for display and for the halt semantics
+    STAGES = ["screening", "document", "kyc", "credit", "product", "orchestrator", "communication", "human_review"]
+
+    def __init__(self, agents=None, max_workers=4, defer_llm=False, consolidate_llm=False,
+                 stage_budgets=None, stage_budget=None, application_budget=None):
+        """
+        Args:
+            - agents: Optional dict of stage name -> agent instance. Missing
+              agents are constructed on demand
+            - max_workers: Upper bound on concurrently running stages
+            - defer_llm: Construct missing agents in deferred mode, so stages
+              return as soon as their rule-based results exist and every
+              llm_analysis resolves in the background
+            - consolidate_llm: Collect the narrative prompts of every stage and
+              issue them as one structured LLM request per application
+            - stage_budgets: Optional dict of stage name -> LLM latency budget
+              in seconds, overriding stage_budget for that stage
+            - stage_budget: Default per-stage budget (PIPELINE_STAGE_BUDGET_SECONDS,
+              default 20s)
+            - application_budget: Budget for the whole application
+              (PIPELINE_APPLICATION_BUDGET_SECONDS, default 45s)
+
+        A narrative still pending when its budget runs out is replaced by a
+        deterministic fallback and the stage result is marked llm_degraded.
+        """
+        agents = dict(agents or {})
+        self.screening_agent = agents.get("screening") or ScreeningAgent()
+        self.document_agent = agents.get("document") or DocumentAgent(defer_llm=defer_llm)
+        self.kyc_agent = agents.get("kyc") or KYCAgent(defer_llm=defer_llm)
+        self.credit_agent = agents.get("credit") or CreditAgent(defer_llm=defer_llm)
+        self.product_agent = agents.get("product") or ProductAgent(defer_llm=defer_llm)
+        self.orchestrator = agents.get("orchestrator") or OrchestratorAgent(defer_llm=defer_llm)
+        self.communication_agent = agents.get("communication") or CommunicationAgent()
+        self.human_review_agent = agents.get("human_review") or HumanReviewAgent(defer_llm=defer_llm)
+
+        self.defer_llm = defer_llm
+        self.consolidate_llm = consolidate_llm
+        self.stage_budgets = dict(stage_budgets or {})
+        self.stage_budget = stage_budget or budget_from_env("PIPELINE_STAGE_BUDGET_SECONDS", 20)
+        self.application_budget = application_budget or budget_from_env("PIPELINE_APPLICATION_BUDGET_SECONDS", 45)
+        self.scheduler = StageScheduler(self._build_stages(), max_workers=max_workers)
+
+    def _build_stages(self):
+        """Declare each stage together with the upstream outputs it consumes"""
+        stages = [
+            # Sanctions/PEP screening, documents and credit only read the raw application
+            Stage("screening", self.screening_agent.run, reads=_input_fields(self.screening_agent)),
+            Stage(
+                "document",
+                self.document_agent.run,
+                reads=_input_fields(self.document_agent),
+                halt_when=lambda result: None if result.complete else "Incomplete documentation"
+            ),
+            # KYC scores the screening outcome instead of the pre-set identity checks
+            Stage(
+                "kyc",
+                self.kyc_agent.run,
+                requires=["screening"],
+                prepare=self._kyc_input,
+                reads=_input_fields(self.kyc_agent),
+                halt_when=lambda result: "Failed KYC/AML compliance" if result.kyc_status is KYCStatus.FAILED else None
+            ),
+            Stage("credit", self.credit_agent.run, reads=_input_fields(self.credit_agent)),
+
+            # Stage 4 needs compliance_score from KYC and credit_score/risk_level/credit_limit from credit
+            Stage(
+                "product",
+                self.product_agent.run,
+                requires=["kyc", "credit"],
+                prepare=self._product_input,
+                reads=_input_fields(self.product_agent)
+            ),
+
+            # Stage 5 decides on every assessment (agent outputs only, as before)
+            Stage(
+                "orchestrator",
+                self.orchestrator.run,
+                requires=["document", "kyc", "credit", "product"],
+                prepare=self._orchestrator_input,
+                reads=()
+            ),
+            Stage(
+                "communication",
+                self.communication_agent.run,
+                requires=["orchestrator"],
+                prepare=self._communication_input,
+                reads=["business_name"]
+            ),
+            Stage(
+                "human_review",
+                self.human_review_agent.run,
+                requires=["screening", "document", "kyc", "credit", "product", "orchestrator", "communication"],
+                prepare=self._human_review_input,
+                reads=(),
+                run_if=lambda app_data, outputs: outputs["orchestrator"].hitl_required
+            ),
+        ]
+        for stage in stages:
+            stage.run = self._traced(stage.name, self._as_record(stage.name, self._within_budget(stage.name, stage.run)))
+        return stages
+
+    def _traced(self, name, run):
+        """Trace each run of a stage as an agent.<name> span (its LLM calls nest under it)"""
+
+        def traced_run(stage_input):
+            with span(f"agent.{name}", stage=name):
+                return run(stage_input)
+
+        return traced_run
+
+    def _within_budget(self, name, run):
+        """Bound the LLM calls of a stage by its latency budget"""
+        budget = self.stage_budgets.get(name, self.stage_budget)
+
+        def bounded_run(stage_input):
+            with llm_deadline(budget):
+                return run(stage_input)
+
+        return bounded_run
+
+    def _as_record(self, name, run):
+        """Store the stage's result dict as its typed record (see agents.stage_results)"""
+
+        def record_run(stage_input):
+            emit = _event_sink.get()
+            if emit is None:
+                return stage_result(name, run(stage_input))
+
+            emit(PipelineEvent(STAGE_STARTED, name))
+            with stream_tokens(lambda text: emit(PipelineEvent(TOKEN, name, text=text))):
+                result = stage_result(name, run(stage_input))
+            emit(PipelineEvent(SCORES_READY, name, result))
+            result.when_resolved(lambda record: emit(PipelineEvent(STAGE_DONE, name, record)))
+            return result
+
+        return record_run
+
+    def run(self, app_data, on_stage=None, on_event=None):
+        """
+        Process one application through the full stage graph
+
+        Args:
+            - app_data: Application dict as built by the New Application form
+            - on_stage: Optional callback (stage_name, result) invoked in
+              stage order from the calling thread
+            - on_event: Optional callback (PipelineEvent) invoked from the
+              stage and LLM threads as stages start, score and finish
+
+        Returns:
+            - PipelineRun (see utils.stage_scheduler) whose outputs are
+              stage records (see agents.stage_results)
+        """
+        # The application is parsed once; stage inputs built from it carry the features record
+        app_data = dict(app_data)
+        app_data[FEATURES_KEY] = extract_features(app_data)
+
+        # Stages inherit the application deadline, event sink and trace through their copied context
+        sink_token = _event_sink.set(on_event)
+        try:
+            with span("pipeline.run", application_id=app_data.get("application_id")) as run_span:
+                pipeline_run = self._run(app_data, on_stage)
+                run_span.set("stages", len(pipeline_run.completed))
+                run_span.set("halted_at", pipeline_run.halted_at)
+                return pipeline_run
+        finally:
+            _event_sink.reset(sink_token)
+
+    def stream(self, app_data):
+        """
+        Process one application on a background thread, yielding its PipelineEvents
+
+        Events arrive as they happen: stages that run concurrently interleave,
+        and a stage that a later halt discards may still report events. The
+        last event is PIPELINE_DONE, whose run lists the stages that count;
+        it is sent once every one of them is done. Errors raised by the run
+        are re-raised from the generator.
+
+        Scores arrive ahead of the narrative only when the agents defer their
+        LLM calls (defer_llm); otherwise each stage streams its tokens first.
+        """
+        events = queue.Queue()
+        done_stages = set()
+        done_changed = threading.Condition()
+
+        def on_event(event):
+            events.put(event)
+            if event.kind == STAGE_DONE:
+                with done_changed:
+                    done_stages.add(event.stage)
+                    done_changed.notify_all()
+
+        def produce():
+            try:
+                pipeline_run = self.run(app_data, on_event=on_event)
+                with done_changed:
+                    done_changed.wait_for(lambda: done_stages.issuperset(pipeline_run.completed))
+                events.put(PipelineEvent(PIPELINE_DONE, run=pipeline_run))
+            except BaseException as e:
+                events.put(e)
+
+        # The run joins the caller's trace
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(produce,), name="pipeline-stream", daemon=True).start()
+        while True:
+            event = events.get()
+            if isinstance(event, BaseException):
+                raise event
+            yield event
+            if event.kind == PIPELINE_DONE:
+                return
+
+    def reevaluate(self, original, edited, baseline, narrate=False):
+        """
+        Re-score an edited application, re-running only the stages it affects
+
+        A stage re-runs when it reads a changed application field (its
+        agent's INPUT_FIELDS) or when a stage it requires re-ran with a
+        different outcome; every other stage keeps its baseline result.
+        Stages run one after another in the calling thread, and without
+        narrate their LLM narratives are skipped, so a what-if with no
+        LLM round trip takes milliseconds.
+
+        Args:
+            - original: Application the baseline results were produced for
+            - edited: The edited application
+            - baseline: Stage name -> result (records or stored dicts) of the original run
+            - narrate: Request the narratives of the re-run stages
+
+        Returns:
+            - (PipelineRun, names of the re-run stages)
+        """
+        changed = changed_fields(original, edited)
+        app_data = dict(edited)
+        app_data[FEATURES_KEY] = extract_features(app_data)
+        baseline = {name: stage_result(name, result) for name, result in baseline.items()}
+
+        pipeline_run = PipelineRun()
+        outputs = {}
+        rerun = []
+        differs = set()
+        with span("pipeline.reevaluate", application_id=edited.get("application_id"), narrate=narrate) as run_span, \
+                llm_deadline(self.application_budget), (nullcontext() if narrate else skip_narratives()):
+            for stage in self.scheduler.stages:
+                previous = baseline.get(stage.name)
+                stale = previous is None or stage.reads_any(changed) or any(name in differs for name in stage.requires)
+
+                if not stale:
+                    result = previous
+                elif stage.run_if and not stage.run_if(app_data, outputs):
+                    pipeline_run.skipped.append(stage.name)
+                    if previous is not None:
+                        differs.add(stage.name)
+                    continue
+                else:
+                    result = stage.run(stage.build_input(app_data, outputs))
+                    rerun.append(stage.name)
+                    if previous is None or not result.same_outcome(previous):
+                        differs.add(stage.name)
+
+                outputs[stage.name] = result
+                pipeline_run.outputs[stage.name] = result
+                pipeline_run.completed.append(stage.name)
+
+                reason = stage.halt_when(result) if stage.halt_when else None
+                if reason:
+                    pipeline_run.halted_at = stage.name
+                    pipeline_run.halt_reason = reason
+                    break
+            run_span.set("rerun", ",".join(rerun))
+
+        return pipeline_run, rerun
+
+    def _run(self, app_data, on_stage):
+        with llm_deadline(self.application_budget):
+            if not self.consolidate_llm:
+                return self.scheduler.run(app_data, on_stage=on_stage)
+
+            # Stages return with pending narratives; one request then resolves them all
+            with collect_prompts() as batch:
+                pipeline_run = self.scheduler.run(app_data, on_stage=on_stage)
+
+            if self.defer_llm:
+                batch.flush_async()
+            else:
+                batch.flush()
+            return pipeline_run
+
+    def _kyc_input(self, app_data, outputs):
+        screening = outputs["screening"]
+        kyc_input = dict(app_data)
+        kyc_input["identity"] = dict(
+            app_data.get("identity", {}),
+            pep_check=screening.pep_check,
+            sanctions_check=screening.sanctions_check
+        )
+        return kyc_input
+
+    def _product_input(self, app_data, outputs):
+        kyc, credit = outputs["kyc"], outputs["credit"]
+        return dict(
+            app_data,
+            compliance_score=kyc.compliance_score,
+            credit_score=credit.credit_score,
+            risk_level=credit["risk_level"],
+            credit_limit=credit.credit_limit
+        )
+
+    def _orchestrator_input(self, app_data, outputs):
+        # Namespaced, so the policy reads kyc.risk_level and credit.risk_level separately
+        return StageResults((name, outputs[name]) for name in ["document", "kyc", "credit", "product"])
+
+    def _communication_input(self, app_data, outputs):
+        orchestrator_result = outputs["orchestrator"]
+        return {
+            "status": orchestrator_result["decision"],
+            "business_name": app_data.get("business_name"),
+            "reasoning": orchestrator_result.reasoning
+        }
+
+    def _human_review_input(self, app_data, outputs):
+        kyc, credit, orchestrator = outputs["kyc"], outputs["credit"], outputs["orchestrator"]
+        return {
+            "credit_score": credit.credit_score,
+            "compliance_score": kyc.compliance_score,
+            "kyc_status": kyc["kyc_status"],
+            "documents_status": outputs["document"]["status"],
+            "risk_level": kyc["risk_level"],
+            "risk_factors": list(orchestrator.risk_factors),
+            "decision": orchestrator["decision"],
+            "reasoning": orchestrator.reasoning,
+            "aml_checks": kyc.aml_checks,
+            "financial_ratios": credit.financial_ratios,
+            "credit_limit": credit.credit_limit,
+            "edd_required": kyc.edd_required
+        }
+
+
+def _input_fields(agent):
+    """Application fields an agent declares it reads (None when undeclared: any field)"""
+    return getattr(agent, "INPUT_FIELDS", None)
+
+
+def pipeline_results(pipeline_run):
+    """The records of a pipeline run as an immutable StageResults container, in stage order"""
+    return StageResults((name, pipeline_run.outputs[name]) for name in pipeline_run.completed)
@@ -1,4 +1,7 @@
 from agno.agent import Agent
+from utils.model_clients import agent_model
+from utils.agent_llm import analyze, attach_analysis
+from agents.features import AgeBucket, IndustryTags, features_of
 
 class ProductAgent:
     """
@@ -7,15 +10,20 @@ class ProductAgent:
     business profile, risk assessment, and credit evaluation
     """
     
-    def __init__(self):
+    INPUT_FIELDS = ("financials.revenue", "industry", "business_age", "employees")
+    
+    def __init__(self, defer_llm=False):
         self.agent = Agent(
             name="Product_Agent",
-            model="google:gemini-2.0-flash",
+            model=agent_model(),
             instructions="""You are a banking product specialist.
             Recommend appropriate banking products, account types, credit facilities,
             and services based on business profile, industry, and risk assessment."""
         )
         
+        # Return scores immediately and resolve llm_analysis in the background
+        self.defer_llm = defer_llm
+        
         # Product catalog
         self.account_types = {
             "premium": "Premium Business Banking",
@@ -51,13 +59,14 @@ class ProductAgent:
             - pricing_tier: Fee structure tier
         """
         
-        industry = input_data.get("industry", "").lower()
-        revenue = input_data.get("financials", {}).get("revenue", 0)
+        features = features_of(input_data)
+        industry = features.industry
+        revenue = features.revenue
         credit_score = input_data.get("credit_score", 0)
         compliance_score = input_data.get("compliance_score", 0)
         risk_level = input_data.get("risk_level", "UNKNOWN")
-        employees = input_data.get("employees", 0)
-        business_age = input_data.get("business_age", "")
+        employees = features.employees
+        age_bucket = features.age_bucket
         credit_limit = input_data.get("credit_limit", 0)
         
         # ========================================
@@ -70,7 +79,7 @@ class ProductAgent:
         elif revenue >= 1000000 and credit_score >= 60:
             account_type = self.account_types["standard"]
             pricing_tier = "Tier 2 - Standard ($25/month)"
-        elif revenue >= 500000 or "3-5" in business_age or "5+" in business_age:
+        elif revenue >= 500000 or age_bucket in (AgeBucket.THREE_TO_FIVE_YEARS, AgeBucket.FIVE_PLUS_YEARS):
             account_type = self.account_types["standard"]
             pricing_tier = "Tier 3 - Standard ($25/month)"
         else:
@@ -78,7 +87,7 @@ class ProductAgent:
             pricing_tier = "Tier 4 - Basic ($15/month)"
         
         # Startup special program
-        if "less than 1 year" in business_age.lower() and industry in ["saas", "tech", "consulting"]:
+        if age_bucket == AgeBucket.LESS_THAN_1_YEAR and features.has_tag(IndustryTags.STARTUP_PROGRAM):
             account_type = self.account_types["startup"]
             pricing_tier = "Startup Program (Fees waived 1st year)"
         
@@ -127,7 +136,7 @@ class ProductAgent:
         
         additional_services = []
         
-        if industry in ["saas", "tech", "software"]:
+        if features.has_tag(IndustryTags.TECH_SERVICES):
             additional_services.extend([
                 "ACH/Wire Transfer Services",
                 "International Payment Gateway",
@@ -135,7 +144,7 @@ class ProductAgent:
                 "Treasury Management"
             ])
         
-        if industry in ["retail", "e-commerce", "restaurant"]:
+        if features.has_tag(IndustryTags.MERCHANT_SERVICES):
             additional_services.extend([
                 "Merchant Services (2.5% processing)",
                 "Point of Sale Financing",
@@ -143,7 +152,7 @@ class ProductAgent:
                 "Inventory Financing"
             ])
         
-        if industry in ["manufacturing", "construction"]:
+        if features.has_tag(IndustryTags.INDUSTRIAL_SERVICES):
             additional_services.extend([
                 "Equipment Financing",
                 "Payroll Services",
@@ -151,7 +160,7 @@ class ProductAgent:
                 "Supply Chain Financing"
             ])
         
-        if industry in ["healthcare", "professional services"]:
+        if features.has_tag(IndustryTags.PROFESSIONAL_SERVICES):
             additional_services.extend([
                 "Lockbox Services",
                 "ACH Collections",
@@ -181,13 +190,13 @@ class ProductAgent:
         
         special_programs = []
         
-        if "less than 1 year" in business_age.lower():
+        if age_bucket == AgeBucket.LESS_THAN_1_YEAR:
             special_programs.append("New Business Support Program")
         
         if employees >= 50:
             special_programs.append("Large Employer Program - Payroll & Benefits")
         
-        if industry in ["saas", "tech"]:
+        if features.has_tag(IndustryTags.INNOVATION_BANKING):
             special_programs.append("Innovation Banking - VC/PE Connections")
         
         if revenue >= 10000000:
@@ -201,10 +210,9 @@ class ProductAgent:
             account_type, credit_tier, industry, revenue
         )
         
-        llm_analysis = self.agent.run(f"Recommend best banking products for {industry} business with revenue ₹{revenue/100000:.1f}L, credit score {credit_score}. Account: {account_type}, Products: {loan_products}. Provide brief rationale in 2 to 3 lines only.")
-        llm_response = str(llm_analysis.content) if hasattr(llm_analysis, 'content') else str(llm_analysis)
+        llm_response = analyze(self.agent, f"Recommend best banking products for {industry} business with revenue ₹{revenue/100000:.1f}L, credit score {credit_score}. Account: {account_type}, Products: {loan_products}. Provide brief rationale in 2 to 3 lines only.", defer=self.defer_llm)
 
-        return {
+        return attach_analysis({
             "account_type": account_type,
             "pricing_tier": pricing_tier,
             "loan_products": loan_products,
@@ -216,7 +224,7 @@ class ProductAgent:
             "value_proposition": value_proposition,
             "recommended_credit_limit": credit_limit,
             "llm_analysis": llm_response
-        }
+        })
     
     def _generate_value_prop(self, account_type, credit_tier, industry, revenue):
         """Generate personalized value proposition"""
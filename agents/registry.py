@@ -0,0 +1,121 @@
+import atexit
+import threading
+
+from agents.orchestrator_agent import OrchestratorAgent
+from agents.document_agent import DocumentAgent
+from agents.kyc_agent import KYCAgent
+from agents.credit_agent import CreditAgent
+from agents.product_agent import ProductAgent
+from agents.communication_agent import CommunicationAgent
+from agents.human_review_agent import HumanReviewAgent
+from agents.screening_agent import ScreeningAgent
+
+
+class AgentRegistry:
+    """
+    Process-Wide Agent Registry
+    Builds each agent once, on first use, and shares it across Streamlit
+    reruns, sessions and worker threads. Modules are imported once per
+    process, so the registry outlives every script rerun.
+
+    The stage agents themselves hold no per-run state. Their agno agents
+    are templates only: each LLM call runs on a private copy sharing the
+    process-wide model client (see utils.agent_llm.run_instance).
+    """
+
+    FACTORIES = {
+        "screening": ScreeningAgent,
+        "document": DocumentAgent,
+        "kyc": KYCAgent,
+        "credit": CreditAgent,
+        "product": ProductAgent,
+        "orchestrator": OrchestratorAgent,
+        "communication": CommunicationAgent,
+        "human_review": HumanReviewAgent
+    }
+
+    # Agents whose constructor accepts defer_llm
+    LLM_AGENTS = {"document", "kyc", "credit", "product", "orchestrator", "human_review"}
+
+    def __init__(self):
+        self._agents = {}
+        self._pipelines = {}
+        self._teardown_hooks = []
+        self._lock = threading.RLock()
+
+    def get(self, name, defer_llm=False):
+        """Return the shared agent for a stage name, building it on first use"""
+        if name not in self.FACTORIES:
+            raise KeyError(f"Unknown agent '{name}'. Available: {', '.join(self.FACTORIES)}")
+
+        key = (name, defer_llm and name in self.LLM_AGENTS)
+        agent = self._agents.get(key)
+        if agent is not None:
+            return agent
+
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is None:
+                factory = self.FACTORIES[name]
+                agent = factory(defer_llm=True) if key[1] else factory()
+                self._agents[key] = agent
+            return agent
+
+    def pipeline(self, max_workers=4, defer_llm=False, consolidate_llm=False):
+        """Return a shared OnboardingPipeline wired to the registry's agents"""
+        from agents.pipeline import OnboardingPipeline
+
+        key = (max_workers, defer_llm, consolidate_llm)
+        pipeline = self._pipelines.get(key)
+        if pipeline is not None:
+            return pipeline
+
+        with self._lock:
+            pipeline = self._pipelines.get(key)
+            if pipeline is None:
+                agents = {name: self.get(name, defer_llm=defer_llm) for name in self.FACTORIES}
+                pipeline = OnboardingPipeline(
+                    agents,
+                    max_workers=max_workers,
+                    defer_llm=defer_llm,
+                    consolidate_llm=consolidate_llm
+                )
+                self._pipelines[key] = pipeline
+            return pipeline
+
+    def warm_up(self, names=None, defer_llm=False):
+        """Build agents ahead of traffic (all of them by default)"""
+        for name in names or self.FACTORIES:
+            self.get(name, defer_llm=defer_llm)
+
+    def on_teardown(self, hook):
+        """Register a callable run by teardown() (e.g. closing clients or stores)"""
+        with self._lock:
+            self._teardown_hooks.append(hook)
+        return hook
+
+    def teardown(self):
+        """Run teardown hooks and drop every cached agent and pipeline"""
+        with self._lock:
+            hooks, self._teardown_hooks = self._teardown_hooks, []
+            for agent in self._agents.values():
+                close = getattr(agent, "close", None)
+                if callable(close):
+                    close()
+            self._agents.clear()
+            self._pipelines.clear()
+
+        for hook in reversed(hooks):
+            hook()
+
+    def loaded(self):
+        """Names of the agents built so far"""
+        return sorted({name for name, _ in self._agents})
+
+
+registry = AgentRegistry()
+atexit.register(registry.teardown)
+
+
+def get_agent(name, defer_llm=False):
+    return registry.get(name, defer_llm=defer_llm)
@@ -0,0 +1,103 @@
+import time
+from contextlib import nullcontext
+from utils.watchlist import normalize_name, using_watchlist
+
+class ScreeningAgent:
+    """
+    Sanctions & PEP Screening Agent
+    Screens the owner and business names against the locally loaded
+    OFAC/PEP-style watchlist (WATCHLIST_PATH) with fuzzy name matching.
+    Its pep_check / sanctions_check results replace the pre-set identity
+    values that KYCAgent would otherwise trust.
+    """
+
+    # Application fields the screening reads (dotted paths)
+    INPUT_FIELDS = ("owner_name", "business_name", "identity.pep_check", "identity.sanctions_check")
+
+    # Score thresholds (0-1) for a confirmed match and for a potential match
+    match_threshold = 0.92
+    review_threshold = 0.85
+
+    def __init__(self, watchlist=None):
+        # Defaults to the process-wide memory-mapped list
+        self.watchlist = watchlist
+
+    def run(self, input_data):
+        """
+        Screen the application's names
+
+        Returns:
+            - screening_status: CLEAR/POTENTIAL_MATCH/MATCH/NOT_SCREENED
+            - sanctions_check: clear/potential_match/flagged
+            - pep_check: clear/potential_match/flagged
+            - screening_hits: Ranked candidate hits with scores
+            - unscreened_names: Names with nothing left to match on (e.g. in a
+              non-Latin script), which leave both lists at potential_match
+            - watchlist_version: Version of the list screened against
+        """
+        # The shared list stays mapped for both names, even if it is refreshed meanwhile
+        with nullcontext(self.watchlist) if self.watchlist else using_watchlist() as watchlist:
+            return self._screen(watchlist, input_data)
+
+    def _screen(self, watchlist, input_data):
+        identity = input_data.get("identity", {})
+
+        if watchlist is None:
+            # No list configured: keep the pre-set identity results
+            return {
+                "screening_status": "NOT_SCREENED",
+                "sanctions_check": identity.get("sanctions_check", ""),
+                "pep_check": identity.get("pep_check", ""),
+                "screening_hits": [],
+                "unscreened_names": [],
+                "watchlist_version": None
+            }
+
+        started = time.perf_counter()
+        names = [
+            ("owner", input_data.get("owner_name")),
+            ("business", input_data.get("business_name"))
+        ]
+
+        hits = []
+        unscreened = []
+        for role, name in names:
+            if not name:
+                continue
+            if not normalize_name(name):
+                unscreened.append({"screened_name": name, "screened_role": role})
+                continue
+            for hit in watchlist.screen(name, min_score=self.review_threshold):
+                hit["screened_name"] = name
+                hit["screened_role"] = role
+                hits.append(hit)
+        hits.sort(key=lambda hit: -hit["score"])
+
+        # === Disposition per list ===
+        checks = {}
+        for list_name in ["SANCTIONS", "PEP"]:
+            best = max([hit["score"] for hit in hits if hit["list"] == list_name], default=0)
+            if best >= self.match_threshold:
+                checks[list_name] = "flagged"
+            elif best >= self.review_threshold or unscreened:
+                # A name the index cannot match on is not evidence of a clear result
+                checks[list_name] = "potential_match"
+            else:
+                checks[list_name] = "clear"
+
+        if "flagged" in checks.values():
+            status = "MATCH"
+        elif "potential_match" in checks.values():
+            status = "POTENTIAL_MATCH"
+        else:
+            status = "CLEAR"
+
+        return {
+            "screening_status": status,
+            "sanctions_check": checks["SANCTIONS"],
+            "pep_check": checks["PEP"],
+            "screening_hits": hits,
+            "unscreened_names": unscreened,
+            "watchlist_version": watchlist.version,
+            "screening_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
\ No newline at end of file
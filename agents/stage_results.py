@@ -0,0 +1,424 @@
+import sys
+import json
+from enum import IntEnum
+from collections.abc import Mapping
+from utils.agent_llm import DeferredAnalysis, fallback_narrative
+
+# ========================================
+# Stage results
+#
+# OnboardingPipeline turns every agent's output dict into a slotted,
+# immutable record of its stage (KYCResult, CreditResult, ...). Statuses,
+# decisions and risk levels are held as IntEnum codes and risk factors as
+# tuples of interned strings, so thousands of held results share their
+# vocabulary instead of each carrying its own copies.
+#
+# Attribute access returns the typed values (result.risk_level is
+# RiskLevel.HIGH); mapping access (result["risk_level"], result.get())
+# returns the plain values the agents produced, so existing dict readers
+# and the decision policy keep working. A run's records are collected in
+# a StageResults container, keyed by stage name, so the KYC and credit
+# risk levels never overwrite each other.
+# ========================================
+
+
+class RiskLevel(IntEnum):
+    """KYC/AML (LOW..CRITICAL) and credit (LOW..VERY_HIGH) risk classification"""
+    UNKNOWN = 0
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+    VERY_HIGH = 4
+    CRITICAL = 5
+
+
+class ScreeningStatus(IntEnum):
+    UNKNOWN = 0
+    NOT_SCREENED = 1
+    CLEAR = 2
+    POTENTIAL_MATCH = 3
+    MATCH = 4
+
+
+class DocumentStatus(IntEnum):
+    UNKNOWN = 0
+    COMPLETE = 1
+    INCOMPLETE = 2
+    CRITICAL_MISSING = 3
+
+
+class KYCStatus(IntEnum):
+    UNKNOWN = 0
+    PASSED = 1
+    REVIEW_REQUIRED = 2
+    FAILED = 3
+
+
+class Decision(IntEnum):
+    """Credit decisions and orchestrator decisions"""
+    UNKNOWN = 0
+    APPROVE = 1
+    CONDITIONAL_APPROVE = 2
+    HUMAN_REVIEW = 3
+    REJECT = 4
+
+
+def _code(enum):
+    """Encoder storing a known value as its enum member and anything else as an interned string"""
+    members = enum.__members__
+
+    def encode(value):
+        if isinstance(value, enum):
+            return value
+        if value is None:
+            return None
+        text = str(value)
+        member = members.get(text)
+        return member if member is not None else sys.intern(text)  # UNKNOWN (0) is falsy
+
+    return encode
+
+
+def _interned(value):
+    return tuple(sys.intern(str(item)) for item in value or ())
+
+
+def _plain(value):
+    if isinstance(value, IntEnum):
+        return value.name
+    return value
+
+
+class StageResult(Mapping):
+    """
+    Stage Result Record
+    Base class of the per-stage records. Subclasses declare their FIELDS in
+    output order, the enum of each coded field in CODES and the string
+    sequences to intern in INTERNED. Keys an agent returns beyond FIELDS are
+    kept in extra.
+    """
+
+    __slots__ = ("extra",)
+
+    FIELDS = ()
+    CODES = {}
+    INTERNED = ()
+    VOLATILE = ()       # Fields that differ between identical assessments (timings)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Encoders are resolved once per record class, not per result
+        encoders = []
+        for name in cls.FIELDS:
+            if name in cls.CODES:
+                encoders.append((name, _code(cls.CODES[name])))
+            elif name in cls.INTERNED:
+                encoders.append((name, _interned))
+            else:
+                encoders.append((name, None))
+        cls._encoders = tuple(encoders)
+        cls._field_set = frozenset(cls.FIELDS)
+
+    @classmethod
+    def from_output(cls, output):
+        """Build the record from an agent's result dict (records are returned as they are)"""
+        if isinstance(output, cls):
+            return output
+
+        values = dict(output)
+        record = object.__new__(cls)
+        set_slot = object.__setattr__
+        for name, encode in cls._encoders:
+            value = values.pop(name, None)
+            set_slot(record, name, encode(value) if encode else value)
+        record._init_extra(values)
+        return record
+
+    def _init_extra(self, values):
+        object.__setattr__(self, "extra", values or None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return (type(self).from_output, (self.to_dict(),))
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+    # Read-only mapping view with the agents' plain values
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            return _plain(getattr(self, key))
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from self.FIELDS
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return len(self.FIELDS) + len(self.extra or ())
+
+    def when_resolved(self, fn):
+        """Call fn(record) once the record is final (immediately for stages without a narrative)"""
+        fn(self)
+
+    def same_outcome(self, other):
+        """True when other holds the same assessment (narrative and VOLATILE fields aside)"""
+        if type(other) is not type(self):
+            return False
+        return self.extra == other.extra and all(
+            getattr(self, name) == getattr(other, name) for name in self.FIELDS if name not in self.VOLATILE
+        )
+
+    def to_dict(self):
+        """Plain dict of the record (enum codes as names), ready for json.dumps"""
+        result = {name: _plain(getattr(self, name)) for name in self.FIELDS}
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+
+class AnalysedStageResult(StageResult):
+    """
+    Record of a stage with an llm_analysis narrative
+
+    A deferred narrative is held as its DeferredAnalysis handle and replaced
+    by the text when it resolves; one that missed its deadline becomes the
+    deterministic fallback narrative and marks the record llm_degraded.
+    These two slots are the only ones that change after construction.
+    """
+
+    __slots__ = ("llm_analysis", "llm_degraded")
+
+    def _init_extra(self, values):
+        set_slot = object.__setattr__
+        set_slot(self, "llm_degraded", bool(values.pop("llm_degraded", False)))
+        analysis = values.pop("llm_analysis", None)
+        set_slot(self, "llm_analysis", analysis)
+        super()._init_extra(values)
+
+        if isinstance(analysis, DeferredAnalysis):
+            analysis.add_done_callback(self._store_analysis)
+        elif getattr(analysis, "degraded", False):
+            self._store_analysis(analysis)
+
+    def _store_analysis(self, text):
+        set_slot = object.__setattr__
+        if getattr(text, "degraded", False):
+            set_slot(self, "llm_analysis", fallback_narrative(self))
+            set_slot(self, "llm_degraded", True)
+        else:
+            set_slot(self, "llm_analysis", text)
+
+    def resolve(self, timeout=None):
+        """Wait for a deferred narrative; returns the record for convenience"""
+        if isinstance(self.llm_analysis, DeferredAnalysis):
+            self._store_analysis(self.llm_analysis.result(timeout))
+        return self
+
+    def when_resolved(self, fn):
+        # Registered after _store_analysis, so fn sees the final narrative
+        analysis = self.llm_analysis
+        if isinstance(analysis, DeferredAnalysis):
+            analysis.add_done_callback(lambda text: fn(self))
+        else:
+            fn(self)
+
+    def __getitem__(self, key):
+        if key == "llm_analysis":
+            return self.llm_analysis
+        if key == "llm_degraded" and self.llm_degraded:
+            return True
+        return super().__getitem__(key)
+
+    def __iter__(self):
+        yield from super().__iter__()
+        yield "llm_analysis"
+        if self.llm_degraded:
+            yield "llm_degraded"
+
+    def __len__(self):
+        return super().__len__() + 1 + self.llm_degraded
+
+    def to_dict(self):
+        result = super().to_dict()
+        analysis = self.llm_analysis
+        result["llm_analysis"] = str(analysis) if isinstance(analysis, DeferredAnalysis) else analysis
+        if self.llm_degraded:
+            result["llm_degraded"] = True
+        return result
+
+
+# ========================================
+# Per-stage records
+# ========================================
+
+class ScreeningResult(StageResult):
+    FIELDS = (
+        "screening_status", "sanctions_check", "pep_check", "screening_hits", "unscreened_names",
+        "watchlist_version", "screening_ms"
+    )
+    CODES = {"screening_status": ScreeningStatus}
+    VOLATILE = ("screening_ms",)
+    __slots__ = FIELDS
+
+
+class DocumentResult(AnalysedStageResult):
+    FIELDS = (
+        "extracted_data", "missing_fields", "warnings", "quality_issues", "complete",
+        "verification_score", "status", "total_documents", "required_documents"
+    )
+    CODES = {"status": DocumentStatus}
+    INTERNED = ("missing_fields", "warnings", "quality_issues")
+    __slots__ = FIELDS
+
+
+class KYCResult(AnalysedStageResult):
+    FIELDS = (
+        "compliance_score", "kyc_status", "risk_level", "risk_factors", "aml_checks",
+        "edd_required", "industry_risk", "recommendation"
+    )
+    CODES = {"kyc_status": KYCStatus, "risk_level": RiskLevel, "industry_risk": RiskLevel}
+    INTERNED = ("risk_factors",)
+    __slots__ = FIELDS
+
+
+class CreditResult(AnalysedStageResult):
+    FIELDS = (
+        "credit_score", "risk_level", "credit_limit", "interest_rate", "credit_decision",
+        "financial_ratios", "risk_factors", "revenue_tier", "debt_rating", "maturity_rating",
+        "industry_risk", "loan_products", "monitoring_required"
+    )
+    CODES = {"risk_level": RiskLevel, "credit_decision": Decision}
+    INTERNED = ("risk_factors",)
+    __slots__ = FIELDS
+
+
+class ProductResult(AnalysedStageResult):
+    FIELDS = (
+        "account_type", "pricing_tier", "loan_products", "credit_tier", "credit_card", "card_limit",
+        "additional_services", "special_programs", "value_proposition", "recommended_credit_limit"
+    )
+    __slots__ = FIELDS
+
+
+class OrchestratorResult(AnalysedStageResult):
+    FIELDS = (
+        "decision", "reasoning", "hitl_required", "risk_factors", "approval_conditions",
+        "recommendation", "confidence", "policy_version", "policy_rule"
+    )
+    CODES = {"decision": Decision, "recommendation": Decision}
+    INTERNED = ("risk_factors", "approval_conditions")
+    __slots__ = FIELDS
+
+
+class CommunicationResult(StageResult):
+    FIELDS = ("customer_message", "communication_type", "next_steps", "status")
+    CODES = {"status": Decision}
+    __slots__ = FIELDS
+
+
+class HumanReviewResult(AnalysedStageResult):
+    FIELDS = (
+        "summary", "options", "key_concerns", "recommended_action", "recommendation_rationale",
+        "priority", "reviewer_notes", "suggested_additional_docs", "review_required_by", "escalation_required"
+    )
+    INTERNED = ("options",)
+    __slots__ = FIELDS
+
+
+# Pipeline stage name -> record class
+STAGE_RESULTS = {
+    "screening": ScreeningResult,
+    "document": DocumentResult,
+    "kyc": KYCResult,
+    "credit": CreditResult,
+    "product": ProductResult,
+    "orchestrator": OrchestratorResult,
+    "communication": CommunicationResult,
+    "human_review": HumanReviewResult
+}
+
+
+def stage_result(stage_name, output):
+    """Record of one stage's output (outputs of unknown stages are returned unchanged)"""
+    record_type = STAGE_RESULTS.get(stage_name)
+    return record_type.from_output(output) if record_type else output
+
+
+class StageResults(Mapping):
+    """
+    Immutable per-stage container of the records of one pipeline run, in
+    stage order. Records are reached by key or attribute (results["kyc"],
+    results.kyc).
+    """
+
+    __slots__ = ("_records",)
+
+    def __init__(self, records=()):
+        object.__setattr__(self, "_records", dict(records))
+
+    def __getitem__(self, stage_name):
+        return self._records[stage_name]
+
+    def __getattr__(self, stage_name):
+        try:
+            return self._records[stage_name]
+        except KeyError:
+            raise AttributeError(stage_name) from None
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("StageResults is immutable")
+
+    def __reduce__(self):
+        return (StageResults, (self._records,))
+
+    def __repr__(self):
+        return f"StageResults({self._records!r})"
+
+    @property
+    def decision(self):
+        """Orchestrator decision name, or None when the run halted before it"""
+        orchestrator = self._records.get("orchestrator")
+        return orchestrator["decision"] if orchestrator is not None else None
+
+    def risk_factors(self):
+        """Risk factors of every stage, de-duplicated in stage order"""
+        factors = {}
+        for record in self._records.values():
+            for factor in record.get("risk_factors") or ():
+                factors[factor] = None
+        return list(factors)
+
+    def resolve(self, timeout=None):
+        """Wait for every deferred narrative; returns the container for convenience"""
+        for record in self._records.values():
+            if isinstance(record, AnalysedStageResult):
+                record.resolve(timeout)
+        return self
+
+    def to_dict(self, exclude=()):
+        """Stage name -> plain result dict"""
+        return {
+            name: record.to_dict() if isinstance(record, StageResult) else dict(record)
+            for name, record in self._records.items() if name not in exclude
+        }
+
+    def dumps(self, exclude=()):
+        return json.dumps(self.to_dict(exclude), default=str, ensure_ascii=False)
+
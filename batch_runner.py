@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from utils.submission_index import FLAG, new_submission_index, submitted_at
+
+# Pipeline owned by each worker process (built once by _init_worker)
+_pipeline = None
+# Application store the worker persists results to (None unless --store)
+_store = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run onboarding applications from a JSONL file through the agent pipeline"
+    )
+    parser.add_argument("input", help="JSONL file with one application dict per line")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file receiving one result per application")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--stage-workers", type=int, default=4, help="Concurrent stages per application")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Applications submitted but not yet written (default 2x workers)")
+    parser.add_argument("--consolidate-llm", action="store_true", help="One consolidated LLM request per application")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output instead of skipping completed applications")
+    parser.add_argument("--store", action="store_true", help="Also persist applications and results to the application store")
+    parser.add_argument("--no-screening", action="store_true", help="Run duplicates and high-velocity re-applications too")
+    args = parser.parse_args(argv)
+
+    stats = run_batch(
+        args.input,
+        args.output,
+        workers=args.workers,
+        stage_workers=args.stage_workers,
+        max_in_flight=args.max_in_flight,
+        consolidate_llm=args.consolidate_llm,
+        resume=not args.no_resume,
+        persist=args.store,
+        screen=not args.no_screening
+    )
+    print(json.dumps(stats), file=sys.stderr)
+    return 0 if stats["failed"] == 0 else 1
+
+
+def run_batch(input_path, output_path, workers=4, stage_workers=4, max_in_flight=None,
+              consolidate_llm=False, resume=True, persist=False, screen=True):
+    """
+    Stream applications through the onboarding pipeline on a process pool
+
+    Applications are read lazily and at most max_in_flight are pending at
+    any time, so memory stays flat regardless of the input size. Each result
+    is appended to the output as soon as it completes. With resume enabled,
+    applications that already have a successful result in the output are skipped.
+    With persist enabled, workers also write every application, its stage
+    results and its outcome to the shared application store. With screen
+    enabled, exact duplicates and applicants over the velocity limit (see
+    utils.submission_index, windows measured on submitted_date) get a
+    DUPLICATE or BLOCK record without reaching a worker.
+
+    Returns:
+        - Counters: processed, skipped, screened, failed
+    """
+    max_in_flight = max_in_flight or workers * 2
+    completed_ids = _completed_ids(output_path) if resume else set()
+    if resume:
+        _terminate_partial_line(output_path)
+    stats = {"processed": 0, "skipped": 0, "screened": 0, "failed": 0}
+    index = new_submission_index() if screen else None  # Private to this batch
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as output, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(stage_workers, consolidate_llm, workers, persist)) as pool:
+        in_flight = set()
+
+        for line_number, app_data, error in _read_applications(input_path):
+            if error:
+                _write_record(output, {"line": line_number, "error": error}, stats)
+                continue
+
+            app_id = app_data.setdefault("application_id", f"LINE-{line_number}")
+            if app_id in completed_ids:
+                if index is not None:
+                    # Windows and fingerprints must match the run that wrote the record
+                    index.replay(app_data, now=submitted_at(app_data))
+                stats["skipped"] += 1
+                continue
+
+            if index is not None:
+                check = index.check(app_data, now=submitted_at(app_data))
+                if check.short_circuit:
+                    _write_record(output, dict(check.to_dict(), application_id=app_id, status=check.action), stats, "screened")
+                    continue
+                if check.action == FLAG:
+                    app_data["submission_check"] = check.to_dict()
+
+            if len(in_flight) >= max_in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    _write_record(output, future.result(), stats)
+
+            in_flight.add(pool.submit(_process_application, app_data))
+
+        for future in wait(in_flight).done:
+            _write_record(output, future.result(), stats)
+
+    return stats
+
+
+def _init_worker(stage_workers, consolidate_llm, workers, persist):
+    global _pipeline, _store
+    # Each worker process meters its own slice of the LLM quota
+    share = float(os.getenv("LLM_QUOTA_SHARE", "1")) / workers
+    os.environ["LLM_QUOTA_SHARE"] = str(share)
+
+    from agents.registry import registry
+    _pipeline = registry.pipeline(max_workers=stage_workers, consolidate_llm=consolidate_llm)
+
+    if persist:
+        from utils.application_store import get_store
+        _store = get_store()
+
+
+def _process_application(app_data):
+    """Run one application in a worker process and return its output record"""
+    from agents.pipeline import pipeline_results
+
+    app_id = app_data.get("application_id")
+    try:
+        pipeline_run = _pipeline.run(app_data)
+    except Exception as e:
+        if _store is not None:
+            _store.save_outcome(dict(app_data, status="ERROR"), error=f"{type(e).__name__}: {e}")
+            _store.flush()
+        return {"application_id": app_id, "error": f"{type(e).__name__}: {e}"}
+
+    results = pipeline_results(pipeline_run).resolve()
+    record = {
+        "application_id": app_id,
+        "status": "HALTED" if pipeline_run.halted else results.decision,
+        "halted_at": pipeline_run.halted_at,
+        "halt_reason": pipeline_run.halt_reason,
+        "hitl_required": "orchestrator" in results and results.orchestrator.hitl_required,
+        "stages": results.to_dict(),
+        "processed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+    if _store is not None:
+        for stage_name, result in record["stages"].items():
+            _store.save_stage_result(app_id, stage_name, result)
+        stored = dict(app_data, status=record["status"], processed_at=record["processed_at"])
+        _store.save_outcome(stored, results, halted_at=pipeline_run.halted_at, halt_reason=pipeline_run.halt_reason)
+        _store.flush()  # Pool workers exit without running atexit hooks
+    return record
+
+
+def _read_applications(input_path):
+    """Yield (line_number, app_data, error) for each non-empty input line"""
+    with open(input_path, encoding="utf-8") as source:
+        for line_number, line in enumerate(source, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                app_data = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(app_data, dict):
+                yield line_number, None, "Application must be a JSON object"
+                continue
+            yield line_number, app_data, None
+
+
+def _completed_ids(output_path):
+    """Application ids with a successful record in an existing output file"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, encoding="utf-8") as existing:
+        for line in existing:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written last line of an interrupted run
+            if record.get("application_id") and not record.get("error"):
+                completed.add(record["application_id"])
+    return completed
+
+
+def _terminate_partial_line(output_path):
+    """Make sure appended records do not join a line cut off by an interrupted run"""
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return
+    with open(output_path, "rb+") as existing:
+        existing.seek(-1, os.SEEK_END)
+        if existing.read(1) != b"\n":
+            existing.write(b"\n")
+
+
+def _write_record(output, record, stats, counter="processed"):
+    output.write(json.dumps(record, default=str) + "\n")
+    output.flush()
+    stats["failed" if record.get("error") else counter] += 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+DEFAULT_BASELINE_PATH = "benchmark_baseline.json"
+
+# Reported latency percentiles
+PERCENTILES = {"p50": 0.50, "p95": 0.95, "p99": 0.99}
+
+# A percentile is only compared once this many samples lie beyond it (p95 needs 200, p99 1000)
+MIN_TAIL_SAMPLES = 10
+
+# Settings that must match the baseline for a comparison to mean anything
+COMPARABLE_SETTINGS = ["iterations", "llm_latency_ms", "llm_sigma", "llm_words", "concurrency", "stage_workers", "seed"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the agents and the onboarding pipeline against a stubbed LLM"
+    )
+    parser.add_argument("--sizes", default="1,100,1000", help="Generated portfolio sizes, comma separated (k suffix allowed, e.g. 10k)")
+    parser.add_argument("--iterations", type=int, default=200, help="Runs of the demo application (per agent and through the pipeline)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Median stub model latency")
+    parser.add_argument("--llm-sigma", type=float, default=0.5, help="Shape of the lognormal stub latency (0 = constant)")
+    parser.add_argument("--llm-words", type=int, default=60, help="Words in each stub narrative")
+    parser.add_argument("--concurrency", type=int, default=1, help="Applications processed at once")
+    parser.add_argument("--stage-workers", type=int, default=4, help="Concurrent stages per application")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated portfolios and stub latencies")
+    parser.add_argument("--llm-cache", action="store_true", help="Keep the LLM cache enabled (disabled by default so every prompt reaches the stub)")
+    parser.add_argument("--baseline", default=os.getenv("BENCHMARK_BASELINE_PATH", DEFAULT_BASELINE_PATH), help="Baseline report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Record this run as the baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before a metric counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.25, help="Latency increases below this are never regressions")
+    parser.add_argument("-o", "--output", help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    if not args.llm_cache:
+        os.environ["LLM_CACHE_ENABLED"] = "0"
+    # Agents build a model client on construction; the stub answers every call instead
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub")
+    # Spans are still recorded (their cost is part of the pipeline) but not exported
+    os.environ.setdefault("TRACE_PATH", "")
+
+    report = run_benchmarks(
+        sizes=[_parse_size(size) for size in args.sizes.split(",") if size.strip()],
+        iterations=args.iterations,
+        llm_latency_ms=args.llm_latency_ms,
+        llm_sigma=args.llm_sigma,
+        llm_words=args.llm_words,
+        concurrency=args.concurrency,
+        stage_workers=args.stage_workers,
+        seed=args.seed
+    )
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --save-baseline", file=sys.stderr)
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as source:
+        baseline = json.load(source)
+    regressions = compare(report, baseline, tolerance=args.tolerance, min_delta_ms=args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {args.baseline}", file=sys.stderr)
+        return 1
+    print(f"No regressions against {args.baseline}", file=sys.stderr)
+    return 0
+
+
+def run_benchmarks(sizes=(1, 100, 1000), iterations=200, llm_latency_ms=0.0, llm_sigma=0.5, llm_words=60,
+                   concurrency=1, stage_workers=4, seed=0):
+    """
+    Run every benchmark case and return the report
+
+    Cases:
+        - agents:demo: Each agent's run() on its stage input for the demo
+          application, iterations times
+        - pipeline:demo: The demo application through the full stage graph,
+          iterations times
+        - pipeline:portfolio-<n>: n generated applications (see
+          utils.sample_applications.ApplicationGenerator) through the full stage graph
+
+    Every case reports p50/p95/p99 latency in milliseconds per stage (and per
+    application for the pipeline cases); pipeline cases also report
+    applications per second and the peak traced Python memory. Memory is
+    traced in every run, so its overhead is part of the baseline as well.
+    """
+    from utils.sample_applications import ApplicationGenerator, demo_application
+
+    pipeline, agents, recorder = build_pipeline(llm_latency_ms, llm_sigma, llm_words, seed, stage_workers)
+    demo = demo_application()
+
+    # Warm up imports, lazily built clients and the latency tracker before measuring
+    for _ in range(max(1, iterations // 10)):
+        pipeline.run(demo)
+
+    cases = {"agents:demo": bench_agents(pipeline, agents, demo, iterations)}
+    cases["pipeline:demo"] = bench_pipeline(pipeline, recorder, (demo for _ in range(iterations)), concurrency)
+    for size in sizes:
+        portfolio = ApplicationGenerator(seed=seed).generate(size)
+        cases[f"pipeline:portfolio-{size}"] = bench_pipeline(pipeline, recorder, portfolio, concurrency)
+
+    return {
+        "settings": {
+            "iterations": iterations,
+            "llm_latency_ms": llm_latency_ms,
+            "llm_sigma": llm_sigma,
+            "llm_words": llm_words,
+            "concurrency": concurrency,
+            "stage_workers": stage_workers,
+            "seed": seed
+        },
+        "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "cases": cases
+    }
+
+
+def build_pipeline(llm_latency_ms=0.0, llm_sigma=0.5, llm_words=60, seed=0, stage_workers=4):
+    """
+    Build a pipeline whose agents answer from StubModels and time every run()
+
+    Returns:
+        - (OnboardingPipeline, stage name -> unwrapped agent, StageRecorder)
+    """
+    from agents.pipeline import OnboardingPipeline
+    from agents.registry import AgentRegistry
+
+    # A private registry, so the stubs never leak into the process-wide agents
+    registry = AgentRegistry()
+    recorder = StageRecorder(OnboardingPipeline.STAGES)
+    agents = {}
+    for offset, name in enumerate(AgentRegistry.FACTORIES):
+        agent = registry.get(name)
+        if hasattr(agent, "agent"):
+            agent.agent = StubModel(agent.agent, llm_latency_ms, llm_sigma, llm_words, seed=seed + offset)
+        agents[name] = agent
+
+    timed = {name: TimedAgent(agent, name, recorder) for name, agent in agents.items()}
+    return OnboardingPipeline(timed, max_workers=stage_workers), agents, recorder
+
+
+def bench_agents(pipeline, agents, app_data, iterations):
+    """Time each agent's run() on the stage input it receives for app_data"""
+    from agents.features import FEATURES_KEY, extract_features
+
+    pipeline_run = pipeline.run(app_data)
+    app_data = dict(app_data)
+    app_data[FEATURES_KEY] = extract_features(app_data)
+
+    latency = {}
+    for stage in pipeline.scheduler.stages:
+        if stage.name not in pipeline_run.outputs:
+            continue
+        stage_input = stage.build_input(app_data, pipeline_run.outputs)
+        run = agents[stage.name].run
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            run(stage_input)
+            samples.append((time.perf_counter() - started) * 1000)
+        latency[stage.name] = summarize(samples)
+    return {"iterations": iterations, "latency_ms": latency}
+
+
+def bench_pipeline(pipeline, recorder, applications, concurrency=1):
+    """Process applications through the pipeline, at most concurrency at a time"""
+    recorder.reset()
+    totals = []
+    halted = 0
+
+    def process(app_data):
+        started = time.perf_counter()
+        pipeline_run = pipeline.run(app_data)
+        totals.append((time.perf_counter() - started) * 1000)
+        return pipeline_run.halted
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    if concurrency <= 1:
+        halted = sum(process(app_data) for app_data in applications)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            in_flight = set()
+            for app_data in applications:
+                if len(in_flight) >= concurrency * 2:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    halted += sum(future.result() for future in finished)
+                in_flight.add(executor.submit(process, app_data))
+            halted += sum(future.result() for future in wait(in_flight).done)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latency = {"application": summarize(totals)}
+    latency.update((name, summarize(samples)) for name, samples in recorder.samples.items() if samples)
+    return {
+        "applications": len(totals),
+        "halted": halted,
+        "seconds": round(seconds, 3),
+        "apps_per_second": round(len(totals) / seconds, 2) if seconds > 0 else None,
+        "peak_memory_mb": round(peak / 2 ** 20, 2),
+        "latency_ms": latency
+    }
+
+
+def compare(report, baseline, tolerance=0.25, min_delta_ms=0.25):
+    """
+    List the metrics of report that regressed against baseline
+
+    A latency percentile regresses when it exceeds the baseline by more than
+    tolerance (relative) and min_delta_ms (absolute); throughput and peak
+    memory regress when they are worse by more than tolerance. Tail
+    percentiles with fewer than MIN_TAIL_SAMPLES samples beyond them are
+    too noisy to compare and are skipped.
+    """
+    settings, recorded = report.get("settings", {}), baseline.get("settings", {})
+    mismatched = [name for name in COMPARABLE_SETTINGS if settings.get(name) != recorded.get(name)]
+    if mismatched:
+        return [f"baseline was recorded with different settings ({', '.join(mismatched)}); re-record it with --save-baseline"]
+
+    regressions = []
+    for case, current in report["cases"].items():
+        previous = baseline.get("cases", {}).get(case)
+        if previous is None:
+            continue
+
+        for name, summary in current["latency_ms"].items():
+            old_summary = previous["latency_ms"].get(name, {})
+            for label, percentile in PERCENTILES.items():
+                if summary["count"] * (1 - percentile) < MIN_TAIL_SAMPLES:
+                    continue
+                old, new = old_summary.get(label), summary.get(label)
+                if old is not None and new is not None and new > old * (1 + tolerance) and new - old > min_delta_ms:
+                    regressions.append(f"{case} {name} {label}: {old:.3f} ms -> {new:.3f} ms")
+
+        old, new = previous.get("apps_per_second"), current.get("apps_per_second")
+        if old and new is not None and new < old / (1 + tolerance):
+            regressions.append(f"{case} throughput: {old} -> {new} applications/s")
+
+        old, new = previous.get("peak_memory_mb"), current.get("peak_memory_mb")
+        if old is not None and new is not None and new > old * (1 + tolerance) and new - old > 1:
+            regressions.append(f"{case} peak memory: {old} MB -> {new} MB")
+    return regressions
+
+
+def summarize(samples):
+    """Sample count and nearest-rank percentiles of millisecond samples"""
+    ordered = sorted(samples)
+    summary = {"count": len(ordered)}
+    if ordered:
+        for label, percentile in PERCENTILES.items():
+            rank = max(1, math.ceil(percentile * len(ordered)))
+            summary[label] = round(ordered[rank - 1], 4)
+    return summary
+
+
+class StubModel:
+    """
+    Stand-in for an agent's agno Agent
+    Answers every prompt with a canned narrative after a lognormal delay
+    around the median latency, as a whole or word by word when streamed.
+    Requests still pass through the LLM cache, rate limiter and model slots.
+    """
+
+    def __init__(self, agent, latency_ms=0.0, sigma=0.5, words=60, seed=0):
+        self.name = getattr(agent, "name", None)
+        self.model = getattr(agent, "model", None)
+        self.instructions = getattr(agent, "instructions", "")
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.text = " ".join(["Stub"] + ["assessment"] * max(0, words - 1))
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def run(self, prompt_text, stream=False):
+        with self._lock:
+            self.calls += 1
+            delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        if stream:
+            return iter([_StubResponse(word + " ") for word in self.text.split()])
+        return _StubResponse(self.text)
+
+    def _delay(self):
+        if self.latency_ms <= 0:
+            return 0
+        if self.sigma <= 0:
+            return self.latency_ms / 1000
+        return self._random.lognormvariate(math.log(self.latency_ms), self.sigma) / 1000
+
+
+class _StubResponse:
+    __slots__ = ("content",)
+
+    def __init__(self, content):
+        self.content = content
+
+
+class StageRecorder:
+    """Millisecond run() durations per stage name"""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.reset()
+
+    def reset(self):
+        self.samples = {name: [] for name in self.names}
+
+    def add(self, name, milliseconds):
+        self.samples[name].append(milliseconds)
+
+
+class TimedAgent:
+    """Agent wrapper recording every run() duration under its stage name"""
+
+    def __init__(self, agent, name, recorder):
+        self._agent = agent
+        self._name = name
+        self._recorder = recorder
+
+    def run(self, input_data):
+        started = time.perf_counter()
+        try:
+            return self._agent.run(input_data)
+        finally:
+            self._recorder.add(self._name, (time.perf_counter() - started) * 1000)
+
+    def __getattr__(self, name):
+        # INPUT_FIELDS and the rest come from the wrapped agent
+        return getattr(self._agent, name)
+
+
+def _parse_size(text):
+    text = text.strip().lower()
+    if text.endswith("k"):
+        return int(float(text[:-1]) * 1000)
+    return int(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+import sys
+import json
+import time
+import argparse
+
+from utils.watchlist import compile_watchlist, read_source
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Precompile an OFAC/PEP-style watchlist into the memory-mapped screening index"
+    )
+    parser.add_argument("input", help="JSONL or CSV source (name, aliases, list, id, program, country)")
+    parser.add_argument("-o", "--output", required=True, help="Compiled index file (point WATCHLIST_PATH at it)")
+    parser.add_argument("--version", default="", help="List version recorded in the index (e.g. publication date)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    counts = compile_watchlist(read_source(args.input), args.output, version=args.version)
+    counts["seconds"] = round(time.perf_counter() - started, 2)
+    print(json.dumps(counts), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
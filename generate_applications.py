@@ -0,0 +1,33 @@
+import sys
+import json
+import time
+import argparse
+
+from utils.sample_applications import ApplicationGenerator, write_jsonl
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic onboarding applications as JSONL (input for batch_runner.py)"
+    )
+    parser.add_argument("-n", "--count", type=int, required=True, help="Number of applications")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file receiving one application per line")
+    parser.add_argument("--seed", type=int, default=0, help="Seed (the same seed and config give the same portfolio)")
+    parser.add_argument("--config", help="JSON file overriding the default distributions (see DEFAULT_DISTRIBUTIONS)")
+    parser.add_argument("--id-prefix", default="SYN", help="Prefix of the generated application ids")
+    args = parser.parse_args(argv)
+
+    distributions = None
+    if args.config:
+        with open(args.config, encoding="utf-8") as source:
+            distributions = json.load(source)
+
+    started = time.perf_counter()
+    generator = ApplicationGenerator(seed=args.seed, distributions=distributions, id_prefix=args.id_prefix)
+    written = write_jsonl(generator.generate(args.count), args.output)
+    print(json.dumps({"applications": written, "seconds": round(time.perf_counter() - started, 2)}), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
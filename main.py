@@ -1,22 +1,44 @@
 import streamlit as st
+import altair as alt
 import json
+import time
 from datetime import datetime
-from agents.orchestrator_agent import OrchestratorAgent
-from agents.document_agent import DocumentAgent
-from agents.kyc_agent import KYCAgent
-from agents.credit_agent import CreditAgent
-from agents.product_agent import ProductAgent
-from agents.communication_agent import CommunicationAgent
-from agents.human_review_agent import HumanReviewAgent
+from agents.pipeline import OnboardingPipeline, PIPELINE_DONE, SCORES_READY, STAGE_DONE, STAGE_STARTED, TOKEN
+from agents.pipeline import pipeline_results as onboarding_results
+from agents.registry import registry
+from utils.llm_cache import get_cache
+from utils.rate_limiter import get_limiter
+from utils.deadlines import latency_tracker
+from utils.application_store import get_store
+from utils.review_queue import get_review_queue
+from utils.sample_applications import BUSINESS_AGES, INDUSTRIES, REVENUE_VALUES, demo_application
+from utils.tracing import get_tracer, span, waterfall
+from utils.submission_index import BLOCK, DUPLICATE, FLAG, check_submission
+from utils.application_ids import new_application_id
 
-# Initialize agents
-orchestrator = OrchestratorAgent()
-document_agent = DocumentAgent()
-kyc_agent = KYCAgent()
-credit_agent = CreditAgent()
-product_agent = ProductAgent()
-communication_agent = CommunicationAgent()
-human_review_agent = HumanReviewAgent()
+# Agents are built once per process on first use (see agents.registry), so
+# Streamlit reruns do not reconstruct them or their model clients.
+# Applications and results are persisted in the shared application store.
+
+# Shown while a stage is running
+STAGE_LABELS = {
+    "screening": "🛡️ Sanctions & PEP Screening",
+    "document": "📄 Stage 1: Document Verification",
+    "kyc": "🔒 Stage 2: KYC/AML Compliance Check",
+    "credit": "💰 Stage 3: Credit Risk Assessment",
+    "product": "🎯 Stage 4: Product Recommendation",
+    "orchestrator": "🔄 Stage 5: Final Decision Engine",
+    "communication": "✉️ Stage 6: Customer Communication",
+    "human_review": "👥 Stage 7: Human Review Queue"
+}
+
+# Documents a reviewer can toggle in the what-if panel
+WHAT_IF_DOCUMENTS = {
+    "tax_id": "Tax ID Document (EIN)",
+    "license": "Business License",
+    "bank_statement": "Bank Statement (3 months)",
+    "financial_statement": "Financial Statement"
+}
 
 def main():
     st.set_page_config(
@@ -28,25 +50,31 @@ def main():
     st.title("🏦 TechVenture Bank - Multi-Agent Onboarding")
     st.markdown("**Small business account onboarding with AI agents**")
     
-    # Initialize session state
-    if 'applications' not in st.session_state:
-        st.session_state.applications = {}
-    if 'hitl_queue' not in st.session_state:
-        st.session_state.hitl_queue = {}
-    
     st.sidebar.title("Navigation")
     app_mode = st.sidebar.radio("Choose Mode", [
         "📝 New Application",
         "🤖 Agent Demo",
-        "👥 HITL Review"
+        "👥 HITL Review",
+        "🗂️ Applications"
     ])
     
+    llm_cache = get_cache()
+    if llm_cache is not None:
+        with st.sidebar.expander("⚡ LLM Cache"):
+            st.json(llm_cache.stats())
+    
+    with st.sidebar.expander("⏱️ LLM Quota"):
+        st.json(get_limiter().stats())
+        st.json(latency_tracker.stats())
+    
     if app_mode == "📝 New Application":
         new_application_page()
     elif app_mode == "🤖 Agent Demo":
         agent_demo_page()
     elif app_mode == "👥 HITL Review":
         hitl_review_page()
+    elif app_mode == "🗂️ Applications":
+        applications_page()
 
 def new_application_page():
     st.header("📝 New Business Application")
@@ -57,15 +85,8 @@ def new_application_page():
         with col1:
             st.subheader("Business Information")
             business_name = st.text_input("Business Name*")
-            industry = st.selectbox("Industry*", [
-                "SaaS", "E-commerce", "Restaurant", "Manufacturing",
-                "Consulting", "Healthcare", "Construction", "Retail",
-                "Crypto", "Gambling", "Other"
-            ])
-            revenue = st.selectbox("Annual Revenue*", [
-                "Under $100K", "$100K-$500K", "$500K-$1M",
-                "$1M-$5M", "$5M-$10M", "Over $10M"
-            ])
+            industry = st.selectbox("Industry*", INDUSTRIES)
+            revenue = st.selectbox("Annual Revenue*", list(REVENUE_VALUES))
             employees = st.number_input("Number of Employees*", min_value=1, value=5)
             
         with col2:
@@ -73,9 +94,7 @@ def new_application_page():
             owner_name = st.text_input("Owner Name*")
             owner_email = st.text_input("Email*")
             owner_ssn = st.text_input("SSN (last 4 digits)*", max_chars=4)
-            business_age = st.selectbox("Business Age*", [
-                "Less than 1 year", "1-2 years", "3-5 years", "5+ years"
-            ])
+            business_age = st.selectbox("Business Age*", BUSINESS_AGES)
         
         st.subheader("Document Upload")
         tax_id = st.checkbox("Tax ID Document (EIN)")
@@ -98,7 +117,7 @@ def new_application_page():
             if not all([business_name, industry, revenue, employees, owner_name, owner_email, owner_ssn]):
                 st.error("Please fill in all required fields (*)")
             else:
-                app_id = f"APP-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+                app_id = new_application_id()
                 app_data = {
                     "application_id": app_id,
                     "business_name": business_name,
@@ -137,69 +156,42 @@ def new_application_page():
                     "status": "PENDING"
                 }
                 
-                st.session_state.applications[app_id] = app_data
-                st.session_state.demo_data = app_data
-                st.success(f"✅ Application {app_id} submitted! Go to '🤖 Agent Demo' to process it.")
+                # Duplicate and velocity checks before anything is stored or run
+                check = check_submission(app_data)
+                if check.action == DUPLICATE:
+                    st.warning(f"⚠️ This application is identical to {check.duplicate_of} and was not submitted again.")
+                    original = get_store().get(check.duplicate_of)
+                    if original is not None:
+                        st.session_state.demo_data = original["application"]
+                elif check.action == BLOCK:
+                    st.error("🚫 Application not accepted: " + "; ".join(check.reasons))
+                else:
+                    if check.action == FLAG:
+                        app_data["submission_check"] = check.to_dict()
+                        st.warning("⚠️ Flagged for review: " + "; ".join(check.reasons))
+                    get_store().save_application(app_data)
+                    st.session_state.demo_data = app_data
+                    st.success(f"✅ Application {app_id} submitted! Go to '🤖 Agent Demo' to process it.")
 
 def extract_revenue_value(revenue_str):
     """Extract numeric revenue from string"""
-    if "Under" in revenue_str:
-        return 50000
-    elif "$100K-$500K" in revenue_str:
-        return 300000
-    elif "$500K-$1M" in revenue_str:
-        return 750000
-    elif "$1M-$5M" in revenue_str:
-        return 2500000
-    elif "$5M-$10M" in revenue_str:
-        return 7500000
-    elif "Over $10M" in revenue_str:
-        return 15000000
-    return 0
+    return REVENUE_VALUES.get(revenue_str, 0)
 
 def agent_demo_page():
     st.header("🤖 Multi-Agent Processing Pipeline")
-    st.markdown("**Orchestration with sequential agent execution**")
+    st.markdown("**Orchestration with dependency-aware parallel agent execution**")
     
     if 'demo_data' not in st.session_state:
         st.info("ℹ️ No application submitted. Using default demo application.")
-        st.session_state.demo_data = {
-            "application_id": "APP-DEMO-001",
-            "business_name": "StableTech Solutions",
-            "industry": "Healthcare",
-            "revenue": "$5M-$10M",
-            "employees": 25,
-            "owner_name": "Dr. Sarah Johnson",
-            "owner_email": "sarah@stabletech.com",
-            "owner_ssn": "1234",
-            "business_age": "5+ years",
-            "documents": {
-                "tax_id": True,
-                "license": True,
-                "bank_statement": True,
-                "financial_statement": True
-            },
-            "business_profile": {
-                "avg_transaction": 15000,
-                "monthly_volume": 200,
-                "international": False,
-                "high_risk_countries": False
-            },
-            "identity": {
-                "id_verified": True,
-                "pep_check": "clear",
-                "sanctions_check": "clear",
-                "adverse_media": False
-            },
-            "financials": {
-                "revenue": 8000000,
-                "debt": 50000,
-                "cash_flow_positive": True,
-                "debt_to_income": 0.15
-            },
-            "submitted_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "status": "PENDING"
-        }
+        st.session_state.demo_data = demo_application()
+    
+    recent = get_store().list_applications(limit=20)["items"]
+    if recent:
+        labels = {f"{item['application_id']} - {item['business_name']} ({item['status']})": item["application_id"] for item in recent}
+        choice = st.selectbox("Load a stored application", ["(current)"] + list(labels))
+        if choice != "(current)" and st.button("📂 Load"):
+            st.session_state.demo_data = get_store().get(labels[choice])["application"]
+            st.rerun()
     
     st.subheader("📋 Application Details")
     with st.expander("View Application Data", expanded=False):
@@ -213,69 +205,184 @@ def agent_demo_page():
             process_application()
 
 def process_application():
-    """Execute the agent pipeline"""
+    """Execute the agent pipeline, then show where the run spent its time"""
     app_data = st.session_state.demo_data
+    with span("ui.process_application", application_id=app_data.get("application_id")) as ui_span:
+        stream_application(app_data)
+    render_trace(ui_span.trace_id)
+
+def stream_application(app_data):
+    """Run the agent pipeline on an application, rendering each stage as its events arrive"""
     app_id = app_data.get('application_id')
+    store = get_store()
+    
+    # One slot per stage in stage order; concurrent stages fill theirs as they finish
+    panels = {}
+    for name in OnboardingPipeline.STAGES:
+        panel = st.container()
+        panels[name] = (panel.empty(), panel.empty())
+    narratives = {}
+    
+    # Deferred narratives let each stage render on its scores; the LLM commentary streams in after
+    for event in registry.pipeline(defer_llm=True).stream(app_data):
+        if event.kind == PIPELINE_DONE:
+            pipeline_run = event.run
+            break
+        
+        body, narrative = panels[event.stage]
+        if event.kind == STAGE_STARTED:
+            body.info(f"⏳ {STAGE_LABELS[event.stage]} running...")
+        elif event.kind == SCORES_READY:
+            with body.container(), span(f"ui.render.{event.stage}"):
+                render_stage(event.stage, event.result, app_data)
+        elif event.kind == TOKEN:
+            narratives[event.stage] = narratives.get(event.stage, "") + event.text
+            narrative.markdown(f"🤖 {narratives[event.stage]}▌")
+        elif event.kind == STAGE_DONE and event.result.get("llm_analysis"):
+            narrative.markdown(f"🤖 {event.result['llm_analysis']}")
+    
+    # Skipped stages and stages discarded by a halt leave no trace
+    for name, (body, narrative) in panels.items():
+        if name not in pipeline_run.completed:
+            body.empty()
+            narrative.empty()
+    
+    # Stored once every narrative has resolved
+    with span("ui.save_results"):
+        for name in pipeline_run.completed:
+            store.save_stage_result(app_id, name, pipeline_run.outputs[name])
+    
+    if pipeline_run.halted:
+        app_data["status"] = "HALTED"
+        app_data["processed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with span("ui.save_outcome"):
+            store.save_outcome(app_data, onboarding_results(pipeline_run), halted_at=pipeline_run.halted_at, halt_reason=pipeline_run.halt_reason)
+        return
+    
+    pipeline_results = onboarding_results(pipeline_run)
+    decision = pipeline_results.decision
+    
+    # Add to the shared HITL queue (the review package is stored once, as review_data)
+    if "human_review" in pipeline_results:
+        get_review_queue().enqueue(app_id, app_data, pipeline_results.to_dict(exclude=["human_review"]), pipeline_results.human_review)
+        st.warning(f"⚠️ Application {app_id} added to HITL review queue")
+    
+    st.session_state.last_result = pipeline_results
+    app_data["status"] = decision
+    app_data["processed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with span("ui.save_outcome"):
+        store.save_outcome(app_data, pipeline_results)
+    
+    st.success("✅ **Pipeline Execution Complete!**")
+    with span("ui.final_summary"):
+        display_final_summary()
+
+def render_trace(trace_id):
+    """Waterfall of a traced run: pipeline stages, agent runs, LLM calls and rendering"""
+    tracer = get_tracer()
+    rows = waterfall(tracer.trace(trace_id)) if tracer is not None and trace_id else []
+    if not rows:
+        return
+    
+    for position, row in enumerate(rows):
+        detail = row.get("agent") or row.get("stage") or ""
+        row["label"] = f"{position:02d} {'· ' * row['depth']}{row['span']} {detail}".rstrip()
+        row["layer"] = row["span"].split(".")[0]
     
-    with st.spinner("🔄 Executing Agent Pipeline..."):
-        pipeline_results = {}
+    with st.expander("⏱️ Latency Breakdown", expanded=True):
+        chart = alt.Chart(alt.Data(values=rows)).mark_bar().encode(
+            x=alt.X("start_ms:Q", title="Milliseconds since start"),
+            x2="end_ms:Q",
+            y=alt.Y("label:N", sort=None, title=None),
+            color=alt.Color("layer:N", title="Layer"),
+            tooltip=["span:N", "duration_ms:Q", "cache:N", "prompt_chars:Q", "response_chars:Q", "model:N"]
+        )
+        st.altair_chart(chart, use_container_width=True)
         
-        # Stage 1: Document Verification
+        llm_rows = [row for row in rows if row["layer"] == "llm"]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total", f"{rows[0]['duration_ms']:.0f} ms")
+        col2.metric("LLM Calls", len(llm_rows))
+        col3.metric("Cache Hits", sum(row.get("cache") == "hit" for row in llm_rows))
+        st.dataframe(
+            [{key: row.get(key) for key in ["span", "duration_ms", "start_ms", "cache", "prompt_chars", "response_chars", "error"]} for row in rows],
+            use_container_width=True
+        )
+        if tracer.path:
+            st.caption(f"Trace {trace_id} exported to {tracer.path} (OTLP/JSON)")
+
+def stage_details(result):
+    """Stage result for st.json, without the narrative (streamed below the stage)"""
+    details = result.to_dict()
+    details.pop("llm_analysis", None)
+    return details
+
+def render_stage(stage_name, result, app_data):
+    """Render one pipeline stage as soon as it is emitted"""
+    
+    # Sanctions & PEP screening (feeds the KYC stage)
+    if stage_name == "screening":
+        st.markdown("### 🛡️ Sanctions & PEP Screening")
+        with st.status("Screening names against the watchlist...", expanded=True) as status:
+            st.json(stage_details(result))
+            
+            screening_status = result.get("screening_status")
+            if screening_status == "MATCH":
+                status.update(label="🚨 Watchlist match found", state="error")
+            elif screening_status == "POTENTIAL_MATCH":
+                status.update(label="⚠️ Potential watchlist match", state="complete")
+            elif screening_status == "NOT_SCREENED":
+                status.update(label="ℹ️ No watchlist configured - identity checks taken as submitted", state="complete")
+            else:
+                status.update(label="✅ No watchlist matches", state="complete")
+    
+    # Stage 1: Document Verification
+    elif stage_name == "document":
         st.markdown("### 📄 Stage 1: Document Verification")
         with st.status("Processing documents...", expanded=True) as status:
-            doc_result = document_agent.run(app_data)
-            pipeline_results.update(doc_result)
-            app_data["documents_status"] = doc_result.get("status", "INCOMPLETE")
+            app_data["documents_status"] = result.get("status", "INCOMPLETE")
             
-            st.json(doc_result)
+            st.json(stage_details(result))
             
-            if not doc_result.get("complete", False):
+            if not result.get("complete", False):
                 status.update(label="❌ Document verification failed", state="error")
                 st.error("**Pipeline Halted:** Incomplete documentation")
                 return
             status.update(label="✅ Documents verified", state="complete")
-        
-        # Stage 2: KYC/AML Compliance
+    
+    # Stage 2: KYC/AML Compliance
+    elif stage_name == "kyc":
         st.markdown("### 🔒 Stage 2: KYC/AML Compliance Check")
         with st.status("Running compliance checks...", expanded=True) as status:
-            kyc_result = kyc_agent.run(app_data)
-            pipeline_results.update(kyc_result)
+            st.json(stage_details(result))
             
-            st.json(kyc_result)
-            
-            if kyc_result.get("kyc_status") == "FAILED":
+            if result.get("kyc_status") == "FAILED":
                 status.update(label="❌ Compliance check failed", state="error")
                 st.error("**Pipeline Halted:** Failed KYC/AML compliance")
                 return
             status.update(label="✅ Compliance verified", state="complete")
-        
-        # Stage 3: Credit Risk Assessment
+    
+    # Stage 3: Credit Risk Assessment
+    elif stage_name == "credit":
         st.markdown("### 💰 Stage 3: Credit Risk Assessment")
         with st.status("Analyzing creditworthiness...", expanded=True) as status:
-            credit_result = credit_agent.run(app_data)
-            pipeline_results.update(credit_result)
-            
-            st.json(credit_result)
+            st.json(stage_details(result))
             status.update(label="✅ Credit analysis complete", state="complete")
-        
-        # Stage 4: Product Recommendation
+    
+    # Stage 4: Product Recommendation
+    elif stage_name == "product":
         st.markdown("### 🎯 Stage 4: Product Recommendation")
         with st.status("Matching products...", expanded=True) as status:
-            product_result = product_agent.run(app_data)
-            pipeline_results.update(product_result)
-            
-            st.json(product_result)
+            st.json(stage_details(result))
             status.update(label="✅ Products recommended", state="complete")
-        
-        # Stage 5: Orchestrator Decision
+    
+    # Stage 5: Orchestrator Decision
+    elif stage_name == "orchestrator":
         st.markdown("### 🔄 Stage 5: Final Decision Engine")
         with st.status("Making final decision...", expanded=True) as status:
-            orchestrator_result = orchestrator.run(pipeline_results)
-            pipeline_results.update(orchestrator_result)
-            
-            decision = orchestrator_result["decision"]
-            reasoning = orchestrator_result["reasoning"]
-            risk_factors = orchestrator_result.get("risk_factors", [])
+            decision = result["decision"]
+            reasoning = result["reasoning"]
+            risk_factors = result.get("risk_factors", [])
             
             if decision == "APPROVE":
                 st.success(f"✅ **Decision: {decision}**")
@@ -288,52 +395,28 @@ def process_application():
                 status.update(label="⚠️ Human review required", state="complete")
             
             st.info(f"**Reasoning:** {reasoning}")
-            st.write(f"**Human Review Required:** {orchestrator_result['hitl_required']}")
+            st.write(f"**Human Review Required:** {result['hitl_required']}")
+            st.caption(f"Decision policy {result.get('policy_version')} · rule `{result.get('policy_rule')}`")
             
             if risk_factors:
                 st.warning("**Risk Factors Identified:**")
                 for factor in risk_factors:
                     st.write(f"- {factor}")
-        
-        # Stage 6: Communication
+    
+    # Stage 6: Communication
+    elif stage_name == "communication":
         st.markdown("### ✉️ Stage 6: Customer Communication")
         with st.status("Generating customer message...", expanded=True) as status:
-            comm_result = communication_agent.run({
-                "status": decision,
-                "business_name": app_data.get("business_name"),
-                "reasoning": reasoning
-            })
-            pipeline_results.update(comm_result)
-            
             st.success("📧 **Customer Message:**")
-            st.info(comm_result["customer_message"])
+            st.info(result["customer_message"])
             status.update(label="✅ Communication sent", state="complete")
-        
-        # Stage 7: HITL Queue
-        if pipeline_results.get("hitl_required"):
-            st.markdown("### 👥 Stage 7: Human Review Queue")
-            with st.status("Adding to review queue...", expanded=True) as status:
-                human_result = human_review_agent.run(pipeline_results)
-                pipeline_results.update({"human_review": human_result})
-                
-                # Add to HITL queue
-                st.session_state.hitl_queue[app_id] = {
-                    "application": app_data,
-                    "results": pipeline_results,
-                    "review_data": human_result,
-                    "queued_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                }
-                
-                st.json(human_result)
-                st.warning(f"⚠️ Application {app_id} added to HITL review queue")
-                status.update(label="✅ Added to review queue", state="complete")
-        
-        st.session_state.last_result = pipeline_results
-        app_data["status"] = decision
-        app_data["processed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    st.success("✅ **Pipeline Execution Complete!**")
-    display_final_summary()
+    # Stage 7: HITL Queue
+    elif stage_name == "human_review":
+        st.markdown("### 👥 Stage 7: Human Review Queue")
+        with st.status("Adding to review queue...", expanded=True) as status:
+            st.json(stage_details(result))
+            status.update(label="✅ Added to review queue", state="complete")
 
 def display_final_summary():
     """Display final results summary"""
@@ -344,11 +427,16 @@ def display_final_summary():
     st.subheader("🎯 Final Results Dashboard")
     
     result = st.session_state.last_result
+    document = result.get('document', {})
+    kyc = result.get('kyc', {})
+    credit = result.get('credit', {})
+    product = result.get('product', {})
+    orchestrator = result.get('orchestrator', {})
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        status = result.get('decision', 'UNKNOWN')
+        status = orchestrator.get('decision', 'UNKNOWN')
         if status == "APPROVE":
             st.metric("Decision", "✅ APPROVED", delta="Success")
         elif status == "REJECT":
@@ -357,52 +445,81 @@ def display_final_summary():
             st.metric("Decision", "⚠️ REVIEW", delta="Pending")
     
     with col2:
-        credit = result.get('credit_score', 0)
-        st.metric("Credit Score", f"{credit}/100", 
-                 delta="Good" if credit >= 70 else "Low", 
-                 delta_color="normal" if credit >= 70 else "inverse")
+        credit_score = credit.get('credit_score', 0)
+        st.metric("Credit Score", f"{credit_score}/100", 
+                 delta="Good" if credit_score >= 70 else "Low", 
+                 delta_color="normal" if credit_score >= 70 else "inverse")
     
     with col3:
-        compliance = result.get('compliance_score', 0)
+        compliance = kyc.get('compliance_score', 0)
         st.metric("Compliance Score", f"{compliance}/100",
                  delta="Pass" if compliance >= 70 else "Fail",
                  delta_color="normal" if compliance >= 70 else "inverse")
     
     with col4:
-        risk = result.get('risk_level', 'N/A')
-        st.metric("Risk Level", risk)
+        st.metric("KYC Risk Level", kyc.get('risk_level', 'N/A'))
+        st.caption(f"Credit risk: {credit.get('risk_level', 'N/A')}")
     
     # Detailed breakdown
     with st.expander("📊 Detailed Breakdown", expanded=False):
         col5, col6 = st.columns(2)
         with col5:
-            st.write("**Document Status:**", "✅ Complete" if result.get('complete') else "❌ Incomplete")
-            st.write("**KYC Status:**", result.get('kyc_status', 'N/A'))
-            st.write("**Account Type:**", result.get('account_type', 'N/A'))
+            st.write("**Document Status:**", "✅ Complete" if document.get('complete') else "❌ Incomplete")
+            st.write("**KYC Status:**", kyc.get('kyc_status', 'N/A'))
+            st.write("**Account Type:**", product.get('account_type', 'N/A'))
         with col6:
-            st.write("**Loan Eligibility:**", result.get('loan_offer', 'N/A'))
-            st.write("**Credit Card:**", result.get('credit_card', 'N/A'))
-            st.write("**HITL Required:**", "Yes" if result.get('hitl_required') else "No")
+            st.write("**Loan Eligibility:**", product.get('loan_offer', 'N/A'))
+            st.write("**Credit Card:**", product.get('credit_card', 'N/A'))
+            st.write("**HITL Required:**", "Yes" if orchestrator.get('hitl_required') else "No")
 
 def hitl_review_page():
     st.header("👥 Human-in-the-Loop Review Interface")
     st.markdown("**Manual review and decision-making for flagged applications**")
     
-    if not st.session_state.hitl_queue:
+    queue = get_review_queue()
+    queue_stats = queue.stats()
+    if not queue_stats["total"]:
         st.info("📭 No applications pending human review")
         return
     
-    st.success(f"📬 **{len(st.session_state.hitl_queue)}** application(s) awaiting review")
+    st.success(f"📬 **{queue_stats['total']}** application(s) awaiting review "
+               f"({queue_stats['overdue']} overdue, {queue_stats['claimed']} claimed)")
+    
+    reviewer_id = st.text_input("Reviewer ID", value=st.session_state.get("reviewer_id", "REV-001"))
+    st.session_state.reviewer_id = reviewer_id
+    
+    with st.expander("📋 Review Backlog (earliest SLA deadline first)", expanded=False):
+        st.dataframe(queue.list_cases(limit=100), use_container_width=True)
+    
+    # Cases are leased so two reviewers never work the same application
+    review_item = queue.get(st.session_state.get("hitl_claim") or "")
+    if review_item is None or review_item["lease_owner"] != reviewer_id:
+        st.session_state.hitl_claim = None
+        if st.button("📥 Claim Next Case", type="primary", use_container_width=True):
+            claimed = queue.claim(reviewer_id)
+            if claimed is None:
+                st.info("All pending cases are currently claimed by other reviewers")
+            else:
+                st.session_state.hitl_claim = claimed["application_id"]
+                st.rerun()
+        return
     
-    # Select application to review
-    app_ids = list(st.session_state.hitl_queue.keys())
-    selected_app = st.selectbox("Select Application to Review", app_ids)
+    queue.renew(review_item["application_id"], reviewer_id)
+    selected_app = review_item["application_id"]
+    st.caption(f"🔒 Claimed by {reviewer_id} · {review_item['priority']} · SLA due {review_item['due_at']}"
+               + (" · ⏰ OVERDUE" if review_item["overdue"] else ""))
+    if st.button("↩️ Release Case"):
+        queue.release(selected_app, reviewer_id)
+        st.session_state.hitl_claim = None
+        st.rerun()
     
     if selected_app:
-        review_item = st.session_state.hitl_queue[selected_app]
         app_data = review_item["application"]
         results = review_item["results"]
         review_data = review_item["review_data"]
+        kyc = results.get("kyc", {})
+        credit = results.get("credit", {})
+        orchestrator = results.get("orchestrator", {})
         
         st.markdown("---")
         
@@ -433,14 +550,14 @@ def hitl_review_page():
             st.info(f"**Documents**\n\n{summary.get('documents', 'N/A')}")
         
         # Risk Factors
-        if results.get("risk_factors"):
+        if orchestrator.get("risk_factors"):
             st.warning("⚠️ **Risk Factors Identified:**")
-            for factor in results["risk_factors"]:
+            for factor in orchestrator["risk_factors"]:
                 st.write(f"- {factor}")
         
         # AI Recommendation
         st.info(f"**AI Recommendation:** {summary.get('recommendation', 'N/A')}")
-        st.write(f"**Reasoning:** {results.get('reasoning', 'N/A')}")
+        st.write(f"**Reasoning:** {orchestrator.get('reasoning', 'N/A')}")
         
         # Detailed Data Tabs
         tab1, tab2, tab3, tab4 = st.tabs(["📄 Documents", "🔒 KYC/AML", "💰 Financials", "📊 Full Results"])
@@ -451,22 +568,27 @@ def hitl_review_page():
         with tab2:
             st.json({
                 "identity": app_data.get("identity", {}),
-                "compliance_score": results.get("compliance_score"),
-                "kyc_status": results.get("kyc_status"),
-                "aml_checks": results.get("aml_checks", {})
+                "compliance_score": kyc.get("compliance_score"),
+                "kyc_status": kyc.get("kyc_status"),
+                "risk_level": kyc.get("risk_level"),
+                "aml_checks": kyc.get("aml_checks", {})
             })
         
         with tab3:
             st.json({
                 "financials": app_data.get("financials", {}),
-                "credit_score": results.get("credit_score"),
-                "risk_level": results.get("risk_level"),
-                "credit_limit": results.get("credit_limit")
+                "credit_score": credit.get("credit_score"),
+                "risk_level": credit.get("risk_level"),
+                "credit_limit": credit.get("credit_limit")
             })
         
         with tab4:
             st.json(results)
         
+        # What-if re-scoring (no LLM calls until the reviewer commits)
+        with st.expander("🧪 What-if Analysis", expanded=False):
+            what_if_panel(selected_app, app_data, results, review_data, reviewer_id)
+        
         # Human Decision Interface
         st.markdown("---")
         st.subheader("🎯 Human Decision")
@@ -493,12 +615,16 @@ def hitl_review_page():
         with col9:
             st.write("**Reviewer Information**")
             reviewer_name = st.text_input("Reviewer Name", value="John Smith")
-            reviewer_id = st.text_input("Reviewer ID", value="REV-001")
+            st.write(f"Reviewer ID: {reviewer_id}")
         
         # Submit Decision
         if st.button("✅ Submit Human Decision", type="primary", use_container_width=True):
             if not human_notes:
                 st.error("Please provide reviewer notes before submitting")
+            elif not queue.complete(selected_app, reviewer_id):
+                # Remove from HITL queue (fails if the lease expired and the case moved on)
+                st.error("Your claim on this case has expired; claim it again to submit a decision")
+                st.session_state.hitl_claim = None
             else:
                 # Record decision
                 final_decision = {
@@ -518,12 +644,11 @@ def hitl_review_page():
                 # Update application status
                 app_data["status"] = final_decision["human_decision"]
                 app_data["human_review"] = final_decision
-                
-                # Remove from HITL queue
-                del st.session_state.hitl_queue[selected_app]
+                get_store().save_application(app_data)
+                st.session_state.hitl_claim = None
                 
                 # Send notification
-                comm_result = communication_agent.run({
+                comm_result = registry.get("communication").run({
                     "status": final_decision["human_decision"],
                     "business_name": app_data.get("business_name"),
                     "reasoning": human_notes
@@ -538,5 +663,136 @@ def hitl_review_page():
                 st.balloons()
                 st.rerun()
 
+def what_if_panel(app_id, app_data, results, review_data, reviewer_id):
+    """Re-score a review case with edited documents and financials"""
+    documents = app_data.get("documents", {})
+    financials = app_data.get("financials", {})
+    st.caption("Only the agents whose inputs change are re-run. LLM narratives are generated when you commit.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("**Documents**")
+        edited_documents = dict(documents)
+        for key, label in WHAT_IF_DOCUMENTS.items():
+            checked = st.checkbox(label, value=bool(documents.get(key)), key=f"what_if_{app_id}_{key}")
+            if checked != bool(documents.get(key)):
+                edited_documents[key] = checked
+    with col2:
+        st.write("**Financials**")
+        edited_financials = dict(financials)
+        revenue = st.number_input("Revenue (₹)", min_value=0, value=int(financials.get("revenue", 0) or 0), step=100000, key=f"what_if_{app_id}_revenue")
+        debt = st.number_input("Debt (₹)", min_value=0, value=int(financials.get("debt", 0) or 0), step=10000, key=f"what_if_{app_id}_debt")
+        debt_to_income = st.number_input("Debt-to-income ratio", min_value=0.0, value=float(financials.get("debt_to_income", 0) or 0), step=0.05, key=f"what_if_{app_id}_dti")
+        cash_flow_positive = st.checkbox("Cash flow positive", value=bool(financials.get("cash_flow_positive")), key=f"what_if_{app_id}_cash_flow")
+        for field, value in [("revenue", revenue), ("debt", debt), ("debt_to_income", debt_to_income), ("cash_flow_positive", cash_flow_positive)]:
+            if value != (financials.get(field) or 0):
+                edited_financials[field] = value
+    
+    edited = dict(app_data, documents=edited_documents, financials=edited_financials)
+    baseline = dict(results, human_review=review_data)
+    
+    started = time.perf_counter()
+    what_if_run, rerun = registry.pipeline().reevaluate(app_data, edited, baseline)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if not rerun:
+        st.info("Change a document or financial figure to see its effect on the decision")
+        return
+    
+    before = {name: results.get(name, {}) for name in ["kyc", "credit", "orchestrator"]}
+    after = {name: what_if_run.outputs[name] for name in ["kyc", "credit", "orchestrator"] if name in what_if_run.outputs}
+    
+    col3, col4, col5 = st.columns(3)
+    with col3:
+        decision = after["orchestrator"]["decision"] if "orchestrator" in after else "HALTED"
+        st.metric("Decision", decision, delta=f"was {before['orchestrator'].get('decision', 'N/A')}", delta_color="off")
+    with col4:
+        if "credit" in after:
+            credit_score = after["credit"].credit_score
+            st.metric("Credit Score", f"{credit_score}/100", delta=credit_score - before["credit"].get("credit_score", 0))
+    with col5:
+        if "kyc" in after:
+            compliance = after["kyc"].compliance_score
+            st.metric("Compliance", f"{compliance}/100", delta=compliance - before["kyc"].get("compliance_score", 0))
+    
+    if what_if_run.halted:
+        st.error(f"**Pipeline would halt at {what_if_run.halted_at}:** {what_if_run.halt_reason}")
+    elif "orchestrator" in after:
+        st.write(f"**Reasoning:** {after['orchestrator'].reasoning}")
+    st.caption(f"Re-ran {', '.join(rerun)} in {elapsed_ms:.1f} ms")
+    
+    if st.button("💾 Commit What-if", help="Apply the changes to the application and generate the narratives"):
+        with st.spinner("Re-running the affected agents with narratives..."):
+            committed_run, rerun = registry.pipeline().reevaluate(app_data, edited, baseline, narrate=True)
+        committed = onboarding_results(committed_run)
+        
+        store = get_store()
+        for name in rerun:
+            store.save_stage_result(app_id, name, committed_run.outputs[name])
+        store.save_application(edited)
+        store.save_outcome(edited, committed, halted_at=committed_run.halted_at, halt_reason=committed_run.halt_reason)
+        
+        # The case keeps its place in the queue; an outcome that no longer needs review keeps the old package
+        review = committed.get("human_review", review_data)
+        if not get_review_queue().update(app_id, reviewer_id, edited, committed.to_dict(exclude=["human_review"]), review):
+            st.error("Your claim on this case has expired; claim it again to commit a what-if")
+            return
+        st.rerun()
+
+def applications_page():
+    st.header("🗂️ Applications")
+    st.markdown("**Browse stored applications and their decisions**")
+    
+    store = get_store()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        status = st.selectbox("Status", ["All", "PENDING", "PROCESSING", "APPROVE", "REJECT", "HUMAN_REVIEW", "HALTED", "APPROVE_WITH_CONDITIONS", "REQUEST_MORE_INFORMATION", "ERROR"])
+    with col2:
+        industry = st.selectbox("Industry", ["All"] + INDUSTRIES)
+    with col3:
+        decision = st.selectbox("Decision", ["All", "APPROVE", "REJECT", "HUMAN_REVIEW"])
+    with col4:
+        page_size = st.selectbox("Page size", [25, 50, 100])
+    
+    filters = {
+        "status": None if status == "All" else status,
+        "industry": None if industry == "All" else industry,
+        "decision": None if decision == "All" else decision
+    }
+    
+    # Keyset pagination: remember the cursors of the pages already visited
+    filter_key = (status, industry, decision, page_size)
+    if st.session_state.get("applications_filter") != filter_key:
+        st.session_state.applications_filter = filter_key
+        st.session_state.applications_cursors = [None]
+    cursors = st.session_state.applications_cursors
+    
+    page = store.list_applications(limit=page_size, cursor=cursors[-1], **filters)
+    st.caption(f"{store.count(**filters)} matching application(s) · page {len(cursors)}")
+    
+    if not page["items"]:
+        st.info("📭 No applications match these filters")
+    else:
+        st.dataframe(page["items"], use_container_width=True)
+    
+    col5, col6 = st.columns(2)
+    with col5:
+        if len(cursors) > 1 and st.button("⬅️ Previous page"):
+            cursors.pop()
+            st.rerun()
+    with col6:
+        if page["next_cursor"] and st.button("Next page ➡️"):
+            cursors.append(page["next_cursor"])
+            st.rerun()
+    
+    if page["items"]:
+        selected = st.selectbox("Inspect application", [item["application_id"] for item in page["items"]])
+        record = store.get(selected)
+        if record:
+            with st.expander("Application", expanded=False):
+                st.json(record["application"])
+            for stage_name, result in record["stages"].items():
+                with st.expander(f"Stage: {stage_name}", expanded=False):
+                    st.json(result)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
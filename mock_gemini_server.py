@@ -0,0 +1,451 @@
+import os
+import re
+import sys
+import json
+import time
+import math
+import random
+import asyncio
+import argparse
+from collections import deque
+from urllib.parse import urlsplit, parse_qs
+
+HTTP_STATUS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    504: "Gateway Timeout"
+}
+
+# Gemini error status per HTTP status
+ERROR_STATUS = {
+    400: "INVALID_ARGUMENT",
+    404: "NOT_FOUND",
+    405: "INVALID_ARGUMENT",
+    413: "INVALID_ARGUMENT",
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    504: "DEADLINE_EXCEEDED"
+}
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+# Named latency/error profiles; any field can be overridden on the command line
+PROFILES = {
+    "instant": {},
+    "fast": {"median_ms": 300, "sigma": 0.3},
+    "production": {
+        "median_ms": 900, "sigma": 0.5, "tail_rate": 0.02, "tail_ms": 8000,
+        "error_429_rate": 0.01, "error_500_rate": 0.002, "timeout_rate": 0.002
+    },
+    "degraded": {
+        "median_ms": 2500, "sigma": 0.8, "tail_rate": 0.1, "tail_ms": 15000,
+        "error_429_rate": 0.05, "error_500_rate": 0.01, "timeout_rate": 0.02
+    },
+    "throttled": {
+        "median_ms": 900, "sigma": 0.5, "tail_rate": 0.02, "tail_ms": 8000,
+        "error_429_rate": 0.15, "requests_per_minute": 60
+    }
+}
+
+# Section headers of a consolidated prompt (see utils.agent_llm.PromptBatch)
+SECTION_PATTERN = re.compile(r"^###\s+(\S+)\s*$", re.MULTILINE)
+
+# Sentences the stand-in narratives are assembled from
+SENTENCES = [
+    "The applicant's financial profile is consistent with its stated revenue band.",
+    "Debt levels appear manageable relative to reported cash flow.",
+    "No adverse findings were identified in the documentation provided.",
+    "Standard account monitoring is recommended for the first twelve months.",
+    "Industry exposure warrants a periodic review of transaction patterns.",
+    "Operating history supports the recommended credit limit.",
+    "Compliance checks returned no matches requiring escalation.",
+    "Cash flow trends should be confirmed against the next bank statement.",
+    "Overall risk is within appetite for a small business account.",
+    "Enhanced due diligence is not indicated on the current evidence."
+]
+
+
+class LatencyProfile:
+    """
+    Response Behaviour of the Stand-In Model
+    Latency is lognormal around median_ms, with an extra tail_ms spike on a
+    tail_rate share of requests. Errors are drawn per request; a timed-out
+    request is held for timeout_seconds and then answered with 504.
+    """
+
+    def __init__(self, median_ms=0.0, sigma=0.0, tail_rate=0.0, tail_ms=0.0,
+                 error_429_rate=0.0, error_500_rate=0.0, timeout_rate=0.0, timeout_seconds=60.0,
+                 requests_per_minute=0, words_min=40, words_max=90, tokens_per_second=0.0, chunk_words=8):
+        """
+        Args:
+            - median_ms / sigma: Lognormal time to the (first) response (sigma 0 = constant)
+            - tail_rate / tail_ms: Share of requests delayed by up to tail_ms more
+            - error_429_rate / error_500_rate / timeout_rate: Per-request failure shares
+            - timeout_seconds: How long a timed-out request hangs before its 504
+            - requests_per_minute: Server-side quota; requests beyond it get 429 (0 = none)
+            - words_min / words_max: Response length range in words
+            - tokens_per_second: Streaming rate after the first chunk (0 = no pacing)
+            - chunk_words: Words per streamed chunk
+        """
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.tail_rate = tail_rate
+        self.tail_ms = tail_ms
+        self.error_429_rate = error_429_rate
+        self.error_500_rate = error_500_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.requests_per_minute = requests_per_minute
+        self.words_min = words_min
+        self.words_max = max(words_min, words_max)
+        self.tokens_per_second = tokens_per_second
+        self.chunk_words = max(1, chunk_words)
+
+    @classmethod
+    def named(cls, name, **overrides):
+        """Profile from PROFILES with the given fields overridden (None values ignored)"""
+        if name not in PROFILES:
+            raise KeyError(f"Unknown profile '{name}'. Available: {', '.join(PROFILES)}")
+        fields = dict(PROFILES[name])
+        fields.update((key, value) for key, value in overrides.items() if value is not None)
+        return cls(**fields)
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class MockGeminiServer:
+    """
+    Local Gemini-Compatible Stand-In
+    Speaks the subset of the Gemini REST API the agents use, so pointing
+    GEMINI_BASE_URL at it moves every agent (google-genai through agno, and
+    google-generativeai in utils.gemini_llm) off the real service:
+
+        POST /{version}/models/{model}:generateContent         One response
+        POST /{version}/models/{model}:streamGenerateContent   Chunks (?alt=sse for server-sent events)
+        GET  /{version}/models                                 Model list
+        GET  /stats                                            Request, error and latency counters
+        GET  /healthz                                          Liveness
+
+    Responses are canned narratives; consolidated prompts get one answer
+    per "### <SECTION_ID>" header. Latency, errors and throttling follow
+    the LatencyProfile.
+    """
+
+    def __init__(self, profile=None, seed=None, models=("gemini-2.0-flash",)):
+        self.profile = profile or LatencyProfile()
+        self.models = list(models)
+        self._random = random.Random(seed)
+        self._accepted = deque()  # monotonic times of requests within the last minute
+        self.counters = {"requests": 0, "ok": 0, "streamed": 0, "throttled": 0, "errors": 0, "timeouts": 0}
+        self._latencies = deque(maxlen=4096)
+
+    # ========================================
+    # Server
+    # ========================================
+
+    async def serve(self, host="127.0.0.1", port=8090):
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        print(f"Gemini stand-in listening on http://{host}:{port} (set GEMINI_BASE_URL to use it)", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self.dispatch(writer, method, path, query, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except _RequestError as e:
+            await self._write_error(writer, e.status, e.message, False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise _RequestError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", "0") or 0)
+        if length > MAX_BODY_BYTES:
+            raise _RequestError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        return method.upper(), url.path, query, headers, body
+
+    async def _write_json(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {HTTP_STATUS.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json; charset=UTF-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _write_error(self, writer, status, message, keep_alive):
+        error = {"code": status, "message": message, "status": ERROR_STATUS.get(status, "UNKNOWN")}
+        await self._write_json(writer, status, {"error": error}, keep_alive)
+
+    # ========================================
+    # Routing
+    # ========================================
+
+    async def dispatch(self, writer, method, path, query, body, keep_alive=True):
+        parts = [part for part in path.split("/") if part]
+
+        if parts == ["healthz"] and method == "GET":
+            return await self._write_json(writer, 200, {"status": "ok"}, keep_alive)
+        if parts == ["stats"] and method == "GET":
+            return await self._write_json(writer, 200, self.stats(), keep_alive)
+
+        if len(parts) == 2 and parts[1] == "models" and method == "GET":
+            models = [self._model_info(model) for model in self.models]
+            return await self._write_json(writer, 200, {"models": models}, keep_alive)
+
+        if len(parts) == 3 and parts[1] == "models" and ":" in parts[2]:
+            model, _, action = parts[2].partition(":")
+            if method != "POST":
+                return await self._write_error(writer, 405, f"Use POST for {action}", keep_alive)
+            if action not in ("generateContent", "streamGenerateContent"):
+                return await self._write_error(writer, 404, f"Unsupported method {action}", keep_alive)
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError as e:
+                return await self._write_error(writer, 400, f"Invalid JSON payload: {e}", keep_alive)
+            if not isinstance(payload, dict):
+                return await self._write_error(writer, 400, "Request body must be a JSON object", keep_alive)
+            return await self.generate(writer, model, payload, action == "streamGenerateContent",
+                                       query.get("alt") == "sse", keep_alive)
+
+        if len(parts) == 3 and parts[1] == "models" and method == "GET":
+            return await self._write_json(writer, 200, self._model_info(parts[2]), keep_alive)
+
+        await self._write_error(writer, 404, f"No route for {method} {path}", keep_alive)
+
+    # ========================================
+    # Generation
+    # ========================================
+
+    async def generate(self, writer, model, payload, stream=False, sse=False, keep_alive=True):
+        """Answer one generateContent / streamGenerateContent request according to the profile"""
+        profile = self.profile
+        self.counters["requests"] += 1
+        started = time.monotonic()
+
+        if not self._within_quota(started):
+            self.counters["throttled"] += 1
+            return await self._write_error(writer, 429, "Resource has been exhausted (e.g. check quota).", keep_alive)
+
+        roll = self._random.random()
+        if roll < profile.error_429_rate:
+            self.counters["throttled"] += 1
+            await asyncio.sleep(self._latency() / 10)
+            return await self._write_error(writer, 429, "Resource has been exhausted (e.g. check quota).", keep_alive)
+        roll -= profile.error_429_rate
+        if roll < profile.error_500_rate:
+            self.counters["errors"] += 1
+            await asyncio.sleep(self._latency())
+            return await self._write_error(writer, 500, "An internal error has occurred.", keep_alive)
+        roll -= profile.error_500_rate
+        if roll < profile.timeout_rate:
+            self.counters["timeouts"] += 1
+            await asyncio.sleep(profile.timeout_seconds)
+            return await self._write_error(writer, 504, "Deadline expired before operation could complete.", keep_alive)
+
+        await asyncio.sleep(self._latency())
+        prompt_text = _prompt_text(payload)
+        text = self._respond(prompt_text)
+        usage = {
+            "promptTokenCount": _tokens(prompt_text),
+            "candidatesTokenCount": _tokens(text),
+            "totalTokenCount": _tokens(prompt_text) + _tokens(text)
+        }
+
+        if not stream:
+            await self._write_json(writer, 200, _response(model, text, usage), keep_alive)
+        else:
+            self.counters["streamed"] += 1
+            await self._stream(writer, model, text, usage, sse, keep_alive)
+        self.counters["ok"] += 1
+        self._latencies.append(time.monotonic() - started)
+
+    async def _stream(self, writer, model, text, usage, sse, keep_alive):
+        """Send the response in chunks, paced at tokens_per_second, with chunked transfer encoding"""
+        words = text.split(" ")
+        size = self.profile.chunk_words
+        pieces = [" ".join(words[i:i + size]) + (" " if i + size < len(words) else "") for i in range(0, len(words), size)]
+
+        head = (
+            "HTTP/1.1 200 OK\r\n"
+            f"Content-Type: {'text/event-stream' if sse else 'application/json'}; charset=UTF-8\r\n"
+            "Transfer-Encoding: chunked\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1"))
+
+        for index, piece in enumerate(pieces):
+            last = index == len(pieces) - 1
+            chunk = _response(model, piece, usage if last else None, finished=last)
+            if sse:
+                data = f"data: {json.dumps(chunk)}\r\n\r\n"
+            else:
+                data = ("[" if index == 0 else ",\r\n") + json.dumps(chunk) + ("]" if last else "")
+            encoded = data.encode("utf-8")
+            writer.write(f"{len(encoded):X}\r\n".encode("latin-1") + encoded + b"\r\n")
+            await writer.drain()
+            if not last and self.profile.tokens_per_second > 0:
+                await asyncio.sleep(_tokens(piece) / self.profile.tokens_per_second)
+
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def _latency(self):
+        """Seconds until the response starts, drawn from the profile"""
+        profile = self.profile
+        if profile.median_ms <= 0:
+            seconds = 0.0
+        elif profile.sigma <= 0:
+            seconds = profile.median_ms / 1000
+        else:
+            seconds = self._random.lognormvariate(math.log(profile.median_ms), profile.sigma) / 1000
+        if profile.tail_rate and self._random.random() < profile.tail_rate:
+            seconds += self._random.uniform(0.5, 1.0) * profile.tail_ms / 1000
+        return seconds
+
+    def _within_quota(self, now):
+        limit = self.profile.requests_per_minute
+        if not limit:
+            return True
+        while self._accepted and now - self._accepted[0] >= 60:
+            self._accepted.popleft()
+        if len(self._accepted) >= limit:
+            return False
+        self._accepted.append(now)
+        return True
+
+    def _respond(self, prompt_text):
+        """Canned narrative, with one answer per section for consolidated prompts"""
+        sections = SECTION_PATTERN.findall(prompt_text)
+        if not sections:
+            return self._narrative()
+        return "\n\n".join(f"### {section}\n{self._narrative()}" for section in sections)
+
+    def _narrative(self):
+        target = self._random.randint(self.profile.words_min, self.profile.words_max)
+        words = []
+        while len(words) < target:
+            words.extend(self._random.choice(SENTENCES).split())
+        return " ".join(words[:target]).rstrip(".,") + "."
+
+    def _model_info(self, model):
+        name = model if model.startswith("models/") else f"models/{model}"
+        return {
+            "name": name,
+            "displayName": f"{name.split('/', 1)[1]} (local stand-in)",
+            "supportedGenerationMethods": ["generateContent", "streamGenerateContent"]
+        }
+
+    def stats(self):
+        ordered = sorted(self._latencies)
+        latency = {}
+        for label, percentile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            if ordered:
+                latency[label] = round(ordered[max(1, math.ceil(percentile * len(ordered))) - 1] * 1000, 1)
+        return dict(self.counters, latency_ms=latency, profile=self.profile.to_dict())
+
+
+class _RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _prompt_text(payload):
+    """Text of every part of the request's contents"""
+    texts = []
+    for content in payload.get("contents") or []:
+        if isinstance(content, dict):
+            texts.extend(part.get("text", "") for part in content.get("parts") or [] if isinstance(part, dict))
+    return "\n".join(texts)
+
+
+def _tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _response(model, text, usage=None, finished=True):
+    """A GenerateContentResponse body"""
+    candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    response = {"candidates": [candidate], "modelVersion": model}
+    if usage:
+        response["usageMetadata"] = usage
+    return response
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Gemini-compatible stand-in for load and offline testing")
+    parser.add_argument("--host", default=os.getenv("MOCK_GEMINI_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MOCK_GEMINI_PORT", "8090")))
+    parser.add_argument("--profile", default=os.getenv("MOCK_GEMINI_PROFILE", "production"), choices=list(PROFILES))
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible latencies and errors")
+    parser.add_argument("--median-ms", type=float, help="Median time to the first response")
+    parser.add_argument("--sigma", type=float, help="Lognormal shape of the latency (0 = constant)")
+    parser.add_argument("--tail-rate", type=float, help="Share of requests with an extra latency spike")
+    parser.add_argument("--tail-ms", type=float, help="Maximum extra latency of a spike")
+    parser.add_argument("--error-429-rate", type=float, help="Share of requests answered 429 RESOURCE_EXHAUSTED")
+    parser.add_argument("--error-500-rate", type=float, help="Share of requests answered 500 INTERNAL")
+    parser.add_argument("--timeout-rate", type=float, help="Share of requests held for --timeout-seconds, then answered 504")
+    parser.add_argument("--timeout-seconds", type=float, help="How long a timed-out request hangs")
+    parser.add_argument("--rpm", type=int, dest="requests_per_minute", help="Server-side requests per minute before 429s")
+    parser.add_argument("--words-min", type=int, help="Shortest response in words")
+    parser.add_argument("--words-max", type=int, help="Longest response in words")
+    parser.add_argument("--tokens-per-second", type=float, help="Streaming rate after the first chunk")
+    args = parser.parse_args(argv)
+
+    overrides = {
+        name: getattr(args, name)
+        for name in ("median_ms", "sigma", "tail_rate", "tail_ms", "error_429_rate", "error_500_rate",
+                     "timeout_rate", "timeout_seconds", "requests_per_minute", "words_min", "words_max",
+                     "tokens_per_second")
+    }
+    server = MockGeminiServer(LatencyProfile.named(args.profile, **overrides), seed=args.seed)
+    print(json.dumps(server.profile.to_dict()), file=sys.stderr)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import functools
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.pipeline import pipeline_results
+from agents.registry import registry
+from utils.application_store import FILTER_COLUMNS, get_store
+from utils.review_queue import DEFAULT_LEASE_SECONDS, get_review_queue
+from utils.submission_index import (
+    BLOCK, DUPLICATE, FLAG, check_submission, forget_submission, get_submission_index, submitted_at
+)
+from utils.application_ids import new_application_id
+
+HTTP_STATUS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error"
+}
+
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class OnboardingService:
+    """
+    Asyncio HTTP Onboarding Service
+    Exposes the agent pipeline to other systems:
+
+        POST /applications                    Submit an application (202 + application_id)
+        GET  /applications                    Paginated list (?status=&industry=&decision=&limit=&cursor=)
+        GET  /applications/{id}               Application status, decision and stage results
+        GET  /hitl                            Review backlog, earliest SLA deadline first (?limit=&offset=)
+        POST /hitl/claim                      Lease the most urgent case ({"reviewer_id"})
+        POST /hitl/{id}/release               Return a leased case to the queue
+        POST /hitl/{id}/decision              Record a human decision (lease holder only)
+        GET  /healthz                         Liveness for the load balancer
+
+    Pipelines run on a bounded worker pool; at most max_concurrent run at
+    once and at most max_pending wait, beyond which submissions get 429.
+    Submissions pass the submission index first: an exact duplicate returns
+    200 with the original's id, and an applicant over the velocity limit
+    gets 429 before any agent runs. A submission whose save or pipeline
+    fails is dropped from the index again. The index is per process: it is
+    replayed from the application store at startup, but replicas do not see
+    each other's later submissions (see SubmissionIndex).
+    Applications and results are kept in the shared application store and
+    review cases in the shared HITL review queue.
+    """
+
+    def __init__(self, workers=8, max_concurrent=8, max_pending=100, stage_workers=4, consolidate_llm=False, io_workers=4):
+        self.pipeline = registry.pipeline(max_workers=stage_workers, consolidate_llm=consolidate_llm)
+        self.communication_agent = registry.get("communication")
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="onboarding")
+        # Store and review queue calls (SQLite commits, lease transactions)
+        # run here, off the event loop and never queued behind pipelines
+        self.io_executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="onboarding-io")
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+
+        self.store = get_store()
+        self.review_queue = get_review_queue()
+        self._semaphore = None
+        self._pending = 0
+        self._tasks = set()
+        self._submitting = set()  # Application ids between their 409 check and their save
+
+    # ========================================
+    # Server
+    # ========================================
+
+    async def serve(self, host="0.0.0.0", port=8080):
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        registry.warm_up()  # Pay agent construction before accepting traffic
+        replayed = await self._blocking(self.seed_submission_index)
+        print(f"Submission index seeded with {replayed} stored applications", file=sys.stderr)
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        print(f"Onboarding service listening on {host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+
+                try:
+                    status, payload = await self.dispatch(method, path, body, query)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except HTTPError as e:
+            await self._write_response(writer, e.status, {"error": e.message}, False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            raise HTTPError(400, "Malformed Content-Length header")
+        if length < 0:
+            raise HTTPError(400, "Malformed Content-Length header")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        return method.upper(), url.path, query, headers, body
+
+    async def _write_response(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {HTTP_STATUS.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    # ========================================
+    # Routing
+    # ========================================
+
+    async def dispatch(self, method, path, body, query=None):
+        parts = [part for part in path.split("/") if part]
+
+        if parts == ["healthz"] and method == "GET":
+            return 200, {"status": "ok", "in_flight": self._pending}
+
+        if parts == ["applications"]:
+            if method == "GET":
+                return await self.list_applications(query or {})
+            if method != "POST":
+                raise HTTPError(405, "Use POST to submit an application")
+            return await self.submit_application(self._parse_json(body))
+
+        if len(parts) == 2 and parts[0] == "applications":
+            if method != "GET":
+                raise HTTPError(405, "Use GET to read an application")
+            return await self.get_application(parts[1])
+
+        if parts == ["hitl"]:
+            if method != "GET":
+                raise HTTPError(405, "Use GET to list the review queue")
+            return await self.list_hitl_queue(query or {})
+
+        if parts == ["hitl", "claim"]:
+            if method != "POST":
+                raise HTTPError(405, "Use POST to claim a case")
+            return await self.claim_case(self._parse_json(body))
+
+        if len(parts) == 3 and parts[0] == "hitl" and parts[2] == "release":
+            if method != "POST":
+                raise HTTPError(405, "Use POST to release a case")
+            return await self.release_case(parts[1], self._parse_json(body))
+
+        if len(parts) == 3 and parts[0] == "hitl" and parts[2] == "decision":
+            if method != "POST":
+                raise HTTPError(405, "Use POST to record a decision")
+            return await self.record_human_decision(parts[1], self._parse_json(body))
+
+        raise HTTPError(404, f"No route for {method} {path}")
+
+    def _parse_json(self, body):
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            raise HTTPError(400, f"Invalid JSON: {e}")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return payload
+
+    async def _blocking(self, function, *args, **kwargs):
+        """Run a blocking store or queue call on the I/O pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io_executor, functools.partial(function, *args, **kwargs))
+
+    # ========================================
+    # Endpoints
+    # ========================================
+
+    async def submit_application(self, app_data):
+        if self._pending >= self.max_concurrent + self.max_pending:
+            raise HTTPError(429, "Onboarding capacity exhausted, retry later")
+        # Reserve the slot before the first await, so a burst cannot pass the check together
+        self._pending += 1
+        queued = False
+        try:
+            if not app_data.get("application_id"):
+                app_data["application_id"] = new_application_id()
+            app_id = app_data["application_id"]
+            # The store lookup yields to the loop, so a resubmission racing this
+            # one is turned away here until its PROCESSING row is saved
+            if app_id in self._submitting:
+                raise HTTPError(409, f"Application {app_id} is already being processed")
+            self._submitting.add(app_id)
+            try:
+                existing = await self._blocking(self.store.get, app_id)
+                if existing is not None and existing["status"] == "PROCESSING":
+                    raise HTTPError(409, f"Application {app_id} is already being processed")
+
+                app_data.setdefault("submitted_date", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                check = check_submission(app_data)
+                if check.action == DUPLICATE:
+                    return 200, {"application_id": check.duplicate_of, "status": DUPLICATE, "duplicate_of": check.duplicate_of}
+                if check.action == BLOCK:
+                    raise HTTPError(429, "Too many applications from this applicant: " + "; ".join(check.reasons))
+                if check.action == FLAG:
+                    app_data["submission_check"] = check.to_dict()
+
+                app_data["status"] = "PROCESSING"
+                try:
+                    await self._blocking(self.store.save_application, app_data)
+                except Exception:
+                    forget_submission(app_id)  # Never the original of a resubmission
+                    raise
+            finally:
+                self._submitting.discard(app_id)
+
+            task = asyncio.create_task(self._process(app_id, app_data))
+            queued = True  # The task releases the slot from here on
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return 202, {"application_id": app_id, "status": "PROCESSING"}
+        finally:
+            if not queued:
+                self._pending -= 1
+
+    async def _process(self, app_id, app_data):
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                pipeline_run = await loop.run_in_executor(
+                    self.executor,
+                    lambda: self.pipeline.run(
+                        dict(app_data),
+                        on_stage=lambda name, result: self.store.save_stage_result(app_id, name, result)
+                    )
+                )
+
+            results = pipeline_results(pipeline_run)
+            app_data["status"] = "HALTED" if pipeline_run.halted else results.decision
+            app_data["processed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            await self._blocking(self.store.save_outcome, app_data, results,
+                                 halted_at=pipeline_run.halted_at, halt_reason=pipeline_run.halt_reason)
+
+            if "human_review" in results:
+                await self._blocking(self.review_queue.enqueue, app_id, app_data,
+                                     results.to_dict(exclude=["human_review"]), results.human_review)
+        except Exception as e:
+            # Pipeline or persistence failure: record it, and never let the task die silently
+            forget_submission(app_id)
+            app_data["status"] = "ERROR"
+            try:
+                await self._blocking(self.store.save_outcome, app_data, error=f"{type(e).__name__}: {e}")
+            except Exception as store_error:
+                print(f"Could not record the failure of {app_id}: {type(store_error).__name__}: {store_error}", file=sys.stderr)
+        finally:
+            self._pending -= 1
+
+    def seed_submission_index(self):
+        """
+        Replay the stored applications within the dedupe and velocity horizon
+        into this process's submission index (failed ones left out)
+
+        Returns:
+            - Number of applications replayed
+        """
+        index = get_submission_index()
+        if index is None:
+            return 0
+
+        horizon = max(index.dedupe_seconds, index.window_seconds)
+        since = datetime.fromtimestamp(time.time() - horizon).strftime("%Y-%m-%d %H:%M:%S")
+        replayed = 0
+        for app_data in self.store.iter_applications(submitted_after=since):
+            if app_data.get("status") != "ERROR":
+                index.replay(app_data, now=submitted_at(app_data))
+                replayed += 1
+        return replayed
+
+    async def get_application(self, app_id):
+        entry = await self._blocking(self.store.get, app_id)
+        if entry is None:
+            raise HTTPError(404, f"Unknown application {app_id}")
+
+        app_data = entry["application"]
+        results = entry["results"] or {}
+        orchestrator = results.get("orchestrator") or {}
+        return 200, {
+            "application_id": app_id,
+            "status": entry["status"],
+            "decision": entry["decision"],
+            "reasoning": orchestrator.get("reasoning") or entry["halt_reason"],
+            "hitl_required": orchestrator.get("hitl_required", False),
+            "halted_at": entry["halted_at"],
+            "error": entry["error"],
+            "human_review": app_data.get("human_review"),
+            "results": results,
+            "stages": entry["stages"]
+        }
+
+    async def list_applications(self, query):
+        filters = {column: query[column] for column in FILTER_COLUMNS if column in query}
+        try:
+            limit = min(max(int(query.get("limit", 50)), 1), 500)
+            page = await self._blocking(
+                self.store.list_applications,
+                limit=limit,
+                cursor=query.get("cursor"),
+                submitted_after=query.get("submitted_after"),
+                submitted_before=query.get("submitted_before"),
+                **filters
+            )
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return 200, page
+
+    async def list_hitl_queue(self, query):
+        try:
+            limit = min(max(int(query.get("limit", 50)), 1), 500)
+            offset = max(int(query.get("offset", 0)), 0)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return 200, {
+            "stats": await self._blocking(self.review_queue.stats),
+            "items": await self._blocking(self.review_queue.list_cases, limit=limit, offset=offset)
+        }
+
+    async def claim_case(self, payload):
+        reviewer_id = self._reviewer(payload)
+        try:
+            lease_seconds = float(payload.get("lease_seconds", DEFAULT_LEASE_SECONDS))
+        except (TypeError, ValueError):
+            raise HTTPError(400, "lease_seconds must be a number")
+        case = await self._blocking(self.review_queue.claim, reviewer_id, lease_seconds, app_id=payload.get("application_id"))
+        if case is None:
+            raise HTTPError(404, "No case available to claim")
+        return 200, case
+
+    async def release_case(self, app_id, payload):
+        if not await self._blocking(self.review_queue.release, app_id, self._reviewer(payload)):
+            raise HTTPError(409, f"Application {app_id} is not leased by this reviewer")
+        return 200, {"application_id": app_id, "released": True}
+
+    def _reviewer(self, payload):
+        reviewer_id = payload.get("reviewer_id")
+        if not reviewer_id:
+            raise HTTPError(400, "reviewer_id is required")
+        return reviewer_id
+
+    async def record_human_decision(self, app_id, payload):
+        reviewer_id = self._reviewer(payload)
+        case = await self._blocking(self.review_queue.get, app_id)
+        if case is None:
+            raise HTTPError(404, f"Application {app_id} is not awaiting review")
+
+        # Validate before claiming, so a rejected request never leaves the case leased
+        human_decision = payload.get("decision", "")
+        notes = payload.get("notes", "")
+        options = case["review_data"].get("options", [])
+        if human_decision not in options:
+            raise HTTPError(400, f"decision must be one of {options}")
+        if not notes:
+            raise HTTPError(400, "notes are required")
+
+        # Deciding an unclaimed case claims it first; another reviewer's lease wins
+        review_item = await self._blocking(self.review_queue.claim, reviewer_id, app_id=app_id)
+        if review_item is None or review_item["application_id"] != app_id:
+            raise HTTPError(409, f"Application {app_id} is claimed by another reviewer, or you hold another case")
+
+        app_data = review_item["application"]
+        summary = review_item["review_data"].get("summary", {})
+        final_decision = {
+            "application_id": app_id,
+            "human_decision": human_decision.upper().replace(" ", "_"),
+            "reviewer_name": payload.get("reviewer_name", ""),
+            "reviewer_id": reviewer_id,
+            "notes": notes,
+            "reviewed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "ai_recommendation": summary.get("recommendation"),
+            "override": human_decision.upper() != summary.get("recommendation", "").upper()
+        }
+        if payload.get("required_documents"):
+            final_decision["required_documents"] = payload["required_documents"]
+
+        if not await self._blocking(self.review_queue.complete, app_id, reviewer_id):
+            raise HTTPError(409, f"Lease on application {app_id} expired before the decision was recorded")
+
+        app_data["status"] = final_decision["human_decision"]
+        app_data["human_review"] = final_decision
+        await self._blocking(self.store.save_application, app_data)
+
+        loop = asyncio.get_running_loop()
+        comm_result = await loop.run_in_executor(self.executor, self.communication_agent.run, {
+            "status": final_decision["human_decision"],
+            "business_name": app_data.get("business_name"),
+            "reasoning": notes
+        })
+        final_decision["communication"] = comm_result
+        return 200, final_decision
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TechVenture onboarding HTTP service")
+    parser.add_argument("--host", default=os.getenv("ONBOARDING_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("ONBOARDING_PORT", "8080")))
+    parser.add_argument("--workers", type=int, default=8, help="Worker threads running pipelines")
+    parser.add_argument("--max-concurrent", type=int, default=8, help="Pipelines running at once")
+    parser.add_argument("--max-pending", type=int, default=100, help="Pipelines allowed to wait before 429")
+    parser.add_argument("--stage-workers", type=int, default=4, help="Concurrent stages per application")
+    parser.add_argument("--consolidate-llm", action="store_true", help="One consolidated LLM request per application")
+    parser.add_argument("--io-workers", type=int, default=4, help="Threads running store and review queue calls")
+    args = parser.parse_args(argv)
+
+    service = OnboardingService(
+        workers=args.workers,
+        max_concurrent=args.max_concurrent,
+        max_pending=args.max_pending,
+        stage_workers=args.stage_workers,
+        consolidate_llm=args.consolidate_llm,
+        io_workers=args.io_workers
+    )
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.executor.shutdown(wait=False, cancel_futures=True)
+        service.io_executor.shutdown(wait=True)
+        service.store.close()
+        registry.teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("agno")
+
+
+class Response:
+    def __init__(self, content):
+        self.content = content
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "0")
+    from agents.registry import AgentRegistry
+
+    registry = AgentRegistry()
+    yield registry
+    registry.teardown()
+
+
+def test_registry_shares_stage_agents(registry):
+    assert registry.get("kyc") is registry.get("kyc")
+    assert registry.get("kyc", defer_llm=True) is not registry.get("kyc")
+    assert registry.get("screening", defer_llm=True) is registry.get("screening")
+    with pytest.raises(KeyError):
+        registry.get("unknown")
+
+
+def test_concurrent_calls_run_on_private_agent_instances(registry, monkeypatch):
+    from utils.agent_llm import agent_prompt
+
+    template = registry.get("kyc").agent
+    instances = []
+    instances_lock = threading.Lock()
+
+    def run(self, prompt_text, stream=False):
+        # Per-run state on the instance, as agno keeps it
+        self.run_response = prompt_text
+        with instances_lock:
+            instances.append(self)
+        time.sleep(0.01)
+        return Response(self.run_response)
+
+    monkeypatch.setattr(type(template), "run", run)
+    prompts = [f"Assess application {n}" for n in range(32)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda prompt: agent_prompt(template, prompt), prompts))
+
+    assert responses == prompts
+    assert len({id(instance) for instance in instances}) == len(prompts)
+    assert all(instance is not template for instance in instances)
+    assert all(instance.name == template.name and instance.instructions == template.instructions for instance in instances)
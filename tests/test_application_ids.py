@@ -0,0 +1,99 @@
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from utils import application_ids
+from utils.application_ids import (
+    ENCODED_LENGTH, PREFIX, ApplicationIdGenerator, decode, default_node, encode, id_timestamp
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Settable time.time_ns for the generator, in milliseconds"""
+    now = {"ms": 1760000000000}
+    monkeypatch.setattr(application_ids.time, "time_ns", lambda: now["ms"] * 1000000)
+    return now
+
+
+def test_encoding_round_trips_and_sorts_like_integers():
+    values = [0, 1, 31, 32, 2 ** 64, 2 ** 128 - 1]
+
+    for value in values:
+        assert len(encode(value)) == ENCODED_LENGTH
+        assert decode(encode(value)) == value
+    assert [encode(value) for value in values] == sorted(encode(value) for value in values)
+    assert decode(encode(12345).lower()) == 12345
+
+
+def test_ids_increase_within_a_millisecond_and_when_the_clock_steps_back(clock):
+    generator = ApplicationIdGenerator(node=7)
+
+    ids = [generator.new_id() for _ in range(100)]
+    clock["ms"] -= 5000
+    ids += [generator.new_id() for _ in range(100)]
+    clock["ms"] += 10000
+    ids.append(generator.new_id())
+
+    assert all(app_id.startswith(PREFIX) for app_id in ids)
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+
+
+def test_exhausted_sequence_borrows_the_next_millisecond(clock, monkeypatch):
+    monkeypatch.setattr(application_ids, "MAX_SEQUENCE", 3)
+    generator = ApplicationIdGenerator(node=1)
+
+    ids = [generator.new_id() for _ in range(6)]
+
+    assert ids == sorted(ids)
+    stamps = [id_timestamp(app_id) for app_id in ids]
+    assert stamps[3] == stamps[0] and stamps[4] > stamps[0]
+
+
+def test_timestamp_of_generated_and_foreign_ids(clock):
+    app_id = ApplicationIdGenerator(node=0).new_id()
+
+    assert id_timestamp(app_id) == datetime.fromtimestamp(clock["ms"] / 1000, tz=timezone.utc)
+    assert id_timestamp("APP-20250101-120000") is None
+    assert id_timestamp("APP-DEMO-001") is None
+    assert id_timestamp(PREFIX + "!" * ENCODED_LENGTH) is None
+
+
+def test_nodes_share_a_millisecond_without_colliding(clock):
+    generators = [ApplicationIdGenerator(node=node) for node in (1, 2)] + [ApplicationIdGenerator(node=2)]
+
+    ids = [generator.new_id() for _ in range(50) for generator in generators]
+
+    assert len(set(ids)) == len(ids)
+
+
+def test_concurrent_ids_are_unique():
+    generator = ApplicationIdGenerator(node=3)
+    ids = []
+
+    def worker():
+        ids.extend(generator.new_id() for _ in range(2000))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ids)) == len(ids) == 16000
+
+
+@pytest.mark.parametrize("node", [-1, 1 << 16])
+def test_node_range_is_checked(node):
+    with pytest.raises(ValueError):
+        ApplicationIdGenerator(node=node)
+
+
+def test_configured_node(monkeypatch):
+    monkeypatch.setenv("APP_ID_NODE", "42")
+    assert default_node() == 42
+    assert ApplicationIdGenerator().node == 42
+
+    monkeypatch.delenv("APP_ID_NODE")
+    assert 0 <= default_node() < 1 << 16
@@ -0,0 +1,108 @@
+import pytest
+
+from utils.application_store import SQLiteApplicationStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteApplicationStore(str(tmp_path / "applications.sqlite3"))
+    yield store
+    store.close()
+
+
+def _application(index, submitted_date, **fields):
+    app_data = {
+        "application_id": f"APP-{index:04d}",
+        "business_name": f"Business {index}",
+        "industry": "SaaS" if index % 2 else "Retail",
+        "status": "PENDING",
+        "submitted_date": submitted_date
+    }
+    app_data.update(fields)
+    return app_data
+
+
+def _pages(store, limit, **filters):
+    pages, cursor = [], None
+    while True:
+        page = store.list_applications(limit=limit, cursor=cursor, **filters)
+        pages.append([item["application_id"] for item in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_reads_see_buffered_writes(store):
+    store.save_application(_application(1, "2026-01-01 09:00:00"))
+    store.save_stage_result("APP-0001", "kyc", {"compliance_score": 80})
+
+    entry = store.get("APP-0001")
+
+    assert entry["application"]["business_name"] == "Business 1"
+    assert entry["stages"] == {"kyc": {"compliance_score": 80}}
+    assert store.get("APP-9999") is None
+
+
+def test_outcome_records_the_orchestrator_decision(store):
+    app_data = _application(1, "2026-01-01 09:00:00", status="APPROVE")
+    store.save_outcome(app_data, {"orchestrator": {"decision": "APPROVE"}}, halted_at=None)
+
+    entry = store.get("APP-0001")
+
+    assert entry["decision"] == "APPROVE"
+    assert entry["results"] == {"orchestrator": {"decision": "APPROVE"}}
+    assert store.count(decision="APPROVE") == 1
+
+
+def test_keyset_pages_cover_every_row_once_newest_first(store):
+    # Several applications share a submission second, so the id breaks ties
+    for index in range(23):
+        store.save_application(_application(index, f"2026-01-01 09:00:{index // 3:02d}"))
+
+    pages = _pages(store, limit=5)
+    ids = [app_id for page in pages for app_id in page]
+
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert len(ids) == len(set(ids)) == 23
+    assert ids == sorted(ids, key=lambda app_id: (f"09:00:{int(app_id[4:]) // 3:02d}", app_id), reverse=True)
+
+
+def test_pages_are_stable_when_rows_arrive_between_requests(store):
+    for index in range(10):
+        store.save_application(_application(index, f"2026-01-01 09:00:{index:02d}"))
+    first = store.list_applications(limit=4)
+
+    store.save_application(_application(50, "2026-01-02 09:00:00"))  # Newer than every listed row
+    second = store.list_applications(limit=4, cursor=first["next_cursor"])
+
+    assert [item["application_id"] for item in second["items"]] == ["APP-0005", "APP-0004", "APP-0003", "APP-0002"]
+
+
+def test_filters_and_date_bounds(store):
+    for index in range(12):
+        store.save_application(_application(index, f"2026-01-{index + 1:02d} 09:00:00"))
+
+    saas = [app_id for page in _pages(store, limit=2, industry="SaaS") for app_id in page]
+    assert saas == [f"APP-{index:04d}" for index in (11, 9, 7, 5, 3, 1)]
+
+    page = store.list_applications(submitted_after="2026-01-03", submitted_before="2026-01-05")
+    assert [item["application_id"] for item in page["items"]] == ["APP-0003", "APP-0002"]
+    assert store.count(submitted_after="2026-01-03", submitted_before="2026-01-05", industry="SaaS") == 1
+
+
+def test_invalid_filters_and_cursors_raise_value_error(store):
+    with pytest.raises(ValueError, match="Cannot filter"):
+        store.list_applications(owner_email="x")
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        store.list_applications(cursor="not-a-cursor")
+
+
+def test_writes_survive_reopening(tmp_path):
+    path = str(tmp_path / "applications.sqlite3")
+    first = SQLiteApplicationStore(path)
+    first.save_application(_application(1, "2026-01-01 09:00:00"))
+    first.close()
+
+    second = SQLiteApplicationStore(path)
+    assert second.get("APP-0001")["status"] == "PENDING"
+    second.close()
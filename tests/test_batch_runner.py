@@ -0,0 +1,133 @@
+import os
+import json
+
+import pytest
+
+import batch_runner
+
+
+def fake_init_worker(stage_workers, consolidate_llm, workers, persist):
+    pass
+
+
+def fake_process_application(app_data):
+    if app_data.get("fail"):
+        return {"application_id": app_data["application_id"], "error": "RuntimeError: pipeline down"}
+    return {"application_id": app_data["application_id"], "status": "APPROVE"}
+
+
+@pytest.fixture
+def fake_workers(monkeypatch):
+    # Pool workers are forked, so they run the stand-ins instead of the agent pipeline
+    monkeypatch.setattr(batch_runner, "_init_worker", fake_init_worker)
+    monkeypatch.setattr(batch_runner, "_process_application", fake_process_application)
+
+
+def write_lines(path, lines, newline=True):
+    path.write_text("\n".join(lines) + ("\n" if newline else ""), encoding="utf-8")
+
+
+def applications(*app_ids, **fields):
+    return [json.dumps(dict({"application_id": app_id, "business_name": f"Business {app_id}"}, **fields)) for app_id in app_ids]
+
+
+def records(path):
+    parsed = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            parsed.append(json.loads(line))
+        except json.JSONDecodeError:
+            parsed.append(None)
+    return parsed
+
+
+def test_completed_ids_skip_errors_and_partial_lines(tmp_path):
+    output = tmp_path / "results.jsonl"
+    assert batch_runner._completed_ids(str(output)) == set()
+
+    write_lines(output, [
+        json.dumps({"application_id": "A", "status": "APPROVE"}),
+        json.dumps({"application_id": "B", "error": "TimeoutError"}),
+        json.dumps({"line": 7, "error": "Invalid JSON"}),
+        json.dumps({"application_id": "C", "status": "DUPLICATE", "duplicate_of": "A"}),
+        '{"application_id": "D", "sta'
+    ], newline=False)
+
+    assert batch_runner._completed_ids(str(output)) == {"A", "C"}
+
+
+def test_partial_last_line_is_terminated_once(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_bytes(b'{"application_id": "A"}\n{"applica')
+
+    batch_runner._terminate_partial_line(str(output))
+    batch_runner._terminate_partial_line(str(output))
+
+    assert output.read_bytes() == b'{"application_id": "A"}\n{"applica\n'
+    empty = tmp_path / "empty.jsonl"
+    empty.write_bytes(b"")
+    batch_runner._terminate_partial_line(str(empty))
+    assert empty.read_bytes() == b""
+
+
+def test_resume_after_a_truncated_write(tmp_path, fake_workers):
+    source, output = tmp_path / "applications.jsonl", tmp_path / "results.jsonl"
+    write_lines(source, applications("A", "B", "C"))
+    output.write_text(json.dumps({"application_id": "A", "status": "APPROVE"}) + '\n{"application_id": "B", "st', encoding="utf-8")
+
+    stats = batch_runner.run_batch(str(source), str(output), workers=1, screen=False)
+
+    assert stats == {"processed": 2, "skipped": 1, "screened": 0, "failed": 0}
+    written = records(output)
+    assert written[1] is None                        # The cut-off line stays on its own
+    assert sorted(record["application_id"] for record in written if record) == ["A", "B", "C"]
+
+
+def test_resume_reruns_errored_applications(tmp_path, fake_workers):
+    source, output = tmp_path / "applications.jsonl", tmp_path / "results.jsonl"
+    write_lines(source, applications("A", "B") + ["not json"])
+    write_lines(output, [
+        json.dumps({"application_id": "A", "error": "RuntimeError: pipeline down"}),
+        json.dumps({"application_id": "B", "status": "REJECT"})
+    ])
+
+    stats = batch_runner.run_batch(str(source), str(output), workers=2, screen=False)
+
+    assert stats == {"processed": 1, "skipped": 1, "screened": 0, "failed": 1}
+    new = records(output)[2:]
+    assert {"application_id": "A", "status": "APPROVE"} in new
+    assert any(record.get("line") == 3 and record["error"].startswith("Invalid JSON") for record in new)
+
+
+def test_failed_applications_are_rerun_on_the_next_resume(tmp_path, fake_workers):
+    source, output = tmp_path / "applications.jsonl", tmp_path / "results.jsonl"
+    write_lines(source, applications("A", fail=True))
+
+    first = batch_runner.run_batch(str(source), str(output), workers=1, screen=False)
+    write_lines(source, applications("A"))
+    second = batch_runner.run_batch(str(source), str(output), workers=1, screen=False)
+
+    assert (first["failed"], second["processed"], second["skipped"]) == (1, 1, 0)
+
+
+def test_no_resume_overwrites_the_output(tmp_path, fake_workers):
+    source, output = tmp_path / "applications.jsonl", tmp_path / "results.jsonl"
+    write_lines(source, applications("A"))
+    write_lines(output, [json.dumps({"application_id": "A", "status": "REJECT"}), '{"trunc'])
+
+    stats = batch_runner.run_batch(str(source), str(output), workers=1, resume=False, screen=False)
+
+    assert stats["processed"] == 1 and stats["skipped"] == 0
+    assert records(output) == [{"application_id": "A", "status": "APPROVE"}]
+
+
+def test_each_worker_meters_its_share_of_the_quota(monkeypatch):
+    pytest.importorskip("agno")
+    monkeypatch.setenv("LLM_QUOTA_SHARE", "0.5")
+    monkeypatch.setattr(batch_runner, "_pipeline", None)
+    monkeypatch.setattr(batch_runner, "_store", None)
+
+    batch_runner._init_worker(stage_workers=1, consolidate_llm=False, workers=4, persist=False)
+
+    assert float(os.environ["LLM_QUOTA_SHARE"]) == pytest.approx(0.125)
+    assert batch_runner._pipeline is not None
@@ -0,0 +1,75 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("agno")
+
+from agents.batch_scoring import score_credit_batch, score_kyc_batch, to_columns
+from agents.credit_agent import CreditAgent
+from agents.kyc_agent import KYCAgent
+from utils.agent_llm import skip_narratives
+from utils.sample_applications import ApplicationGenerator
+
+# Flags and gaps far more often than the defaults, so every rule branch is hit
+EDGE_CASES = {
+    "industries": {"Crypto": 10, "Gambling": 10},
+    "documents": {"tax_id": 0.7, "license": 0.6, "bank_statement": 0.6, "financial_statement": 0.5},
+    "aml": {
+        "id_verified": 0.8,
+        "pep_flagged": 0.2,
+        "sanctions_flagged": 0.1,
+        "adverse_media": 0.2,
+        "international": 0.4,
+        "high_risk_countries": 0.2
+    },
+    "financials": {"cash_flow_positive": 0.6}
+}
+
+
+@pytest.fixture(scope="module")
+def applications():
+    applications = list(ApplicationGenerator(seed=7, distributions=EDGE_CASES).generate(3000))
+    for index, app in enumerate(applications):
+        if index % 7 == 0:
+            app["financials"]["debt_to_income"] = 0  # Derived from debt and revenue
+        if index % 11 == 0:
+            app["identity"]["pep_check"] = "Clear"   # Case-insensitive match
+        if index % 13 == 0:
+            del app["business_profile"]              # Scalar defaults apply
+        if index % 17 == 0:
+            app["business_age"] = "unknown"
+    return applications
+
+
+def test_kyc_batch_matches_the_kyc_agent(applications):
+    agent = KYCAgent()
+    with skip_narratives():
+        expected = [agent.run(app) for app in applications]
+
+    scored = score_kyc_batch(to_columns(applications))
+
+    for index, result in enumerate(expected):
+        assert scored["compliance_score"][index] == result["compliance_score"], index
+        assert scored["risk_level"][index] == result["risk_level"], index
+        assert scored["kyc_status"][index] == result["kyc_status"], index
+        assert bool(scored["edd_required"][index]) == result["edd_required"], index
+
+
+def test_credit_batch_matches_the_credit_agent(applications):
+    agent = CreditAgent()
+    with skip_narratives():
+        expected = [agent.run(app) for app in applications]
+
+    scored = score_credit_batch(to_columns(applications))
+
+    for index, result in enumerate(expected):
+        assert scored["credit_score"][index] == result["credit_score"], index
+        assert scored["risk_level"][index] == result["risk_level"], index
+        assert scored["credit_limit"][index] == result["credit_limit"], index
+        assert scored["interest_rate"][index] == result["interest_rate"], index
+
+
+def test_round_thousands_matches_python_round():
+    from agents.batch_scoring import _round_thousands
+
+    values = np.array([1500.0, 2500.0, 3499.999, 12345678.5, 7500.0, 0.0])
+    assert _round_thousands(values).tolist() == [round(value, -3) for value in values.tolist()]
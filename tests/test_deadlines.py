@@ -0,0 +1,163 @@
+import threading
+import time
+
+import pytest
+
+from utils import deadlines
+from utils.deadlines import TIMEOUT_TEXT, LatencyTracker, bounded_call, current_deadline, llm_deadline
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = LatencyTracker(window=100, min_samples=5)
+    monkeypatch.setattr(deadlines, "latency_tracker", tracker)
+    return tracker
+
+
+def warm(tracker, model="m", seconds=(0.01, 0.01, 0.02, 0.02, 0.05)):
+    for value in seconds:
+        tracker.record(model, value)
+
+
+def test_hedge_point_is_the_p95_once_enough_samples_exist(tracker):
+    assert tracker.hedge_after("m") is None
+    warm(tracker, seconds=[0.01] * 4)
+    assert tracker.hedge_after("m") is None
+
+    warm(tracker, seconds=[i / 100 for i in range(1, 97)])
+    assert tracker.hedge_after("m") == pytest.approx(0.91)
+
+
+def test_slow_request_is_hedged_and_the_duplicate_wins(tracker):
+    warm(tracker)
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)  # The first request hangs
+            return "late"
+        return "hedged"
+
+    try:
+        assert bounded_call("m", call, deadline=time.monotonic() + 5) == "hedged"
+    finally:
+        release.set()
+    assert len(calls) == 2
+    assert (tracker.hedges, tracker.hedge_wins, tracker.timeouts) == (1, 1, 0)
+
+
+def test_fast_request_is_not_hedged(tracker):
+    warm(tracker, seconds=[1.0] * 5)
+
+    assert bounded_call("m", lambda: "fast") == "fast"
+    assert tracker.hedges == 0
+
+
+def test_streamed_calls_are_not_hedged(tracker):
+    warm(tracker)
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        release.wait(5)
+        return "streamed"
+
+    try:
+        assert bounded_call("m", call, deadline=time.monotonic() + 0.2, hedge=False) is TIMEOUT_TEXT
+    finally:
+        release.set()
+    assert len(calls) == 1 and tracker.hedges == 0
+
+
+def test_missed_deadline_returns_timeout_text(tracker):
+    release = threading.Event()
+
+    def call():
+        release.wait(5)
+        return "too late"
+
+    started = time.monotonic()
+    try:
+        result = bounded_call("m", call, deadline=started + 0.1)
+    finally:
+        release.set()
+
+    assert result is TIMEOUT_TEXT and result.degraded
+    assert time.monotonic() - started < 1
+    assert tracker.timeouts == 1
+
+
+def test_failed_request_is_retried_once_by_the_hedge(tracker):
+    warm(tracker)
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("first")
+        return "second"
+
+    assert bounded_call("m", call) == "second"
+
+    def always_fails():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError, match="down"):
+        bounded_call("m", always_fails)
+    with pytest.raises(RuntimeError, match="down"):
+        bounded_call("m", always_fails, hedge=False)
+
+
+def test_nested_budgets_never_extend_the_outer_one():
+    assert current_deadline() is None
+    with llm_deadline(1) as outer:
+        with llm_deadline(60) as inner:
+            assert inner == outer
+        with llm_deadline(0) as unchanged:
+            assert unchanged == outer
+    assert current_deadline() is None
+
+
+def test_budget_from_env(monkeypatch):
+    monkeypatch.setenv("TEST_BUDGET_SECONDS", "0")
+    assert deadlines.budget_from_env("TEST_BUDGET_SECONDS", 20) is None
+    monkeypatch.delenv("TEST_BUDGET_SECONDS")
+    assert deadlines.budget_from_env("TEST_BUDGET_SECONDS", 20) == 20.0
+
+
+def test_timed_out_narrative_degrades_to_the_fallback():
+    pytest.importorskip("dotenv")
+    from concurrent.futures import Future
+    from utils.agent_llm import DeferredAnalysis, attach_analysis, fallback_narrative
+
+    result = {"compliance_score": 72, "kyc_status": "REVIEW_REQUIRED", "risk_factors": ["PEP match", "Cash business"]}
+    future = Future()
+    result["llm_analysis"] = DeferredAnalysis(future)
+    attach_analysis(result)
+    future.set_result(TIMEOUT_TEXT)
+
+    assert result["llm_degraded"] is True
+    assert result["llm_analysis"] == fallback_narrative(result)
+    assert result["llm_analysis"].startswith("Compliance score: 72/100; KYC status: REVIEW_REQUIRED.")
+    assert "Key factors: PEP match; Cash business." in result["llm_analysis"]
+
+    answered = attach_analysis({"credit_score": 80, "llm_analysis": "Strong cash flow."})
+    assert answered["llm_analysis"] == "Strong cash flow." and "llm_degraded" not in answered
+
+
+def test_requests_carry_a_transport_timeout(monkeypatch):
+    pytest.importorskip("dotenv")
+    genai = pytest.importorskip("google.genai")
+    from utils import model_clients
+
+    created = []
+    monkeypatch.setattr(genai, "Client", lambda **options: created.append(options) or object())
+    monkeypatch.setattr(model_clients, "_genai_client", None)
+    monkeypatch.setattr(model_clients, "REQUEST_TIMEOUT", 12.5)
+
+    model_clients.genai_client()
+
+    assert created[0]["http_options"].timeout == 12500
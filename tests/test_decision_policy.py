@@ -0,0 +1,243 @@
+import json
+import os
+import random
+import shutil
+
+import pytest
+
+from agents.decision_policy import DEFAULT_POLICY_PATH, DecisionPolicy, PolicyError, PolicyStore
+
+
+def legacy_decision(stages):
+    """
+    The hard-coded OrchestratorAgent cascade the policy file replaced
+
+    Kept verbatim apart from reading each value from its stage, as the
+    namespaced stage results do (risk_level from KYC, credit_risk from credit).
+
+    Returns:
+        - (decision, reasoning, hitl_required, added risk factors, approval conditions)
+    """
+    document, kyc, credit = stages.get("document", {}), stages.get("kyc", {}), stages.get("credit", {})
+    credit_score = credit.get('credit_score', 0)
+    compliance_score = kyc.get('compliance_score', 0)
+    documents_complete = document.get('complete', False)
+    kyc_status = kyc.get('kyc_status', '')
+    risk_level = kyc.get('risk_level', 'UNKNOWN')
+    credit_risk = credit.get('risk_level', 'UNKNOWN')
+    aml_checks = kyc.get('aml_checks', {})
+    credit_decision = credit.get('credit_decision', '')
+    edd_required = kyc.get('edd_required', False)
+    risk_factors, approval_conditions = [], []
+
+    if aml_checks.get('sanctions_screening') == 'FLAGGED':
+        return ("REJECT", "CRITICAL: Sanctions/OFAC list match detected. Regulatory prohibition.", False,
+                ["OFAC/Sanctions hit - account opening prohibited by law"], [])
+    if kyc_status == "FAILED":
+        return ("REJECT", f"KYC/AML compliance check failed (Score: {compliance_score}/100). Unable to verify customer identity.", False, [], [])
+    if not documents_complete:
+        missing = document.get('missing_fields', [])
+        return ("REJECT", "Critical documentation incomplete. Cannot proceed without required documents.", False,
+                [f"Missing critical documents: {', '.join(missing)}"], [])
+    if compliance_score < 50:
+        return ("REJECT", f"Compliance score below minimum threshold ({compliance_score}/100 < 50/100)", False, [], [])
+    if credit_score < 45:
+        return ("REJECT", f"Credit score below minimum threshold ({credit_score}/100 < 45/100). High default risk.", False, [], [])
+
+    hitl_required = True
+    if edd_required:
+        decision, reasoning = "HUMAN_REVIEW", "Enhanced Due Diligence (EDD) required due to risk profile. Manual review mandatory."
+        risk_factors.append("EDD requirement triggered")
+    elif (50 <= credit_score <= 70) or (60 <= compliance_score <= 75):
+        decision, reasoning = "HUMAN_REVIEW", f"Borderline risk scores require manual review. Credit: {credit_score}/100, Compliance: {compliance_score}/100"
+        risk_factors.append("Scores in manual review threshold range")
+    elif risk_level in ["HIGH", "CRITICAL"] or credit_risk in ["HIGH", "VERY_HIGH"]:
+        decision, reasoning = "HUMAN_REVIEW", f"High risk classification requires senior review. KYC Risk: {risk_level}, Credit Risk: {credit_risk}"
+        risk_factors.append("High risk classification from risk assessment")
+    elif aml_checks.get('pep_screening') == 'FLAGGED':
+        decision, reasoning = "HUMAN_REVIEW", "Politically Exposed Person (PEP) detected. Enhanced scrutiny required per BSA/AML guidelines."
+        risk_factors.append("PEP status requires enhanced due diligence")
+    elif aml_checks.get('adverse_media') == 'FLAGGED':
+        decision, reasoning = "HUMAN_REVIEW", "Negative news/adverse media found. Reputation risk assessment required."
+        risk_factors.append("Adverse media requires investigation")
+    elif aml_checks.get('industry_risk') == 'HIGH':
+        decision, reasoning = "HUMAN_REVIEW", "High-risk industry classification. Enhanced monitoring protocols required."
+        approval_conditions += ["Enhanced transaction monitoring", "Quarterly account review"]
+    elif credit.get('credit_limit', 0) > 5000000:
+        decision, reasoning = "HUMAN_REVIEW", f"Credit limit exceeds auto-approval authority (₹{credit.get('credit_limit', 0)/100000:.1f}L). Senior approval required."
+    elif credit_decision == "CONDITIONAL_APPROVE":
+        decision, reasoning = "HUMAN_REVIEW", "Credit assessment returned conditional approval. Review of conditions required."
+        approval_conditions.append("Credit monitoring required")
+    elif credit_score >= 75 and compliance_score >= 80 and risk_level in ["LOW"]:
+        decision = "APPROVE"
+        reasoning = f"Strong application metrics exceed auto-approval thresholds. Credit: {credit_score}/100, Compliance: {compliance_score}/100, Risk: {risk_level}"
+        hitl_required = False
+        approval_conditions += ["Standard account monitoring", "Annual financial review"]
+    else:
+        decision, reasoning = "HUMAN_REVIEW", f"Application requires manual assessment. Credit: {credit_score}/100, Compliance: {compliance_score}/100"
+        risk_factors.append("Does not meet auto-approval criteria")
+    return decision, reasoning, hitl_required, risk_factors, approval_conditions
+
+
+def random_stages(rng):
+    def flag(rate):
+        return "FLAGGED" if rng.random() < rate else "CLEAR"
+
+    stages = {
+        "document": {
+            "complete": rng.random() < 0.9,
+            "missing_fields": rng.sample(["tax_id", "license", "bank_statement"], rng.randint(0, 2))
+        },
+        "kyc": {
+            "compliance_score": rng.randint(0, 100),
+            "kyc_status": rng.choice(["PASSED", "PASSED", "REVIEW_REQUIRED", "FAILED"]),
+            "risk_level": rng.choice(["LOW", "LOW", "MEDIUM", "HIGH", "CRITICAL"]),
+            "edd_required": rng.random() < 0.15,
+            "aml_checks": {
+                "sanctions_screening": flag(0.03),
+                "pep_screening": flag(0.1),
+                "adverse_media": flag(0.1),
+                "industry_risk": rng.choice(["LOW", "MEDIUM", "HIGH"])
+            }
+        },
+        "credit": {
+            "credit_score": rng.randint(0, 100),
+            "risk_level": rng.choice(["LOW", "MEDIUM", "HIGH", "VERY_HIGH"]),
+            "credit_decision": rng.choice(["APPROVE", "CONDITIONAL_APPROVE", "DECLINE"]),
+            "credit_limit": rng.choice([0, 250000, 4999999, 5000001, 12345678])
+        }
+    }
+    # Missing stages and sections fall back to the field defaults
+    if rng.random() < 0.05:
+        del stages[rng.choice(["document", "kyc", "credit"])]
+    elif rng.random() < 0.05:
+        del stages["kyc"]["aml_checks"]
+    return stages
+
+
+@pytest.fixture(scope="module")
+def policy():
+    return DecisionPolicy.from_file(DEFAULT_POLICY_PATH)
+
+
+def test_policy_file_matches_the_legacy_cascade(policy):
+    rng = random.Random(2026)
+    rules_hit = set()
+
+    for _ in range(20000):
+        stages = random_stages(rng)
+        outcome = policy.evaluate(stages)
+        rules_hit.add(outcome.rule_id)
+
+        decision, reasoning, hitl_required, risk_factors, approval_conditions = legacy_decision(stages)
+        assert (outcome.decision, outcome.reasoning, outcome.hitl_required) == (decision, reasoning, hitl_required), stages
+        assert outcome.risk_factors == risk_factors, stages
+        assert outcome.approval_conditions == approval_conditions, stages
+
+    assert rules_hit == {rule.rule_id for rule in policy._rules}  # Every rule of the table was exercised
+
+
+def test_outcome_carries_version_and_rule(policy):
+    outcome = policy.evaluate({})
+
+    assert outcome.rule_id == "documents_incomplete"
+    assert outcome.policy_version == policy.version
+    assert policy.version.startswith(json.load(open(DEFAULT_POLICY_PATH, encoding="utf-8"))["version"] + "+")
+
+
+@pytest.mark.parametrize("document, message", [
+    ([], "JSON object"),
+    ({"fields": "x", "default": {"reasoning": "r"}}, "'fields'"),
+    ({"hard_stops": ["sanctions_hit"], "default": {"reasoning": "r"}}, "rule objects"),
+    ({"fields": {"f": "credit.credit_score"}, "default": {"reasoning": "r"}}, "Malformed policy"),
+    ({"default": {"reasoning": "Score {credit_scroe}"}}, "unknown placeholder"),
+    ({"thresholds": {"auto_reject": {"credit_score": 45}}, "default": {"reasoning": "{auto_reject[compliance]}"}}, "does not resolve"),
+    ({"default": {"reasoning": "r", "risk_factors": ["Missing {missing}"]}}, "unknown placeholder"),
+    ({"fields": {"f": {}}, "hard_stops": [{"reasoning": "r", "when": [{"field": "f", "between": 5}]}], "default": {"reasoning": "r"}}, "between"),
+    ({"fields": {"f": {}}, "hard_stops": [{"reasoning": "r", "when": [{"field": "g", "eq": 1}]}], "default": {"reasoning": "r"}}, "undeclared field"),
+    ({}, "'default' rule"),
+])
+def test_malformed_policies_are_rejected_at_compile_time(document, message):
+    with pytest.raises(PolicyError, match=message):
+        DecisionPolicy(document)
+
+
+def test_placeholders_may_name_fields_and_thresholds():
+    policy = DecisionPolicy({
+        "thresholds": {"auto_reject": {"credit_score": 45}},
+        "fields": {"score": {"path": "credit.credit_score", "default": 0}},
+        "default": {"reasoning": "{score} < {auto_reject[credit_score]} ({{literal}})"}
+    })
+
+    assert policy.evaluate({"credit": {"credit_score": 30}}).reasoning == "30 < 45 ({literal})"
+
+
+@pytest.fixture
+def policy_path(tmp_path):
+    path = tmp_path / "policy.json"
+    shutil.copy(DEFAULT_POLICY_PATH, path)
+    return path
+
+
+def _rewrite(path, document):
+    path.write_text(json.dumps(document) if not isinstance(document, str) else document, encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))  # Make the change visible to st_mtime_ns
+
+
+def test_changed_file_is_hot_swapped(policy_path):
+    store = PolicyStore(str(policy_path), check_interval=0)
+    document = json.loads(policy_path.read_text(encoding="utf-8"))
+    document["version"] = "next"
+    document["thresholds"]["auto_reject"]["credit_score"] = 60
+
+    _rewrite(policy_path, document)
+
+    assert store.current().version.startswith("next+")
+    assert store.current().evaluate({
+        "document": {"complete": True},
+        "kyc": {"compliance_score": 90},
+        "credit": {"credit_score": 55}
+    }).rule_id == "credit_below_minimum"
+
+
+@pytest.mark.parametrize("broken", [
+    "{not json",
+    "WRONG_STRUCTURE",
+    "UNKNOWN_PLACEHOLDER"
+])
+def test_rejected_file_keeps_the_previous_snapshot(policy_path, monkeypatch, broken):
+    store = PolicyStore(str(policy_path), check_interval=0)
+    previous = store.current()
+    document = json.loads(policy_path.read_text(encoding="utf-8"))
+    if broken == "WRONG_STRUCTURE":
+        document["hard_stops"][0] = "sanctions_hit"
+    elif broken == "UNKNOWN_PLACEHOLDER":
+        document["default"]["reasoning"] = "Needs review ({credit_scroe}/100)"
+    else:
+        document = broken
+
+    _rewrite(policy_path, document)
+
+    assert store.current() is previous
+    assert store.last_error
+    assert store.current().evaluate({}).rule_id == "documents_incomplete"
+
+    # The rejected file is not compiled again on every call
+    compiled = []
+    monkeypatch.setattr(DecisionPolicy, "from_file", classmethod(lambda cls, path: compiled.append(path)))
+    store.current()
+    store.current()
+    assert compiled == []
+
+
+def test_fixed_file_replaces_a_rejected_one(policy_path):
+    store = PolicyStore(str(policy_path), check_interval=0)
+    good = policy_path.read_text(encoding="utf-8")
+
+    _rewrite(policy_path, '{"hard_stops": "x"}')
+    store.current()
+    _rewrite(policy_path, good.replace('"version": "2026.10.2"', '"version": "fixed"'))
+
+    assert store.current().version.startswith("fixed+")
+    assert store.last_error is None
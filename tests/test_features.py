@@ -0,0 +1,124 @@
+import copy
+import pickle
+
+import pytest
+
+from agents.features import (
+    FEATURES_KEY, INDUSTRY_TAXONOMY, AMLRisk, AgeBucket, CreditSector, DocumentFlags, IndustryTags,
+    extract_features, features_of
+)
+from utils.sample_applications import ApplicationGenerator, demo_application
+
+# The industry lists the agents kept before the shared taxonomy
+LEGACY_AML = {
+    AMLRisk.HIGH: ["crypto", "gambling", "cannabis", "money services", "jewelry"],
+    AMLRisk.MEDIUM: ["real estate", "construction", "import/export"],
+    AMLRisk.LOW: ["saas", "healthcare", "education", "consulting"]
+}
+LEGACY_CREDIT = {
+    CreditSector.STABLE: ["healthcare", "education", "saas", "consulting"],
+    CreditSector.VOLATILE: ["restaurant", "retail", "construction"],
+    CreditSector.HIGH_RISK: ["crypto", "gambling", "cannabis"]
+}
+LEGACY_TAGS = {
+    IndustryTags.RESTRICTED: ["crypto", "gambling", "cannabis"],
+    IndustryTags.ENHANCED_DOCUMENTATION: ["crypto", "gambling"],
+    IndustryTags.STARTUP_PROGRAM: ["saas", "tech", "consulting"],
+    IndustryTags.INNOVATION_BANKING: ["saas", "tech"],
+    IndustryTags.TECH_SERVICES: ["saas", "tech", "software"],
+    IndustryTags.MERCHANT_SERVICES: ["retail", "e-commerce", "restaurant"],
+    IndustryTags.INDUSTRIAL_SERVICES: ["manufacturing", "construction"],
+    IndustryTags.PROFESSIONAL_SERVICES: ["healthcare", "professional services"]
+}
+
+
+@pytest.mark.parametrize("industry", sorted(INDUSTRY_TAXONOMY) + ["bakery"])
+def test_taxonomy_reproduces_the_legacy_lists(industry):
+    features = extract_features({"industry": industry.upper()})
+
+    expected_aml = next((risk for risk, names in LEGACY_AML.items() if industry in names), AMLRisk.UNCLASSIFIED)
+    expected_sector = next((sector for sector, names in LEGACY_CREDIT.items() if industry in names), CreditSector.UNCLASSIFIED)
+    expected_tags = IndustryTags.NONE
+    for tag, names in LEGACY_TAGS.items():
+        if industry in names:
+            expected_tags |= tag
+
+    assert features.industry == industry
+    assert features.aml_risk == expected_aml
+    assert features.credit_sector == expected_sector
+    assert features.industry_tags == expected_tags
+
+
+@pytest.mark.parametrize("answer, bucket", [
+    ("5+ years", AgeBucket.FIVE_PLUS_YEARS),
+    ("3-5 years", AgeBucket.THREE_TO_FIVE_YEARS),
+    ("1-2 years", AgeBucket.ONE_TO_TWO_YEARS),
+    ("Less than 1 year", AgeBucket.LESS_THAN_1_YEAR),
+    ("", AgeBucket.UNKNOWN),
+    (None, AgeBucket.UNKNOWN)
+])
+def test_age_buckets(answer, bucket):
+    assert extract_features({"business_age": answer}).age_bucket == bucket
+
+
+def test_missing_fields_take_the_agent_defaults():
+    features = extract_features({})
+
+    assert features.industry == ""
+    assert features.documents == DocumentFlags.NONE and features.doc_count == 0
+    assert features.revenue == 0 and features.employees == 0
+    assert (features.aml_risk, features.credit_sector) == (AMLRisk.UNCLASSIFIED, CreditSector.UNCLASSIFIED)
+
+
+def test_documents_and_numbers():
+    features = extract_features({
+        "documents": {"tax_id": True, "bank_statement": True, "license": False, "articles": True},
+        "financials": {"revenue": "$1,250,000"},
+        "employees": None
+    })
+
+    assert features.documents == DocumentFlags.TAX_ID | DocumentFlags.BANK_STATEMENT
+    assert features.doc_count == 3  # Every submitted document counts, flagged or not
+    assert features.has_document(DocumentFlags.TAX_ID | DocumentFlags.BANK_STATEMENT)
+    assert not features.has_document(DocumentFlags.TAX_ID | DocumentFlags.LICENSE)
+    assert features.document_inventory() == {
+        "tax_id": True, "license": False, "bank_statement": True, "financial_statement": False
+    }
+    assert features.revenue == 1250000.0 and features.employees == 0
+    assert extract_features({"financials": {"revenue": "n/a"}}).revenue == 0
+
+
+def test_record_is_immutable_hashable_and_picklable():
+    features = extract_features(demo_application())
+
+    with pytest.raises(AttributeError):
+        features.industry = "crypto"
+    with pytest.raises(AttributeError):
+        del features.revenue
+    assert pickle.loads(pickle.dumps(features)) == features
+    assert hash(copy.copy(features)) == hash(features)
+
+
+def test_features_of_reuses_the_attached_record():
+    app = demo_application()
+    attached = extract_features(app)
+
+    assert features_of({**app, FEATURES_KEY: attached}) is attached
+    assert features_of(app) == attached
+    assert features_of({**app, FEATURES_KEY: "stale"}) == attached  # Only a record is trusted
+
+
+def test_agents_score_the_same_with_attached_features():
+    pytest.importorskip("agno")
+    from agents.credit_agent import CreditAgent
+    from agents.document_agent import DocumentAgent
+    from agents.kyc_agent import KYCAgent
+    from utils.agent_llm import skip_narratives
+
+    agents = [DocumentAgent(), KYCAgent(), CreditAgent()]
+    distributions = {"industries": {"Crypto": 5, "Gambling": 5, " SaaS ": 5}}
+    with skip_narratives():
+        for app in ApplicationGenerator(seed=16, distributions=distributions).generate(300):
+            attached = {**app, FEATURES_KEY: extract_features(app)}
+            for agent in agents:
+                assert agent.run(attached) == agent.run(copy.deepcopy(app)), (type(agent).__name__, app["app_id"])
@@ -0,0 +1,100 @@
+import pytest
+
+from utils import llm_cache
+from utils.llm_cache import LLMCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite3"), memory_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_key_depends_on_every_part():
+    key = LLMCache.make_key("model", "instructions", "prompt")
+
+    assert key == LLMCache.make_key("model", "instructions", "prompt")
+    assert key != LLMCache.make_key("other", "instructions", "prompt")
+    assert key != LLMCache.make_key("model", "instructionsprompt", "")  # Parts are delimited
+
+
+def test_miss_computes_once_then_hits(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "narrative"
+
+    assert cache.get_or_compute("m", "i", "p", compute) == "narrative"
+    assert cache.get_or_compute("m", "i", "p", compute) == "narrative"
+    assert len(calls) == 1
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_failed_computations_are_not_cached(cache):
+    def fail():
+        raise RuntimeError("quota")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("m", "i", "p", fail)
+    assert cache.get_or_compute("m", "i", "p", lambda: "ok") == "ok"
+
+
+def test_lru_evicts_to_the_disk_tier(cache):
+    for name in ("a", "b", "c"):
+        cache.set(name, name.upper())
+
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.get("a") == "A"  # Evicted from memory, served from SQLite
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_survives_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = LLMCache(path=path)
+    first.set("key", "value")
+    first.close()
+
+    second = LLMCache(path=path)
+    assert second.get("key") == "value"
+    second.close()
+
+
+def test_expired_entries_are_misses(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = LLMCache(ttl_seconds=10)
+
+    cache.set("key", "value")
+    now[0] += 11
+
+    assert cache.get("key") is None
+
+
+def test_prune_keeps_the_newest_max_entries(tmp_path, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite3"), memory_entries=1, max_entries=50, ttl_seconds=0)
+
+    for index in range(100):  # The 100th write prunes
+        now[0] += 1
+        cache.set(f"key-{index}", str(index))
+
+    rows = cache._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+    assert rows[0] == 50
+    assert cache.get("key-10") is None
+    assert cache.get("key-99") == "99"
+    cache.close()
+
+
+def test_cached_completion_bypasses_a_disabled_cache(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "0")
+    monkeypatch.setenv("TRACING_ENABLED", "0")
+    calls = []
+
+    for _ in range(2):
+        llm_cache.cached_completion("m", "i", "p", lambda: calls.append(1) or "text")
+
+    assert len(calls) == 2
@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from utils import rate_limiter
+from utils.rate_limiter import QuotaLimiter, ThrottledError, TokenBucket, is_throttling_error
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock that time.sleep advances; records every sleep"""
+    state = {"now": 1000.0, "sleeps": []}
+
+    def sleep(seconds):
+        state["sleeps"].append(seconds)
+        state["now"] += seconds
+
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: state["now"])
+    monkeypatch.setattr(rate_limiter.time, "sleep", sleep)
+    return state
+
+
+class StatusError(Exception):
+    def __init__(self, message, **attributes):
+        super().__init__(message)
+        self.__dict__.update(attributes)
+
+
+class ResourceExhausted(Exception):
+    pass
+
+
+def test_bucket_allows_a_burst_then_meters_the_refill(clock):
+    bucket = TokenBucket(60)  # One token per second
+
+    assert [bucket.reserve(1) for _ in range(60)] == [0.0] * 60
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)   # Reservations queue up
+    clock["now"] += 10                               # Refills 10, paying off the debt of 2
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1000) == pytest.approx(53.0)  # Capped at capacity, never unserviceable
+
+
+def test_limiter_waits_for_request_and_token_quota(clock):
+    limiter = QuotaLimiter(requests_per_minute=2, tokens_per_minute=600)
+
+    for _ in range(3):
+        assert limiter.call(lambda: "ok", "x" * 40) == "ok"
+
+    assert clock["sleeps"] == [pytest.approx(30.0)]  # The third request waits for its slot
+    stats = limiter.stats()
+    assert stats["requests"] == 3 and stats["quota_wait_seconds"] == pytest.approx(30.0)
+    assert (stats["requests_per_minute"], stats["tokens_per_minute"]) == (2, 600)
+    assert limiter.estimate_tokens("x" * 40) == 10 + rate_limiter.DEFAULT_COMPLETION_TOKENS
+
+
+def test_throttled_calls_back_off_with_jitter(clock):
+    limiter = QuotaLimiter(max_retries=5, base_delay=1.0, max_delay=3.0)
+    limiter._random = random.Random(7)
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        if len(attempts) <= 3:
+            raise StatusError("quota", code=429)
+        return "answer"
+
+    assert limiter.call(call) == "answer"
+
+    assert len(clock["sleeps"]) == 3
+    for attempt, delay in enumerate(clock["sleeps"]):
+        assert 0 <= delay <= min(3.0, 2 ** attempt)
+    assert len(set(clock["sleeps"])) == 3            # Jittered, not a fixed schedule
+    stats = limiter.stats()
+    assert (stats["throttled"], stats["retries"], stats["failures"], stats["requests"]) == (3, 3, 0, 1)
+    assert stats["backoff_seconds"] == pytest.approx(sum(clock["sleeps"]), abs=1e-3)
+
+
+def test_persistent_throttling_raises_after_the_retries(clock):
+    limiter = QuotaLimiter(max_retries=2, base_delay=0.5)
+
+    def call():
+        raise ResourceExhausted("slow down")
+
+    with pytest.raises(ThrottledError, match="after 3 attempts"):
+        limiter.call(call)
+    assert len(clock["sleeps"]) == 2
+    assert limiter.stats()["failures"] == 1
+
+
+def test_other_errors_are_not_retried(clock):
+    limiter = QuotaLimiter()
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        raise ValueError("Invalid argument in request 84291 at 127.0.0.1:4290")
+
+    with pytest.raises(ValueError):
+        limiter.call(call)
+    assert len(attempts) == 1 and clock["sleeps"] == []
+    assert limiter.stats()["retries"] == 0
+
+
+@pytest.mark.parametrize("error, throttling", [
+    (StatusError("x", code=429), True),
+    (StatusError("x", status_code=429), True),
+    (StatusError("x", status="RESOURCE_EXHAUSTED"), True),
+    (StatusError("x", code=lambda: "StatusCode.RESOURCE_EXHAUSTED"), True),
+    (ResourceExhausted("x"), True),
+    (RuntimeError("429 Too Many Requests"), True),
+    (RuntimeError("Quota exceeded for model"), True),
+    (RuntimeError("request id 1429-7 failed"), False),
+    (RuntimeError("connection to port 4290 refused"), False),
+    (RuntimeError("read 34291 bytes"), False),
+    (StatusError("x", code=500), False)
+])
+def test_throttling_errors(error, throttling):
+    assert is_throttling_error(error) is throttling
+
+
+def test_quota_is_divided_by_the_process_share(monkeypatch):
+    monkeypatch.setenv("GEMINI_RPM", "100")
+    monkeypatch.setenv("GEMINI_TPM", "0")
+    monkeypatch.setenv("LLM_QUOTA_SHARE", "0.25")
+    monkeypatch.setattr(rate_limiter, "_limiter", None)
+
+    limiter = rate_limiter.get_limiter()
+
+    assert limiter.request_bucket.capacity == 25 and limiter.token_bucket is None
+    assert rate_limiter.get_limiter() is limiter
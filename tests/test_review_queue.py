@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from utils import review_queue as review_queue_module
+from utils.review_queue import ReviewQueue, priority_level, sla_seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_800_000_000.0]
+    monkeypatch.setattr(review_queue_module.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = ReviewQueue(str(tmp_path / "hitl.sqlite3"))
+    yield queue
+    queue.close()
+
+
+def _enqueue(queue, app_id, priority, queued_at=None):
+    review_data = {"priority": priority, "options": ["Approve", "Reject"], "summary": {"recommendation": "APPROVE"}}
+    queue.enqueue(app_id, {"application_id": app_id}, {"kyc": {}}, review_data, queued_at=queued_at)
+
+
+def test_priority_text_sets_level_and_sla():
+    assert priority_level("HIGH - Review within 4 hours") == "HIGH"
+    assert priority_level("unknown") == "STANDARD"
+    assert sla_seconds("MEDIUM - Review within 12 hours") == 12 * 3600
+    assert sla_seconds("MEDIUM") == 24 * 3600
+
+
+def test_claims_follow_the_earliest_sla_deadline(queue, clock):
+    now = clock[0]
+    _enqueue(queue, "standard-old", "STANDARD", queued_at=now - 47 * 3600)  # Due in 1h
+    _enqueue(queue, "high-new", "HIGH", queued_at=now)                      # Due in 4h
+    _enqueue(queue, "medium-new", "MEDIUM", queued_at=now)                  # Due in 24h
+
+    order = [queue.claim(f"reviewer-{index}")["application_id"] for index in range(3)]
+
+    assert order == ["standard-old", "high-new", "medium-new"]
+    assert [case["application_id"] for case in queue.list_cases()] == order
+    assert queue.claim("reviewer-9") is None
+
+
+def test_a_leased_case_is_not_handed_to_another_reviewer(queue, clock):
+    _enqueue(queue, "a", "HIGH")
+    _enqueue(queue, "b", "MEDIUM")
+
+    assert queue.claim("alice")["application_id"] == "a"
+    assert queue.claim("alice")["application_id"] == "a"  # Her lease comes back, renewed
+    assert queue.claim("bob")["application_id"] == "b"
+    assert queue.claim("bob", app_id="a")["application_id"] == "b"  # Bob still holds b
+    assert queue.get("a")["lease_owner"] == "alice"
+
+
+def test_expired_leases_return_the_case_to_the_queue(queue, clock):
+    _enqueue(queue, "a", "HIGH")
+    queue.claim("alice", lease_seconds=60)
+
+    clock[0] += 61
+
+    assert queue.claim("bob")["application_id"] == "a"
+    assert not queue.complete("a", "alice")
+    assert queue.complete("a", "bob")
+    assert len(queue) == 0
+
+
+def test_release_renew_and_update_need_the_lease(queue, clock):
+    _enqueue(queue, "a", "HIGH")
+    queue.claim("alice", lease_seconds=60)
+
+    assert not queue.release("a", "bob")
+    assert not queue.update("a", "bob", {}, {}, {"priority": "HIGH"})
+    assert queue.renew("a", "alice", lease_seconds=600)
+    clock[0] += 300
+    assert queue.update("a", "alice", {"application_id": "a", "edited": True}, {}, {"priority": "HIGH"})
+    assert queue.get("a")["application"]["edited"]
+    assert queue.release("a", "alice")
+    assert queue.get("a")["lease_owner"] is None
+
+
+def test_requeueing_resets_the_lease_and_deadline(queue, clock):
+    _enqueue(queue, "a", "STANDARD", queued_at=clock[0] - 3600)
+    queue.claim("alice")
+
+    _enqueue(queue, "a", "HIGH")
+
+    case = queue.get("a")
+    assert case["lease_owner"] is None
+    assert case["level"] == "HIGH"
+    assert queue.stats() == {"total": 1, "overdue": 0, "claimed": 0, "by_level": {"HIGH": 1}}
+
+
+def test_overdue_cases_are_counted(queue, clock):
+    _enqueue(queue, "late", "HIGH", queued_at=clock[0] - 5 * 3600)
+    _enqueue(queue, "fresh", "HIGH")
+
+    assert queue.stats()["overdue"] == 1
+    assert queue.get("late")["overdue"]
+
+
+def test_an_invalid_decision_does_not_lease_the_case(tmp_path, monkeypatch):
+    pytest.importorskip("agno")
+    from utils import application_store
+    import service
+
+    monkeypatch.setenv("APPLICATION_STORE_PATH", str(tmp_path / "applications.sqlite3"))
+    monkeypatch.setenv("HITL_QUEUE_PATH", str(tmp_path / "hitl.sqlite3"))
+    monkeypatch.setattr(application_store, "_store", None)
+    monkeypatch.setattr(review_queue_module, "_queue", None)
+    onboarding = service.OnboardingService(workers=1)
+    _enqueue(onboarding.review_queue, "APP-1", "HIGH")
+
+    async def decide(payload):
+        try:
+            return await onboarding.record_human_decision("APP-1", payload)
+        except service.HTTPError as e:
+            return e.status, e.message
+
+    try:
+        assert asyncio.run(decide({"reviewer_id": "alice", "decision": "Maybe", "notes": "n"}))[0] == 400
+        assert asyncio.run(decide({"reviewer_id": "alice", "decision": "Approve"}))[0] == 400
+        assert onboarding.review_queue.get("APP-1")["lease_owner"] is None
+        assert onboarding.review_queue.claim("bob")["application_id"] == "APP-1"
+    finally:
+        onboarding.io_executor.shutdown()
+        onboarding.executor.shutdown()
+        onboarding.store.close()
+        onboarding.review_queue.close()
@@ -0,0 +1,213 @@
+import json
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("agno")
+
+import service
+from utils import application_store, review_queue, submission_index
+from utils.submission_index import DUPLICATE
+
+
+@pytest.fixture
+def onboarding(tmp_path, monkeypatch):
+    monkeypatch.setenv("APPLICATION_STORE_PATH", str(tmp_path / "applications.sqlite3"))
+    monkeypatch.setenv("HITL_QUEUE_PATH", str(tmp_path / "hitl.sqlite3"))
+    monkeypatch.setattr(application_store, "_store", None)
+    monkeypatch.setattr(review_queue, "_queue", None)
+    monkeypatch.setattr(submission_index, "_index", None)
+    onboarding = service.OnboardingService(workers=2, max_concurrent=1, max_pending=1)
+    yield onboarding
+    onboarding.io_executor.shutdown()
+    onboarding.executor.shutdown()
+    onboarding.store.close()
+    onboarding.review_queue.close()
+
+
+class FailingPipeline:
+    def run(self, app_data, on_stage=None):
+        raise RuntimeError("pipeline down")
+
+
+def application(app_id, **fields):
+    app_data = {
+        "application_id": app_id,
+        "business_name": "Acme Bakery",
+        "owner_name": "Jane Doe",
+        "owner_email": "jane@example.com",
+        "industry": "Retail"
+    }
+    app_data.update(fields)
+    return app_data
+
+
+async def call(coroutine):
+    """(status, payload) of an endpoint call, HTTP errors included"""
+    try:
+        return await coroutine
+    except service.HTTPError as e:
+        return e.status, {"error": e.message}
+
+
+async def drain(onboarding):
+    while onboarding._tasks:
+        await asyncio.gather(*list(onboarding._tasks))
+
+
+def test_a_failed_application_is_not_the_original_of_a_resubmission(onboarding):
+    onboarding.pipeline = FailingPipeline()
+
+    async def scenario():
+        onboarding._semaphore = asyncio.Semaphore(onboarding.max_concurrent)
+        first = await call(onboarding.submit_application(application("APP-1")))
+        await drain(onboarding)
+        second = await call(onboarding.submit_application(application("APP-2")))
+        await drain(onboarding)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first[0] == 202 and second == (202, {"application_id": "APP-2", "status": "PROCESSING"})
+    assert onboarding.store.get("APP-1")["status"] == "ERROR"
+
+
+def test_startup_replays_stored_applications(onboarding):
+    stored = application("APP-1", submitted_date=service.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    onboarding.store.save_application(dict(stored, status="APPROVE"))
+    onboarding.store.save_application(application("APP-2", business_name="Failed Co", status="ERROR"))
+
+    assert onboarding.seed_submission_index() == 1
+
+    async def resubmit(app_data):
+        return await call(onboarding.submit_application(app_data))
+
+    status, payload = asyncio.run(resubmit(application("APP-3")))
+    assert (status, payload["status"], payload["duplicate_of"]) == (200, DUPLICATE, "APP-1")
+
+
+class BlockedPipeline:
+    """Holds every run until released, then fails it"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def run(self, app_data, on_stage=None):
+        self.release.wait(5)
+        raise RuntimeError("released")
+
+
+def test_a_burst_cannot_overrun_capacity(onboarding):
+    onboarding.pipeline = pipeline = BlockedPipeline()
+
+    async def scenario():
+        onboarding._semaphore = asyncio.Semaphore(onboarding.max_concurrent)
+        burst = [
+            call(onboarding.submit_application(application(f"APP-{n}", owner_email=f"owner{n}@example.com")))
+            for n in range(6)
+        ]
+        responses = await asyncio.gather(*burst)
+        pending = onboarding._pending
+        pipeline.release.set()
+        await drain(onboarding)
+        return responses, pending
+
+    try:
+        responses, pending = asyncio.run(scenario())
+    finally:
+        pipeline.release.set()
+
+    statuses = sorted(status for status, _ in responses)
+    assert statuses == [202, 202, 429, 429, 429, 429]  # max_concurrent + max_pending
+    assert pending == 2 and onboarding._pending == 0
+
+
+def test_early_returns_release_their_slot(onboarding):
+    async def scenario():
+        onboarding._semaphore = asyncio.Semaphore(onboarding.max_concurrent)
+        onboarding.store.save_application(application("APP-1", status="PROCESSING"))
+        conflict = await call(onboarding.submit_application(application("APP-1")))
+        return conflict, onboarding._pending
+
+    (status, _), pending = asyncio.run(scenario())
+    assert status == 409 and pending == 0
+
+
+def test_an_application_in_progress_is_not_submitted_twice(onboarding):
+    onboarding.pipeline = pipeline = BlockedPipeline()
+
+    async def scenario():
+        onboarding._semaphore = asyncio.Semaphore(onboarding.max_concurrent)
+        racing = await asyncio.gather(
+            call(onboarding.submit_application(application("APP-1"))),
+            call(onboarding.submit_application(application("APP-1")))
+        )
+        again = await call(onboarding.submit_application(application("APP-1")))
+        pipeline.release.set()
+        await drain(onboarding)
+        return racing, again
+
+    try:
+        racing, again = asyncio.run(scenario())
+    finally:
+        pipeline.release.set()
+
+    assert sorted(status for status, _ in racing) == [202, 409]
+    assert again[0] == 409
+
+
+@pytest.mark.parametrize("headers, status", [
+    ("Content-Length: abc\r\n", 400),
+    ("Content-Length: -5\r\n", 400),
+    (f"Content-Length: {service.MAX_BODY_BYTES + 1}\r\n", 413)
+])
+def test_bad_content_length_is_rejected(onboarding, headers, status):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(f"POST /applications HTTP/1.1\r\n{headers}\r\n".encode("latin-1"))
+        reader.feed_eof()
+        return await onboarding._read_request(reader)
+
+    with pytest.raises(service.HTTPError) as error:
+        asyncio.run(read())
+    assert error.value.status == status
+
+
+def test_request_body_is_read_by_content_length(onboarding):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'POST /applications?limit=5 HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}GET')
+        reader.feed_eof()
+        return await onboarding._read_request(reader)
+
+    method, path, query, headers, body = asyncio.run(read())
+    assert (method, path, query, body) == ("POST", "/applications", {"limit": "5"}, b"{}")
+
+
+def test_decision_endpoints(onboarding):
+    review_data = {"priority": "HIGH", "options": ["Approve", "Reject"], "summary": {"recommendation": "REJECT"}}
+    onboarding.store.save_application(application("APP-1", status="HUMAN_REVIEW"))
+    onboarding.review_queue.enqueue("APP-1", application("APP-1", status="HUMAN_REVIEW"), {"kyc": {}}, review_data)
+
+    def post(path, payload):
+        return asyncio.run(call(onboarding.dispatch("POST", path, json.dumps(payload).encode("utf-8"))))
+
+    assert post("/hitl/claim", {})[0] == 400
+    status, case = post("/hitl/claim", {"reviewer_id": "alice"})
+    assert status == 200 and case["application_id"] == "APP-1"
+    assert post("/hitl/claim", {"reviewer_id": "bob"})[0] == 404
+    assert post("/hitl/APP-1/decision", {"reviewer_id": "bob", "decision": "Approve", "notes": "ok"})[0] == 409
+    assert post("/hitl/APP-1/release", {"reviewer_id": "bob"})[0] == 409
+    assert post("/hitl/APP-1/release", {"reviewer_id": "alice"}) == (200, {"application_id": "APP-1", "released": True})
+
+    status, decision = post("/hitl/APP-1/decision", {"reviewer_id": "bob", "decision": "Approve", "notes": "Verified"})
+    assert status == 200
+    assert (decision["human_decision"], decision["reviewer_id"], decision["override"]) == ("APPROVE", "bob", True)
+    assert decision["communication"]["customer_message"]
+    assert onboarding.store.get("APP-1")["status"] == "APPROVE"
+    assert onboarding.review_queue.get("APP-1") is None
+    assert post("/hitl/APP-1/decision", {"reviewer_id": "bob", "decision": "Approve", "notes": "again"})[0] == 404
+
+    status, queue = asyncio.run(call(onboarding.dispatch("GET", "/hitl", b"", {"limit": "10"})))
+    assert status == 200 and queue["items"] == []
@@ -0,0 +1,47 @@
+import pickle
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from agents.stage_results import CreditResult, Decision, KYCResult, KYCStatus, RiskLevel, StageResults, stage_result
+
+
+def test_known_values_become_enum_members():
+    record = KYCResult.from_output({"kyc_status": "PASSED", "risk_level": "LOW", "risk_factors": ["New business"]})
+
+    assert record.kyc_status is KYCStatus.PASSED
+    assert record.risk_level is RiskLevel.LOW
+    assert record["risk_level"] == "LOW"
+    assert record.risk_factors == ("New business",)
+
+
+def test_zero_valued_members_are_kept():
+    record = CreditResult.from_output({"risk_level": "UNKNOWN", "credit_decision": "UNKNOWN"})
+
+    assert record.risk_level is RiskLevel.UNKNOWN
+    assert record.credit_decision is Decision.UNKNOWN
+    assert record.to_dict()["credit_decision"] == "UNKNOWN"
+
+
+def test_unknown_values_and_extra_keys_round_trip():
+    output = {"kyc_status": "ESCALATED", "risk_level": None, "reviewer": "ops"}
+    record = stage_result("kyc", output)
+
+    assert record.kyc_status == "ESCALATED"
+    assert record["risk_level"] is None
+    assert record["reviewer"] == "ops"
+    assert pickle.loads(pickle.dumps(record)).to_dict() == record.to_dict()
+    with pytest.raises(AttributeError):
+        record.kyc_status = "PASSED"
+
+
+def test_container_keeps_stage_records_apart():
+    results = StageResults({
+        "kyc": stage_result("kyc", {"risk_level": "HIGH", "risk_factors": ["PEP", "Cash"]}),
+        "credit": stage_result("credit", {"risk_level": "LOW", "risk_factors": ["Cash", "Thin file"]})
+    })
+
+    assert results.kyc.risk_level is RiskLevel.HIGH and results["credit"].risk_level is RiskLevel.LOW
+    assert results.risk_factors() == ["PEP", "Cash", "Thin file"]
+    assert results.decision is None
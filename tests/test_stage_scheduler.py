@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from utils.stage_scheduler import Stage, StageScheduler, changed_fields
+
+
+def _recorder(name, log, delay=0.0, result=None):
+    def run(stage_input):
+        time.sleep(delay)
+        log.append(name)
+        return dict(result or {name: True})
+    return run
+
+
+def test_stages_are_emitted_in_declaration_order():
+    log = []
+    scheduler = StageScheduler([
+        Stage("slow", _recorder("slow", log, delay=0.05)),
+        Stage("fast", _recorder("fast", log)),
+        Stage("last", _recorder("last", log), requires=["slow", "fast"])
+    ])
+    emitted = []
+
+    pipeline_run = scheduler.run({}, on_stage=lambda name, result: emitted.append(name))
+
+    assert log[0] == "fast"  # Ran before "slow" finished
+    assert emitted == ["slow", "fast", "last"]
+    assert pipeline_run.completed == ["slow", "fast", "last"]
+
+
+def test_independent_stages_run_concurrently():
+    barrier = threading.Barrier(2, timeout=2)
+
+    def meet(stage_input):
+        barrier.wait()  # Deadlocks (and times out) unless both run at once
+        return {"met": True}
+
+    pipeline_run = StageScheduler([Stage("a", meet), Stage("b", meet)], max_workers=2).run({})
+
+    assert pipeline_run.completed == ["a", "b"]
+
+
+def test_required_outputs_are_merged_into_the_input():
+    seen = {}
+
+    def consume(stage_input):
+        seen.update(stage_input)
+        return {}
+
+    StageScheduler([
+        Stage("first", lambda stage_input: {"score": 7}),
+        Stage("second", consume, requires=["first"])
+    ]).run({"business_name": "Acme"})
+
+    assert seen == {"business_name": "Acme", "score": 7}
+
+
+def test_halt_stops_later_stages_from_being_emitted():
+    log = []
+    scheduler = StageScheduler([
+        Stage("document", lambda stage_input: {"complete": False}, halt_when=lambda result: None if result["complete"] else "Incomplete"),
+        Stage("parallel", _recorder("parallel", log)),
+        Stage("credit", _recorder("credit", log), requires=["document"])
+    ])
+
+    pipeline_run = scheduler.run({})
+
+    assert pipeline_run.halted
+    assert pipeline_run.halted_at == "document"
+    assert pipeline_run.halt_reason == "Incomplete"
+    assert pipeline_run.completed == ["document"]
+    assert "credit" not in log  # Its dependency halted, so it never started
+
+
+def test_run_if_false_skips_the_stage_and_unblocks_dependents():
+    scheduler = StageScheduler([
+        Stage("optional", lambda stage_input: {"ran": True}, run_if=lambda app_data, outputs: False),
+        Stage("after", lambda stage_input: {"optional_ran": "ran" in stage_input}, requires=["optional"])
+    ])
+
+    pipeline_run = scheduler.run({})
+
+    assert pipeline_run.skipped == ["optional"]
+    assert pipeline_run.outputs == {"after": {"optional_ran": False}}
+
+
+def test_stage_errors_propagate():
+    def fail(stage_input):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        StageScheduler([Stage("broken", fail)]).run({})
+
+
+def test_invalid_stage_graphs_are_rejected():
+    with pytest.raises(ValueError, match="Duplicate"):
+        StageScheduler([Stage("a", dict), Stage("a", dict)])
+    with pytest.raises(ValueError, match="unknown or later"):
+        StageScheduler([Stage("a", dict, requires=["b"]), Stage("b", dict)])
+
+
+def test_reads_any_matches_parents_and_children():
+    stage = Stage("credit", dict, reads=["financials"])
+
+    assert stage.reads_any({"financials.revenue"})
+    assert not stage.reads_any({"documents.license"})
+    assert Stage("any", dict).reads_any({"anything"})
+
+
+def test_changed_fields_reports_nested_leaves():
+    before = {"revenue": "$1M-$5M", "financials": {"debt": 10, "revenue": 5}}
+    after = {"revenue": "$1M-$5M", "financials": {"debt": 20, "revenue": 5}, "employees": 3}
+
+    assert changed_fields(before, after) == {"financials.debt", "employees"}
@@ -0,0 +1,161 @@
+import json
+
+import pytest
+
+from agents.features import FEATURES_KEY, extract_features
+from utils.submission_index import (
+    ACCEPT, BLOCK, DUPLICATE, FLAG, SlidingWindowCounter, SubmissionIndex, application_fingerprint, identity_keys
+)
+
+HOUR = 3600
+
+
+def application(app_id, email="Jane.Doe+loans@gmail.com", business="Acme Bakery LLC", revenue=250000):
+    return {
+        "application_id": app_id,
+        "owner_name": "Dr. Jane Doe",
+        "owner_email": email,
+        "business_name": business,
+        "financials": {"revenue": revenue},
+        "submitted_date": "2026-10-01 09:00:00"
+    }
+
+
+def test_identities_are_normalized():
+    keys = identity_keys(application("A", email="JANE.DOE+x@googlemail.com", business="The Acme Bakery, Inc."))
+
+    assert keys == {"email": "janedoe@gmail.com", "owner_business": "jane doe|acme bakery"}
+
+
+def test_fingerprint_ignores_volatile_fields_and_attached_features():
+    app = application("A")
+    resubmitted = dict(application("B"), submitted_date="2026-10-02 10:00:00", status="PENDING")
+    resubmitted[FEATURES_KEY] = extract_features(resubmitted)
+
+    assert application_fingerprint(resubmitted) == application_fingerprint(app)
+    assert application_fingerprint(application("C", revenue=1)) != application_fingerprint(app)
+
+
+def test_duplicates_retries_and_horizon():
+    index = SubmissionIndex(dedupe_seconds=10 * HOUR, flag_threshold=0, block_threshold=0)
+
+    assert index.check(application("A"), now=0).action == ACCEPT
+    duplicate = index.check(application("B"), now=HOUR)
+    assert (duplicate.action, duplicate.duplicate_of) == (DUPLICATE, "A")
+    assert index.check(application("A"), now=HOUR).action == ACCEPT  # A retry of A itself
+    assert index.check(application("C"), now=20 * HOUR).action == ACCEPT
+    assert index.stats()["duplicates"] == 1
+
+
+def test_velocity_flags_then_blocks_within_the_window():
+    index = SubmissionIndex(window_seconds=24 * HOUR, flag_threshold=2, block_threshold=3)
+
+    actions = [index.check(application(f"A{n}", revenue=n), now=n * HOUR).action for n in range(3)]
+    assert actions == [ACCEPT, FLAG, BLOCK]
+
+    later = index.check(application("A9", revenue=9), now=40 * HOUR)
+    assert later.action == ACCEPT and later.returning
+    assert not index.check(application("X", email="other@example.com", business="Other"), now=40 * HOUR).returning
+
+
+def test_inspecting_does_not_count():
+    index = SubmissionIndex(flag_threshold=2, block_threshold=0)
+    index.check(application("A"), now=0)
+
+    assert index.check(application("B", revenue=2), now=1, record=False).action == FLAG
+    assert index.check(application("C", revenue=3), now=2, record=False).velocity["email"] == 2
+
+
+def test_counter_slides_and_drops_idle_keys():
+    counter = SlidingWindowCounter(window_seconds=24, buckets=24)
+
+    assert [counter.add("a", now) for now in (0, 1, 2)] == [1, 2, 3]
+    counter.add("b", 20)
+    assert counter.count("a", 23) == 3
+    assert counter.count("a", 25) == 1      # Buckets 0 and 1 have left the window
+    assert counter.add("a", 25) == 2        # Bucket 2 and the new event remain
+
+    counter.add("c", 50)
+    assert len(counter) == 1                # a and b were idle for a whole window
+    assert counter.count("a", 50) == 0
+    assert counter._expiry_heap == [50]
+
+
+def test_counter_keeps_keys_listed_under_an_older_bucket():
+    counter = SlidingWindowCounter(window_seconds=24, buckets=24)
+    counter.add("a", 0)
+    counter.add("a", 10)
+
+    counter.add("b", 30)                    # Bucket 0 expires, but a was seen in bucket 10
+    assert counter.count("a", 30) == 1
+    counter.add("b", 40)
+    assert len(counter) == 1
+
+
+def test_replay_restores_the_checked_state():
+    submissions = [application("A"), application("B"), application("C", revenue=3), application("D", revenue=4)]
+    checked = SubmissionIndex(flag_threshold=2, block_threshold=3)
+    for n, app in enumerate(submissions[:3]):
+        checked.check(app, now=n)
+
+    replayed = SubmissionIndex(flag_threshold=2, block_threshold=3)
+    for n, app in enumerate(submissions[:3]):
+        replayed.replay(app, now=n)
+
+    assert replayed.check(submissions[3], now=3).to_dict() == checked.check(submissions[3], now=3).to_dict()
+    assert replayed.stats()["checked"] == 1 and replayed.stats()["duplicates"] == 0
+
+
+def test_resumed_batch_screens_against_skipped_records(tmp_path):
+    from batch_runner import run_batch
+
+    input_path = tmp_path / "applications.jsonl"
+    output_path = tmp_path / "results.jsonl"
+    input_path.write_text("".join(json.dumps(app) + "\n" for app in [application("A"), application("B")]), encoding="utf-8")
+    output_path.write_text(json.dumps({"application_id": "A", "status": "APPROVE"}) + "\n", encoding="utf-8")
+
+    stats = run_batch(str(input_path), str(output_path), workers=1)
+
+    assert stats == {"processed": 0, "skipped": 1, "screened": 1, "failed": 0}
+    record = json.loads(output_path.read_text(encoding="utf-8").splitlines()[-1])
+    assert (record["application_id"], record["status"], record["duplicate_of"]) == ("B", DUPLICATE, "A")
+
+
+def test_retries_of_one_application_count_once():
+    index = SubmissionIndex(flag_threshold=2, block_threshold=3)
+
+    checks = [index.check(application("A"), now=n) for n in range(10)]
+
+    assert {check.action for check in checks} == {ACCEPT}
+    assert checks[-1].velocity == {"email": 1, "owner_business": 1}
+    assert index.check(application("B", revenue=2), now=11).velocity["email"] == 2
+
+
+def test_a_resubmission_replaces_the_content_of_its_id():
+    index = SubmissionIndex(flag_threshold=0, block_threshold=0)
+    index.check(application("A", revenue=1), now=0)
+    index.check(application("A", revenue=2), now=1)   # Corrected under the same id
+
+    assert index.check(application("B", revenue=1), now=2).action == ACCEPT
+    assert index.check(application("C", revenue=2), now=3).duplicate_of == "A"
+
+
+def test_forgotten_submissions_are_neither_originals_nor_counted():
+    index = SubmissionIndex(flag_threshold=2, block_threshold=0)
+    index.check(application("A"), now=0)
+
+    assert index.forget("A") and not index.forget("A")
+    check = index.check(application("B"), now=1)
+    assert check.action == ACCEPT and check.velocity["email"] == 1
+
+
+def test_counter_discards_events_inside_the_window():
+    counter = SlidingWindowCounter(window_seconds=24, buckets=24)
+    counter.add("a", 1)
+    counter.add("a", 2)
+
+    counter.discard("a", 1)
+    counter.discard("b", 1)
+    assert counter.count("a", 3) == 1
+    counter.discard("a", 1)                 # Nothing left in that bucket
+    assert counter.count("a", 3) == 1
@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+
+import pytest
+
+from utils import tracing
+from utils.tracing import Span, Tracer, waterfall
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    tracer = Tracer()
+    monkeypatch.setattr(tracing, "get_tracer", lambda: tracer)
+    return tracer
+
+
+def test_spans_nest_into_a_waterfall(tracer):
+    with tracing.span("pipeline.run", app="APP-1") as root:
+        with tracing.span("agent.kyc") as child:
+            child.set("cache", "miss")
+            child.set("ignored", None)
+        with pytest.raises(ValueError):
+            with tracing.span("agent.credit"):
+                raise ValueError("bad input")
+
+    spans = tracer.trace(root.trace_id)
+    assert [span.name for span in spans] == ["pipeline.run", "agent.kyc", "agent.credit"]
+    assert spans[1].attributes == {"cache": "miss"}
+    assert spans[2].error == "ValueError: bad input"
+
+    rows = waterfall(spans)
+    assert [(row["span"], row["depth"]) for row in rows] == [("pipeline.run", 0), ("agent.kyc", 1), ("agent.credit", 1)]
+    assert rows[0]["app"] == "APP-1" and rows[0]["start_ms"] == 0
+
+
+def test_export_is_opt_in(monkeypatch):
+    monkeypatch.delenv("TRACE_PATH", raising=False)
+    monkeypatch.delenv("TRACING_ENABLED", raising=False)
+    monkeypatch.setattr(tracing, "_tracer", None)
+
+    tracer = tracing.get_tracer()
+
+    assert tracer.path is None and tracer._exporter is None
+    tracer.finish(_finished("root"))
+    assert tracer._pending == []
+
+
+def test_spans_are_written_by_the_exporter_thread(tmp_path):
+    tracer = Tracer(path=str(tmp_path / "traces.jsonl"), flush_interval=60)
+    writers = []
+    write = tracer._write
+    tracer._write = lambda spans: writers.append(threading.current_thread().name) or write(spans)
+
+    tracer.finish(_finished("child", parent=True))
+    assert not writers                      # Buffered until a root span or flush_every
+    tracer.finish(_finished("root"))
+    _wait_for(lambda: writers)
+    tracer.close()
+
+    assert writers[0] == "trace-export"
+    lines = (tmp_path / "traces.jsonl").read_text(encoding="utf-8").splitlines()
+    spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert [span["name"] for span in spans] == ["child", "root"]
+
+
+def test_finishing_spans_does_not_wait_for_a_slow_export(tmp_path):
+    tracer = Tracer(path=str(tmp_path / "traces.jsonl"), flush_interval=60)
+    exporting, release = threading.Event(), threading.Event()
+    write = tracer._write
+
+    def slow_write(spans):
+        exporting.set()
+        release.wait(5)
+        write(spans)
+
+    tracer._write = slow_write
+    tracer.finish(_finished("first"))
+    assert exporting.wait(5)
+
+    started = time.perf_counter()
+    for n in range(100):
+        tracer.finish(_finished(f"root {n}"))
+    elapsed = time.perf_counter() - started
+
+    release.set()
+    tracer.close()
+    assert elapsed < 1
+    assert len(tracer._pending) == 0
+
+
+def test_export_file_is_rotated(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(path=str(path), max_bytes=2000, flush_interval=60)
+    tracer.close()  # Export from this thread only
+
+    for n in range(20):
+        tracer.finish(_finished(f"root {n}"))
+        tracer.flush()
+
+    assert path.stat().st_size <= 2000
+    assert (tmp_path / "traces.jsonl.1").exists()
+
+
+def test_backlog_is_bounded(tmp_path):
+    tracer = Tracer(path=str(tmp_path / "traces.jsonl"), max_pending=5, flush_every=100, flush_interval=60)
+    tracer.close()
+
+    for n in range(8):
+        tracer.finish(_finished(f"child {n}", parent=True))
+
+    assert [span.name for span in tracer._pending] == [f"child {n}" for n in range(3, 8)]
+    assert tracer.dropped == 3
+
+
+def _finished(name, parent=False):
+    span = Span(name, Span("parent") if parent else None)
+    span.end_ns = span.start_ns + 1000
+    return span
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
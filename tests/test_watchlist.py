@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from utils import watchlist as watchlist_module
+from utils.watchlist import Watchlist, compile_watchlist, using_watchlist
+from agents.screening_agent import ScreeningAgent
+
+RECORDS = [
+    {"id": "S1", "name": "Ivan Petrovich Sidorov", "list": "SANCTIONS", "aliases": ["Ivan Sidorov"]},
+    {"id": "P1", "name": "Maria Gonzalez Lopez", "list": "PEP"},
+    {"id": "S2", "name": "Blackwater Trading Ltd", "list": "SANCTIONS"}
+]
+
+
+@pytest.fixture
+def list_path(tmp_path):
+    path = str(tmp_path / "watchlist.bin")
+    compile_watchlist(RECORDS, path, version="test-1")
+    return path
+
+
+@pytest.fixture
+def shared_list(list_path, monkeypatch):
+    monkeypatch.setenv("WATCHLIST_PATH", list_path)
+    monkeypatch.setattr(watchlist_module, "_watchlist", None)
+    monkeypatch.setattr(watchlist_module, "_watchlist_path", None)
+    return list_path
+
+
+def test_screen_finds_reordered_and_accented_names(list_path):
+    watchlist = Watchlist(list_path)
+
+    hits = watchlist.screen("Sidorov, Ivan")
+    assert hits[0]["id"] == "S1" and hits[0]["score"] >= 0.92
+    assert watchlist.screen("María González López")[0]["id"] == "P1"
+    assert watchlist.screen("Blackwater Trading Company")[0]["id"] == "S2"  # Legal forms are noise
+    assert watchlist.screen("Jane Smith") == []
+    assert watchlist.version == "test-1"
+    watchlist.close()
+
+
+def test_names_without_tokens_need_review(list_path):
+    agent = ScreeningAgent(watchlist=Watchlist(list_path))
+
+    result = agent.run({"owner_name": "Иван Сидоров", "business_name": "Acme Bakery"})
+
+    assert result["screening_status"] == "POTENTIAL_MATCH"
+    assert result["sanctions_check"] == result["pep_check"] == "potential_match"
+    assert result["unscreened_names"] == [{"screened_name": "Иван Сидоров", "screened_role": "owner"}]
+
+    clear = agent.run({"owner_name": "Jane Smith", "business_name": "Acme Bakery"})
+    assert clear["screening_status"] == "CLEAR" and clear["unscreened_names"] == []
+
+
+def test_replaced_file_closes_the_old_mapping(shared_list):
+    first = watchlist_module.get_watchlist()
+    assert watchlist_module.get_watchlist() is first
+
+    compile_watchlist(RECORDS[:1], shared_list, version="test-2")
+    os.utime(shared_list, ns=(1, 1))  # A distinct mtime even on coarse clocks
+
+    second = watchlist_module.get_watchlist()
+    assert second is not first and second.version == "test-2"
+    assert first._mmap.closed and not second._mmap.closed
+
+
+def test_retired_mapping_stays_open_for_screens_in_flight(shared_list):
+    with using_watchlist() as held:
+        compile_watchlist(RECORDS, shared_list, version="test-2")
+        os.utime(shared_list, ns=(1, 1))
+        assert watchlist_module.get_watchlist() is not held
+
+        assert held.screen("Ivan Sidorov")[0]["id"] == "S1"
+        assert not held._mmap.closed
+
+    assert held._mmap.closed
+    with pytest.raises(ValueError):
+        held.acquire()
+
+
+def test_no_configured_list_is_not_screened(monkeypatch):
+    monkeypatch.delenv("WATCHLIST_PATH", raising=False)
+
+    with using_watchlist() as watchlist:
+        assert watchlist is None
+    result = ScreeningAgent().run({"owner_name": "Ivan Sidorov", "identity": {"sanctions_check": "clear"}})
+    assert result["screening_status"] == "NOT_SCREENED" and result["sanctions_check"] == "clear"
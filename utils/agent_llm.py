@@ -0,0 +1,438 @@
+import os
+import re
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from utils.llm_cache import LLMCache, cached_completion, get_cache
+from utils.model_clients import agent_model, model_slot
+from utils.rate_limiter import ThrottledError, get_limiter
+from utils.deadlines import TIMEOUT_TEXT, bounded_call, current_deadline, latency_tracker
+
+# Background pool for deferred LLM narratives (created on first use)
+_executor = None
+_executor_lock = threading.Lock()
+
+# Prompt batch collecting narratives for a single consolidated request
+_active_batch = contextvars.ContextVar("active_prompt_batch", default=None)
+
+# Callback receiving narrative text chunks as the model streams them
+_token_sink = contextvars.ContextVar("llm_token_sink", default=None)
+
+# Set while previewing (what-if re-scores), where narratives are not requested
+_skip_narratives = contextvars.ContextVar("skip_llm_narratives", default=False)
+
+PENDING_TEXT = "LLM analysis pending..."
+SKIPPED_TEXT = "LLM analysis skipped (preview)"
+
+# Result fields quoted by the deterministic fallback narrative, in order
+FALLBACK_SCORES = [
+    ("verification_score", "Document verification score"),
+    ("compliance_score", "Compliance score"),
+    ("credit_score", "Credit score")
+]
+FALLBACK_LABELS = [
+    ("status", "Status"),
+    ("kyc_status", "KYC status"),
+    ("credit_decision", "Credit decision"),
+    ("decision", "Decision"),
+    ("recommended_action", "Recommended action"),
+    ("account_type", "Recommended account"),
+    ("risk_level", "Risk level"),
+    ("priority", "Priority")
+]
+FALLBACK_CONCERNS = ["risk_factors", "key_concerns", "missing_fields"]
+
+
+def agent_prompt(agent, prompt_text, on_token=None):
+    """
+    Run an agno agent on a prompt (through the shared LLM cache) and return the response text
+
+    With on_token, the response is streamed and each text chunk is passed to
+    on_token(text) as it arrives. Cached responses are returned whole.
+    """
+    return cached_completion(
+        model_name(agent),
+        str(getattr(agent, "instructions", "") or ""),
+        prompt_text,
+        lambda: _run_agent(agent, prompt_text, on_token),
+        agent=getattr(agent, "name", None),
+        streamed=on_token is not None
+    )
+
+
+def model_name(agent):
+    """Model identifier of an agno agent, whether configured as a string or a model object"""
+    model = getattr(agent, "model", None)
+    return str(getattr(model, "id", None) or model or "")
+
+
+def bounded_prompt(agent, prompt_text, deadline=None, on_token=None):
+    """
+    agent_prompt with p95 hedging, returning TIMEOUT_TEXT once the deadline passes
+
+    Streamed calls are not hedged, so a sink never receives two interleaved responses.
+    """
+    return bounded_call(
+        model_name(agent),
+        lambda: agent_prompt(agent, prompt_text, on_token),
+        deadline,
+        hedge=on_token is None
+    )
+
+
+def run_instance(agent):
+    """
+    Private copy of a configured agno agent for a single run
+
+    agno agents keep per-run state on the instance (run id, run response,
+    memory, session), so the stage agents' shared instances only serve as
+    templates: every call runs on a fresh copy with the same name and
+    instructions, whose model handle shares the process-wide client.
+    """
+    model = getattr(agent, "model", None)
+    model_id = getattr(model, "id", None)
+    return type(agent)(
+        name=getattr(agent, "name", None),
+        model=agent_model(model_id) if model_id else model,
+        instructions=getattr(agent, "instructions", None)
+    )
+
+
+def _run_agent(agent, prompt_text, on_token=None):
+    model = model_name(agent)
+
+    def call():
+        runner = run_instance(agent)
+        with model_slot(model):
+            started = time.perf_counter()
+            if on_token is None:
+                response = runner.run(prompt_text)
+            else:
+                response = _stream_agent(runner, prompt_text, on_token)
+            latency_tracker.record(model, time.perf_counter() - started)
+            return response
+
+    # Quota wait and throttling backoff happen outside the concurrency slot
+    response = get_limiter().call(call, prompt_text)
+    return str(response.content) if hasattr(response, 'content') else str(response)
+
+
+def _stream_agent(agent, prompt_text, on_token):
+    """Run an agno agent in streaming mode, forwarding content chunks; returns the full text"""
+    pieces = []
+    for chunk in agent.run(prompt_text, stream=True):
+        content = getattr(chunk, "content", None)
+        if isinstance(content, str) and content:
+            pieces.append(content)
+            on_token(content)
+    return "".join(pieces)
+
+
+@contextmanager
+def skip_narratives():
+    """Answer every analyze() call in this context with SKIPPED_TEXT, without calling the LLM"""
+    token = _skip_narratives.set(True)
+    try:
+        yield
+    finally:
+        _skip_narratives.reset(token)
+
+
+@contextmanager
+def stream_tokens(sink):
+    """
+    Stream the narratives requested in this context
+
+    Every analyze() call made in this context (including deferred ones, which
+    capture the sink when they are issued) passes its response text to
+    sink(text) chunk by chunk. Prompts collected into a PromptBatch are not streamed.
+    """
+    token = _token_sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _token_sink.reset(token)
+
+
+def analyze(agent, prompt_text, defer=False):
+    """
+    Produce an agent's llm_analysis
+
+    Args:
+        - agent: agno Agent used for the narrative
+        - prompt_text: Prompt built from the agent's deterministic results
+        - defer: When True, return immediately with a DeferredAnalysis handle
+          that resolves on the background pool
+
+    Inside collect_prompts() the prompt is queued on the active PromptBatch
+    instead and the handle resolves when the batch is flushed. Inside
+    stream_tokens() the response is streamed to the active sink, and inside
+    skip_narratives() no request is made at all.
+
+    A call that stays throttled after every retry yields an "unavailable"
+    narrative instead of failing the stage. Calls are bounded by the active
+    llm_deadline(); a call that misses it yields TIMEOUT_TEXT, which
+    attach_analysis() turns into a deterministic fallback narrative.
+
+    Returns:
+        - Response text, or a DeferredAnalysis when deferred or batched
+    """
+    if _skip_narratives.get():
+        return SKIPPED_TEXT
+    batch = _active_batch.get()
+    if batch is not None:
+        return batch.add(agent, prompt_text)
+    on_token = _token_sink.get()
+    if not defer:
+        try:
+            return bounded_prompt(agent, prompt_text, current_deadline(), on_token)
+        except ThrottledError as e:
+            return f"LLM analysis unavailable: {e}"
+    return DeferredAnalysis(_background_executor().submit(
+        contextvars.copy_context().run, bounded_prompt, agent, prompt_text, current_deadline(), on_token
+    ))
+
+
+def attach_analysis(result, key="llm_analysis"):
+    """
+    Attach a deferred narrative to the result dict that holds it
+
+    When the handle resolves, result[key] is replaced by the response text,
+    so whoever stored the dict sees the final narrative. A narrative that
+    missed its deadline is replaced by fallback_narrative(result) and the
+    result is marked with llm_degraded. Returns the same dict for convenience.
+    """
+    handle = result.get(key)
+    if isinstance(handle, DeferredAnalysis):
+        handle.add_done_callback(lambda text: _store_analysis(result, key, text))
+    elif getattr(handle, "degraded", False):
+        _store_analysis(result, key, handle)
+    return result
+
+
+def fallback_narrative(result):
+    """Deterministic stand-in for an llm_analysis, built from the result's own scores and risk factors"""
+    parts = [f"{label}: {result[field]}/100" for field, label in FALLBACK_SCORES if field in result]
+    parts += [f"{label}: {result[field]}" for field, label in FALLBACK_LABELS if result.get(field)]
+    sentences = ["; ".join(parts) + "."] if parts else []
+
+    for field in FALLBACK_CONCERNS:
+        concerns = result.get(field)
+        if concerns:
+            sentences.append("Key factors: " + "; ".join(str(item) for item in concerns[:3]) + ".")
+            break
+    else:
+        sentences.append("No significant risk factors identified.")
+
+    sentences.append("(Automated summary - detailed LLM analysis was not available in time.)")
+    return " ".join(sentences)
+
+
+def _store_analysis(result, key, text):
+    if getattr(text, "degraded", False):
+        result[key] = fallback_narrative(result)
+        result["llm_degraded"] = True
+    else:
+        result[key] = text
+
+
+def resolve_analyses(value, timeout=None):
+    """Wait for every DeferredAnalysis nested in a result and replace it with its text"""
+    if isinstance(value, DeferredAnalysis):
+        return value.result(timeout)
+    if isinstance(value, dict):
+        for key, item in list(value.items()):
+            if isinstance(item, DeferredAnalysis):
+                _store_analysis(value, key, item.result(timeout))
+            else:
+                value[key] = resolve_analyses(item, timeout)
+        return value
+    if isinstance(value, list):
+        return [resolve_analyses(item, timeout) for item in value]
+    return value
+
+
+class DeferredAnalysis:
+    """
+    Handle for an llm_analysis resolving in the background
+    Routing never reads the narrative, so scores and decisions can be returned
+    before the LLM round trip completes
+    """
+
+    def __init__(self, future):
+        self._future = future
+
+    def done(self):
+        return self._future.done()
+
+    def result(self, timeout=None):
+        """Block until the narrative is available and return it"""
+        try:
+            return self._future.result(timeout)
+        except TimeoutError:
+            raise
+        except Exception as e:
+            return f"LLM analysis unavailable: {e}"
+
+    def add_done_callback(self, fn):
+        """Call fn(text) once the narrative resolves (immediately if it already has)"""
+        self._future.add_done_callback(lambda future: fn(self.result()))
+
+    def __str__(self):
+        return self.result() if self.done() else PENDING_TEXT
+
+    __repr__ = __str__
+
+
+def _background_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("LLM_BACKGROUND_WORKERS", "8")),
+                thread_name_prefix="llm-analysis"
+            )
+        return _executor
+
+
+@contextmanager
+def collect_prompts():
+    """
+    Collect every agent prompt issued in this context into one PromptBatch
+
+    Work submitted to other threads must run in a copy of this context
+    (see utils.stage_scheduler) for its prompts to be collected.
+    """
+    batch = PromptBatch()
+    token = _active_batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _active_batch.reset(token)
+
+
+class PromptBatch:
+    """
+    Consolidated LLM Request
+    Gathers the prompt fragments of every stage and issues one structured
+    request with a section per agent, then splits the response back into
+    each agent's llm_analysis. Sections that are cached are answered from
+    the cache; sections missing from the response fall back to per-agent calls.
+    The llm_deadline() active when flushing bounds every request.
+    """
+
+    SECTION_PATTERN = re.compile(r"^#{2,}\s*\[?([A-Za-z0-9_]+)\]?\s*$", re.MULTILINE)
+
+    def __init__(self):
+        self._entries = []  # (section_id, agent, prompt_text, future)
+        self._lock = threading.Lock()
+
+    def add(self, agent, prompt_text):
+        """Queue a prompt and return the DeferredAnalysis that the flush resolves"""
+        future = Future()
+        with self._lock:
+            base = re.sub(r"[^A-Za-z0-9_]", "_", str(getattr(agent, "name", None) or "Agent"))
+            section_id = f"{base}_{len(self._entries) + 1}"
+            self._entries.append((section_id, agent, prompt_text, future))
+        return DeferredAnalysis(future)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def flush(self):
+        """
+        Resolve every queued prompt
+
+        Returns:
+            - Number of LLM requests issued (1 when consolidation succeeds)
+        """
+        with self._lock:
+            entries, self._entries = self._entries, []
+        deadline = current_deadline()
+
+        cache = get_cache()
+        pending = []
+        for entry in entries:
+            section_id, agent, prompt_text, future = entry
+            cached = cache.get(self._cache_key(agent, prompt_text)) if cache else None
+            if cached is not None:
+                future.set_result(cached)
+            else:
+                pending.append(entry)
+
+        if not pending:
+            return 0
+
+        requests = 0
+        sections = {}
+        throttled = None
+        timed_out = False
+        if len(pending) > 1:
+            try:
+                requests += 1
+                response = self._consolidated_call(pending, deadline)
+                timed_out = getattr(response, "degraded", False)
+                sections = {} if timed_out else self._split(response)
+            except ThrottledError as e:
+                throttled = e  # Per-agent fallbacks would only burn more quota
+            except Exception:
+                sections = {}
+
+        for section_id, agent, prompt_text, future in pending:
+            text = sections.get(section_id)
+            if text:
+                if cache:
+                    cache.set(self._cache_key(agent, prompt_text), text, model_name(agent))
+                future.set_result(text)
+                continue
+            if throttled is not None:
+                future.set_exception(throttled)
+                continue
+            if timed_out:
+                future.set_result(TIMEOUT_TEXT)
+                continue
+
+            # Fall back to a dedicated call for this agent
+            requests += 1
+            try:
+                future.set_result(bounded_prompt(agent, prompt_text, deadline))
+            except Exception as e:
+                future.set_exception(e)
+
+        return requests
+
+    def flush_async(self):
+        """Flush on the background pool; returns a Future of the request count"""
+        return _background_executor().submit(contextvars.copy_context().run, self.flush)
+
+    def _consolidated_call(self, entries, deadline=None):
+        from utils.gemini_llm import MODEL_NAME, gemini_prompt
+
+        parts = [
+            "You are answering on behalf of several banking specialists reviewing one business application.",
+            "Answer every section below in the role described for it.",
+            "Start each answer with a header line of exactly '### <SECTION_ID>' and nothing else on that line.",
+            ""
+        ]
+        for section_id, agent, prompt_text, _ in entries:
+            instructions = " ".join(str(getattr(agent, "instructions", "") or "").split())
+            parts.append(f"### {section_id}")
+            parts.append(f"Role: {instructions}")
+            parts.append(f"Task: {prompt_text}")
+            parts.append("")
+        prompt_text = "\n".join(parts)
+        return bounded_call(MODEL_NAME, lambda: gemini_prompt(prompt_text), deadline)
+
+    def _split(self, response_text):
+        """Map section ids to the answer text that follows each header"""
+        sections = {}
+        matches = list(self.SECTION_PATTERN.finditer(response_text or ""))
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(response_text)
+            sections[match.group(1)] = response_text[match.end():end].strip()
+        return sections
+
+    def _cache_key(self, agent, prompt_text):
+        return LLMCache.make_key(model_name(agent), str(getattr(agent, "instructions", "") or ""), prompt_text)
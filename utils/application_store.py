@@ -0,0 +1,410 @@
+import os
+import json
+import atexit
+import time
+import base64
+import sqlite3
+import threading
+from datetime import datetime
+
+# Columns that list/count queries can filter on (all indexed)
+FILTER_COLUMNS = ["status", "industry", "decision"]
+
+
+class ApplicationStore:
+    """
+    Application Store Interface
+    Durable home for applications, their per-stage results and final
+    decisions. Backends implement these methods; callers obtain one through
+    get_store() and never depend on a concrete backend.
+    """
+
+    def save_application(self, app_data):
+        """Insert or update an application (its status and payload)"""
+        raise NotImplementedError
+
+    def save_stage_result(self, app_id, stage_name, result):
+        """Record the output of one pipeline stage"""
+        raise NotImplementedError
+
+    def save_outcome(self, app_data, results=None, halted_at=None, halt_reason=None, error=None):
+        """
+        Record the final results and decision of a pipeline run
+
+        results maps stage name -> stage result (a StageResults container);
+        the decision is the orchestrator stage's.
+        """
+        raise NotImplementedError
+
+    def get(self, app_id):
+        """
+        Load one application
+
+        Returns:
+            - Dict with application, results, stages, status, decision,
+              halted_at, halt_reason and error, or None if unknown
+        """
+        raise NotImplementedError
+
+    def list_applications(self, limit=50, cursor=None, submitted_after=None, submitted_before=None, **filters):
+        """
+        One page of application summaries, newest submission first
+
+        Args:
+            - limit: Page size
+            - cursor: next_cursor of the previous page
+            - submitted_after / submitted_before: "YYYY-MM-DD[ HH:MM:SS]" bounds
+            - filters: status, industry and/or decision equality filters
+
+        Returns:
+            - {"items": [...], "next_cursor": str or None}
+        """
+        raise NotImplementedError
+
+    def count(self, submitted_after=None, submitted_before=None, **filters):
+        raise NotImplementedError
+
+    def iter_applications(self, submitted_after=None):
+        """Yield the stored application dicts submitted since submitted_after, oldest first"""
+        raise NotImplementedError
+
+    def flush(self):
+        """Write out any buffered changes"""
+
+    def close(self):
+        self.flush()
+
+
+class SQLiteApplicationStore(ApplicationStore):
+    """
+    SQLite Application Store
+    WAL-mode database shared by every Streamlit session, service thread and
+    worker process on the host. Writes are buffered and committed in batches
+    by a background flusher (or by the next read from this process); each
+    reading thread has its own connection, so reads never wait on writes.
+    """
+
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS applications (
+            application_id TEXT PRIMARY KEY,
+            business_name TEXT,
+            industry TEXT,
+            status TEXT,
+            decision TEXT,
+            submitted_date TEXT NOT NULL,
+            processed_at TEXT,
+            halted_at TEXT,
+            halt_reason TEXT,
+            error TEXT,
+            application TEXT NOT NULL,
+            results TEXT,
+            updated_at REAL NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS stage_results (
+            application_id TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            result TEXT NOT NULL,
+            recorded_at REAL NOT NULL,
+            PRIMARY KEY (application_id, stage)
+        )
+        """,
+        # Filters are paired with submitted_date so filtered pages come straight off the index
+        "CREATE INDEX IF NOT EXISTS idx_applications_submitted ON applications (submitted_date, application_id)",
+        "CREATE INDEX IF NOT EXISTS idx_applications_status ON applications (status, submitted_date)",
+        "CREATE INDEX IF NOT EXISTS idx_applications_industry ON applications (industry, submitted_date)",
+        "CREATE INDEX IF NOT EXISTS idx_applications_decision ON applications (decision, submitted_date)"
+    ]
+
+    UPSERT_APPLICATION = """
+        INSERT INTO applications (application_id, business_name, industry, status, submitted_date,
+                                  processed_at, application, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (application_id) DO UPDATE SET
+            business_name = excluded.business_name,
+            industry = excluded.industry,
+            status = excluded.status,
+            submitted_date = excluded.submitted_date,
+            processed_at = excluded.processed_at,
+            application = excluded.application,
+            updated_at = excluded.updated_at
+    """
+
+    UPDATE_OUTCOME = """
+        UPDATE applications SET decision = ?, results = ?, halted_at = ?, halt_reason = ?, error = ?, updated_at = ?
+        WHERE application_id = ?
+    """
+
+    UPSERT_STAGE = """
+        INSERT INTO stage_results (application_id, stage, result, recorded_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (application_id, stage) DO UPDATE SET result = excluded.result, recorded_at = excluded.recorded_at
+    """
+
+    def __init__(self, path, batch_size=200, flush_interval=0.05):
+        """
+        Args:
+            - path: SQLite database file
+            - batch_size: Buffered writes that trigger an immediate flush
+            - flush_interval: Seconds between background flushes
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._pending = []  # (sql, params)
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = threading.Event()
+
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        for statement in self.SCHEMA:
+            self._writer.execute(statement)
+        self._writer.commit()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="application-store-flush", daemon=True)
+        self._flusher.start()
+
+    # ========================================
+    # Writes (buffered)
+    # ========================================
+
+    def save_application(self, app_data):
+        self._enqueue(self.UPSERT_APPLICATION, self._application_params(app_data))
+
+    def save_stage_result(self, app_id, stage_name, result):
+        self._enqueue(self.UPSERT_STAGE, (app_id, stage_name, _dumps(result), time.time()))
+
+    def save_outcome(self, app_data, results=None, halted_at=None, halt_reason=None, error=None):
+        results = results or {}
+        with self._pending_lock:
+            self._pending.append((self.UPSERT_APPLICATION, self._application_params(app_data)))
+            self._pending.append((self.UPDATE_OUTCOME, (
+                (results.get("orchestrator") or {}).get("decision"),
+                _dumps(results) if results else None,
+                halted_at,
+                halt_reason,
+                error,
+                time.time(),
+                app_data["application_id"]
+            )))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._write_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            if not batch or self._writer is None:
+                return
+            try:
+                with self._writer:  # One transaction per batch
+                    for sql, params in batch:
+                        self._writer.execute(sql, params)
+            except sqlite3.Error:
+                with self._pending_lock:
+                    self._pending[:0] = batch  # Keep the writes for the next attempt
+                raise
+
+    def close(self):
+        self._closed.set()
+        self.flush()
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    # ========================================
+    # Reads
+    # ========================================
+
+    def get(self, app_id):
+        self.flush()  # Read our own buffered writes
+        db = self._reader()
+        row = db.execute(
+            "SELECT application, results, status, decision, halted_at, halt_reason, error "
+            "FROM applications WHERE application_id = ?",
+            (app_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        stages = {
+            stage: json.loads(result)
+            for stage, result in db.execute(
+                "SELECT stage, result FROM stage_results WHERE application_id = ? ORDER BY recorded_at",
+                (app_id,)
+            )
+        }
+        return {
+            "application": json.loads(row[0]),
+            "results": json.loads(row[1]) if row[1] else None,
+            "stages": stages,
+            "status": row[2],
+            "decision": row[3],
+            "halted_at": row[4],
+            "halt_reason": row[5],
+            "error": row[6]
+        }
+
+    def list_applications(self, limit=50, cursor=None, submitted_after=None, submitted_before=None, **filters):
+        self.flush()
+        where, params = self._where(submitted_after, submitted_before, filters)
+        if cursor:
+            submitted_date, app_id = _decode_cursor(cursor)
+            where.append("(submitted_date, application_id) < (?, ?)")
+            params += [submitted_date, app_id]
+
+        sql = (
+            "SELECT application_id, business_name, industry, status, decision, submitted_date, processed_at "
+            "FROM applications"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY submitted_date DESC, application_id DESC LIMIT ?"
+        )
+        rows = self._reader().execute(sql, params + [limit + 1]).fetchall()
+
+        items = [
+            {
+                "application_id": row[0],
+                "business_name": row[1],
+                "industry": row[2],
+                "status": row[3],
+                "decision": row[4],
+                "submitted_date": row[5],
+                "processed_at": row[6]
+            }
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = _encode_cursor(last["submitted_date"], last["application_id"])
+        return {"items": items, "next_cursor": next_cursor}
+
+    def count(self, submitted_after=None, submitted_before=None, **filters):
+        self.flush()
+        where, params = self._where(submitted_after, submitted_before, filters)
+        sql = "SELECT COUNT(*) FROM applications" + (" WHERE " + " AND ".join(where) if where else "")
+        return self._reader().execute(sql, params).fetchone()[0]
+
+    def iter_applications(self, submitted_after=None):
+        self.flush()
+        where, params = self._where(submitted_after, None, {})
+        sql = (
+            "SELECT application FROM applications"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY submitted_date, application_id"
+        )
+        for (application,) in self._reader().execute(sql, params):
+            yield json.loads(application)
+
+    # ========================================
+    # Helpers
+    # ========================================
+
+    def _where(self, submitted_after, submitted_before, filters):
+        where, params = [], []
+        for column, value in filters.items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Cannot filter on '{column}'. Filterable: {', '.join(FILTER_COLUMNS)}")
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if submitted_after:
+            where.append("submitted_date >= ?")
+            params.append(submitted_after)
+        if submitted_before:
+            where.append("submitted_date < ?")
+            params.append(submitted_before)
+        return where, params
+
+    def _application_params(self, app_data):
+        return (
+            app_data["application_id"],
+            app_data.get("business_name"),
+            app_data.get("industry"),
+            app_data.get("status"),
+            app_data.get("submitted_date") or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            app_data.get("processed_at"),
+            _dumps(app_data),
+            time.time()
+        )
+
+    def _enqueue(self, sql, params):
+        with self._pending_lock:
+            self._pending.append((sql, params))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass  # The batch stays buffered and is retried on the next tick
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        db.execute("PRAGMA busy_timeout=30000")
+        return db
+
+    def _reader(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self._connect()
+        return db
+
+
+def _dumps(value):
+    return json.dumps(value, default=_encode, ensure_ascii=False)
+
+
+def _encode(value):
+    # Stage records serialise themselves (see agents.stage_results)
+    return value.to_dict() if hasattr(value, "to_dict") else str(value)
+
+
+def _encode_cursor(submitted_date, app_id):
+    return base64.urlsafe_b64encode(f"{submitted_date}\t{app_id}".encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    try:
+        submitted_date, app_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("\t", 1)
+    except (ValueError, UnicodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return submitted_date, app_id
+
+
+# Backend name -> factory(path); register additional backends here
+STORE_BACKENDS = {
+    "sqlite": SQLiteApplicationStore
+}
+
+# Process-wide store
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Return the shared application store configured from the environment
+
+    Environment:
+        - APPLICATION_STORE_BACKEND: Key of STORE_BACKENDS (default "sqlite")
+        - APPLICATION_STORE_PATH: Database location (default "applications.sqlite3")
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = os.getenv("APPLICATION_STORE_BACKEND", "sqlite")
+            if backend not in STORE_BACKENDS:
+                raise ValueError(f"Unknown application store backend '{backend}'. Available: {', '.join(STORE_BACKENDS)}")
+            _store = STORE_BACKENDS[backend](os.getenv("APPLICATION_STORE_PATH", "applications.sqlite3"))
+            atexit.register(_store.close)
+        return _store
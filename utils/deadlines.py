@@ -0,0 +1,166 @@
+import os
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Absolute time.monotonic() deadline for LLM calls made in this context
+_deadline = contextvars.ContextVar("llm_deadline", default=None)
+
+# Pool running bounded LLM calls (and their hedged duplicates)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class DegradedText(str):
+    """Placeholder narrative returned when an LLM call misses its deadline"""
+
+    degraded = True
+
+
+TIMEOUT_TEXT = DegradedText("LLM analysis timed out")
+
+
+@contextmanager
+def llm_deadline(seconds):
+    """
+    Bound every LLM call made in this context to the next `seconds`
+
+    Nested budgets never extend an outer one; None or a non-positive
+    budget leaves the current deadline unchanged.
+    """
+    current = _deadline.get()
+    if seconds is None or seconds <= 0:
+        yield current
+        return
+
+    deadline = time.monotonic() + seconds
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline():
+    return _deadline.get()
+
+
+def budget_from_env(name, default):
+    """Read a latency budget in seconds (0 or negative disables it)"""
+    value = float(os.getenv(name, str(default)))
+    return value if value > 0 else None
+
+
+class LatencyTracker:
+    """
+    Rolling LLM Latency Window
+    Keeps the most recent call latencies per model to find the point at
+    which a still-pending request is worth hedging
+    """
+
+    def __init__(self, window=512, min_samples=20, percentile=0.95):
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self._samples = {}
+        self._lock = threading.Lock()
+
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def record(self, model, seconds):
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = self._samples[model] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def increment(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def hedge_after(self, model):
+        """Seconds after which a pending call is hedged (None until enough samples exist)"""
+        with self._lock:
+            samples = self._samples.get(model)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[int(self.percentile * (len(ordered) - 1))]
+
+    def stats(self):
+        with self._lock:
+            models = list(self._samples)
+            counters = {"hedges": self.hedges, "hedge_wins": self.hedge_wins, "timeouts": self.timeouts}
+        counters["hedge_after_seconds"] = {model: self.hedge_after(model) for model in models}
+        return counters
+
+
+latency_tracker = LatencyTracker(
+    window=int(os.getenv("LLM_LATENCY_WINDOW", "512")),
+    min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+)
+
+
+def bounded_call(model, fn, deadline=None, hedge=True):
+    """
+    Run fn() for an LLM request with hedging and a deadline
+
+    A duplicate request is sent if the first one is still pending at the
+    model's p95 latency; the first successful answer wins. When the deadline
+    passes first, TIMEOUT_TEXT is returned and the calls are abandoned
+    (a late answer still reaches the LLM cache). Each request runs in a
+    copy of the caller's context, so its spans join the caller's trace.
+
+    Raises:
+        - The first request's error when every request fails
+    """
+    executor = _call_executor()
+    started = time.monotonic()
+    hedge_after = latency_tracker.hedge_after(model) if hedge else None
+    attempts = [executor.submit(contextvars.copy_context().run, fn)]
+
+    while True:
+        for future in attempts:
+            if future.done() and future.exception() is None:
+                if future is not attempts[0]:
+                    latency_tracker.increment("hedge_wins")
+                return future.result()
+
+        pending = [future for future in attempts if not future.done()]
+        can_hedge = hedge_after is not None and len(attempts) == 1
+        if not pending and not can_hedge:
+            return attempts[0].result()
+
+        now = time.monotonic()
+        if deadline is not None and now >= deadline:
+            latency_tracker.increment("timeouts")
+            return TIMEOUT_TEXT
+
+        if can_hedge and (now - started >= hedge_after or not pending):
+            attempts.append(executor.submit(contextvars.copy_context().run, fn))
+            latency_tracker.increment("hedges")
+            continue
+
+        wake = deadline
+        if can_hedge:
+            hedge_at = started + hedge_after
+            wake = hedge_at if wake is None else min(wake, hedge_at)
+        wait(pending, timeout=None if wake is None else max(0.0, wake - now), return_when=FIRST_COMPLETED)
+
+
+def _call_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("LLM_CALL_WORKERS", "32")),
+                thread_name_prefix="llm-call"
+            )
+        return _executor
@@ -1,12 +1,20 @@
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+import time
+from utils.llm_cache import cached_completion
+from utils.model_clients import DEFAULT_MODEL, REQUEST_TIMEOUT, pooled_model
+from utils.rate_limiter import get_limiter
+from utils.deadlines import latency_tracker
 
-load_dotenv()
-
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+MODEL_NAME = DEFAULT_MODEL
 
 def gemini_prompt(prompt_text):
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content(prompt_text)
-    return response.text
\ No newline at end of file
+    return cached_completion(MODEL_NAME, "", prompt_text, lambda: _generate(prompt_text), agent="consolidated")
+
+def _generate(prompt_text):
+    def call():
+        with pooled_model(MODEL_NAME) as model:
+            started = time.perf_counter()
+            response = model.generate_content(prompt_text, request_options={"timeout": REQUEST_TIMEOUT})
+            latency_tracker.record(MODEL_NAME, time.perf_counter() - started)
+            return response
+
+    return get_limiter().call(call, prompt_text).text
\ No newline at end of file
@@ -0,0 +1,229 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from utils.tracing import span
+
+
+class LLMCache:
+    """
+    Two-Tier LLM Response Cache
+    In-memory LRU in front of a SQLite-backed store, keyed by model name,
+    instructions and prompt hash. Agent prompts are built from a handful of
+    categorical fields, so identical prompts are common across applications.
+    """
+
+    def __init__(self, path=None, memory_entries=1024, max_entries=100000, ttl_seconds=86400):
+        """
+        Args:
+            - path: SQLite file for the persistent tier (None = memory only)
+            - memory_entries: Maximum entries held in the in-memory LRU
+            - max_entries: Maximum entries kept in the SQLite tier
+            - ttl_seconds: Entry lifetime in both tiers (0 = never expire)
+        """
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory = OrderedDict()  # key -> (response, created_at)
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes_since_prune = 0
+
+        # Counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.miss_seconds = 0.0
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache (created_at)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model, instructions, prompt_text):
+        """Stable cache key for a (model, instructions, prompt) triple"""
+        digest = hashlib.sha256()
+        for part in (model or "", instructions or "", prompt_text or ""):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached response or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[0]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[1], now):
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key, response, model=""):
+        """Store a response in both tiers"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at) VALUES (?, ?, ?, ?)",
+                    (key, model, response, now)
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= 100:
+                    self._prune(now)
+                self._db.commit()
+
+    def get_or_compute(self, model, instructions, prompt_text, compute):
+        """
+        Return the cached response for the prompt, calling compute() on a miss
+
+        Failed calls raise and are never cached.
+        """
+        key = self.make_key(model, instructions, prompt_text)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        response = compute()
+        with self._lock:
+            self.miss_seconds += time.perf_counter() - started
+
+        self.set(key, response, model)
+        return response
+
+    def stats(self):
+        """Hit/miss counters and estimated LLM time saved"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            avg_miss = self.miss_seconds / self.misses if self.misses else 0.0
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "avg_llm_seconds": round(avg_miss, 4),
+                "estimated_seconds_saved": round(hits * avg_miss, 2),
+                "llm_calls_saved": hits
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+    def _expired(self, created_at, now):
+        return bool(self.ttl_seconds) and now - created_at > self.ttl_seconds
+
+    def _remember(self, key, response, created_at):
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _prune(self, now):
+        """Drop expired rows and the oldest rows beyond max_entries"""
+        self._writes_since_prune = 0
+        if self.ttl_seconds:
+            self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._db.execute("""
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+
+# Process-wide cache shared by every agent
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Return the shared LLM cache configured from the environment, or None when disabled
+
+    Environment:
+        - LLM_CACHE_ENABLED: "0" disables caching (default "1")
+        - LLM_CACHE_PATH: SQLite file ("" = memory only, default ".llm_cache.sqlite3")
+        - LLM_CACHE_MEMORY_ENTRIES: In-memory LRU size (default 1024)
+        - LLM_CACHE_MAX_ENTRIES: SQLite tier size limit (default 100000)
+        - LLM_CACHE_TTL_SECONDS: Entry lifetime (default 86400, 0 = no expiry)
+    """
+    global _cache
+    if os.getenv("LLM_CACHE_ENABLED", "1") == "0":
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(
+                path=os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite3") or None,
+                memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024")),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000")),
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+            )
+        return _cache
+
+
+def cached_completion(model, instructions, prompt_text, compute, **attributes):
+    """
+    Run compute() through the shared cache (directly when caching is disabled)
+
+    The call is traced as an llm.prompt span carrying its cache status
+    (hit/miss/disabled), prompt and response sizes and any extra attributes.
+    """
+    with span("llm.prompt", model=model, prompt_chars=len(prompt_text), **attributes) as llm_span:
+        cache = get_cache()
+        if cache is None:
+            llm_span.set("cache", "disabled")
+            response = compute()
+        else:
+            llm_span.set("cache", "hit")
+
+            def traced_compute():
+                llm_span.set("cache", "miss")
+                return compute()
+
+            response = cache.get_or_compute(model, instructions, prompt_text, traced_compute)
+        llm_span.set("response_chars", len(response or ""))
+        return response
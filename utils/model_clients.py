@@ -0,0 +1,155 @@
+import os
+import threading
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+from utils.deadlines import budget_from_env
+
+load_dotenv()
+
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+
+# Gemini-compatible endpoint replacing Google's (e.g. http://127.0.0.1:8090 for mock_gemini_server.py)
+BASE_URL = os.getenv("GEMINI_BASE_URL") or None
+
+# Transport timeout of one request, in seconds. A call abandoned at its deadline
+# holds its worker and concurrency slot until the request itself ends, so it must
+# end: by default no later than a stage's LLM budget.
+REQUEST_TIMEOUT = (
+    budget_from_env("GEMINI_REQUEST_TIMEOUT_SECONDS", 0)
+    or budget_from_env("PIPELINE_STAGE_BUDGET_SECONDS", 20)
+    or 60.0
+)
+
+_lock = threading.Lock()
+_agent_models = {}        # model id -> number of agent model handles issued
+_genai_client = None      # shared google-genai client behind every agent model
+_model_pools = {}         # model id -> idle google.generativeai GenerativeModel instances
+_limits = {}              # model id -> concurrency cap
+_semaphores = {}          # model id -> BoundedSemaphore enforcing the cap
+_genai_configured = False
+
+
+def agent_model(model_id=None):
+    """
+    Model handle for an agno agent
+
+    Each agent gets its own lightweight model object, but all of them share
+    one long-lived google-genai client (and its keep-alive connections)
+    instead of each building their own on first use. With GEMINI_BASE_URL
+    set, the client talks to that endpoint instead of Google's. Requests
+    time out after REQUEST_TIMEOUT.
+    """
+    from agno.models.google import Gemini
+
+    model_id = model_id or DEFAULT_MODEL
+    with _lock:
+        _agent_models[model_id] = _agent_models.get(model_id, 0) + 1
+    return Gemini(id=model_id, client=genai_client())
+
+
+def genai_client():
+    """Process-wide google-genai client used by every agent model"""
+    global _genai_client
+    if _genai_client is not None:
+        return _genai_client
+
+    with _lock:
+        if _genai_client is None:
+            from google import genai as google_genai
+            from google.genai import types
+            options = {"timeout": int(REQUEST_TIMEOUT * 1000)}  # Milliseconds
+            if BASE_URL:
+                options["base_url"] = BASE_URL
+            _genai_client = google_genai.Client(api_key=_api_key(), http_options=types.HttpOptions(**options))
+        return _genai_client
+
+
+def _api_key():
+    # A stand-in endpoint accepts any key, so none needs to be configured for it
+    return os.getenv("GEMINI_API_KEY") or ("local-stand-in" if BASE_URL else None)
+
+
+def set_concurrency(model_id, limit):
+    """Cap the number of in-flight requests for a model (takes effect for new requests)"""
+    with _lock:
+        _limits[model_id] = limit
+        _semaphores[model_id] = threading.BoundedSemaphore(limit)
+
+
+@contextmanager
+def model_slot(model_id):
+    """Hold one of the model's concurrency slots for the duration of a request"""
+    semaphore = _semaphore(model_id or DEFAULT_MODEL)
+    semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+@contextmanager
+def pooled_model(model_id=None):
+    """
+    Borrow a long-lived google.generativeai GenerativeModel
+
+    Instances are returned to the pool after use instead of being rebuilt
+    per call; the number borrowed at once is bounded by the model's
+    concurrency cap.
+    """
+    model_id = model_id or DEFAULT_MODEL
+    with model_slot(model_id):
+        with _lock:
+            idle = _model_pools.setdefault(model_id, [])
+            model = idle.pop() if idle else None
+
+        if model is None:
+            model = _new_generative_model(model_id)
+
+        try:
+            yield model
+        finally:
+            with _lock:
+                _model_pools[model_id].append(model)
+
+
+def pool_stats():
+    """Per-model cap and idle pooled clients"""
+    with _lock:
+        model_ids = set(_limits) | set(_model_pools) | set(_agent_models)
+        return {
+            model_id: {
+                "max_concurrency": _limits.get(model_id, DEFAULT_MAX_CONCURRENCY),
+                "idle_clients": len(_model_pools.get(model_id, [])),
+                "agent_models": _agent_models.get(model_id, 0)
+            }
+            for model_id in sorted(model_ids)
+        }
+
+
+def _semaphore(model_id):
+    semaphore = _semaphores.get(model_id)
+    if semaphore is None:
+        with _lock:
+            semaphore = _semaphores.get(model_id)
+            if semaphore is None:
+                limit = _limits.setdefault(model_id, DEFAULT_MAX_CONCURRENCY)
+                semaphore = threading.BoundedSemaphore(limit)
+                _semaphores[model_id] = semaphore
+    return semaphore
+
+
+def _new_generative_model(model_id):
+    global _genai_configured
+    import google.generativeai as genai
+
+    with _lock:
+        if not _genai_configured:
+            if BASE_URL:
+                genai.configure(api_key=_api_key(), transport="rest", client_options={"api_endpoint": BASE_URL})
+            else:
+                genai.configure(api_key=_api_key())
+            _genai_configured = True
+    return genai.GenerativeModel(model_id)
@@ -0,0 +1,181 @@
+import os
+import re
+import time
+import random
+import threading
+
+# Expected completion size of a "2 to 3 lines" narrative, used to meter tokens up front
+DEFAULT_COMPLETION_TOKENS = 150
+
+# Throttling in an error's text, for clients that raise bare exceptions. 429 must
+# stand alone, so request ids, ports or byte counts containing it do not match
+THROTTLING_MESSAGE = re.compile(
+    r"\b429\b|too many requests|resource[_ ]exhausted|rate limit|quota exceeded", re.IGNORECASE
+)
+
+
+class ThrottledError(RuntimeError):
+    """Raised when an LLM call is still throttled after every retry"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute"""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.refill_per_second = rate_per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount):
+        """
+        Take amount tokens, going into debt if necessary
+
+        Returns:
+            - Seconds the caller must wait before using the reservation
+        """
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.refill_per_second
+
+
+class QuotaLimiter:
+    """
+    Quota-Aware LLM Limiter
+    Meters requests and tokens per minute for every LLM call in the process
+    and retries throttled calls with exponential backoff and full jitter.
+    Limits of 0 disable the corresponding bucket.
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_retries=5,
+                 base_delay=1.0, max_delay=30.0, completion_tokens=DEFAULT_COMPLETION_TOKENS):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.completion_tokens = completion_tokens
+
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+        # Metrics
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+        self.wait_seconds = 0.0
+        self.backoff_seconds = 0.0
+
+    def call(self, fn, prompt_text=""):
+        """
+        Run fn() within the quota, retrying throttling errors
+
+        Raises:
+            - ThrottledError when the call is still throttled after max_retries
+            - Any non-throttling error raised by fn
+        """
+        attempt = 0
+        while True:
+            self._wait_for_quota(prompt_text)
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_throttling_error(e):
+                    raise
+                with self._lock:
+                    self.throttled += 1
+                if attempt >= self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise ThrottledError(f"LLM call throttled after {attempt + 1} attempts: {e}") from e
+
+                delay = self._random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                with self._lock:
+                    self.retries += 1
+                    self.backoff_seconds += delay
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            with self._lock:
+                self.requests += 1
+            return result
+
+    def estimate_tokens(self, prompt_text):
+        return len(prompt_text or "") // 4 + self.completion_tokens
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "failures": self.failures,
+                "quota_wait_seconds": round(self.wait_seconds, 3),
+                "backoff_seconds": round(self.backoff_seconds, 3),
+                "requests_per_minute": self.request_bucket.capacity if self.request_bucket else None,
+                "tokens_per_minute": self.token_bucket.capacity if self.token_bucket else None
+            }
+
+    def _wait_for_quota(self, prompt_text):
+        delay = 0.0
+        if self.request_bucket:
+            delay = max(delay, self.request_bucket.reserve(1))
+        if self.token_bucket:
+            delay = max(delay, self.token_bucket.reserve(self.estimate_tokens(prompt_text)))
+        if delay > 0:
+            with self._lock:
+                self.wait_seconds += delay
+            time.sleep(delay)
+
+
+def is_throttling_error(error):
+    """True for HTTP 429 / RESOURCE_EXHAUSTED style errors from any Gemini client"""
+    for attribute in ("code", "status_code", "status"):
+        value = getattr(error, attribute, None)
+        value = value() if callable(value) else value
+        if value == 429 or str(value) in ("429", "RESOURCE_EXHAUSTED", "StatusCode.RESOURCE_EXHAUSTED"):
+            return True
+
+    if type(error).__name__ in ("ResourceExhausted", "TooManyRequests", "RateLimitError"):
+        return True
+
+    return THROTTLING_MESSAGE.search(str(error)) is not None
+
+
+# Process-wide limiter shared by every agent
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """
+    Return the shared limiter configured from the environment
+
+    Environment:
+        - GEMINI_RPM: Requests per minute across the deployment (0 = unmetered)
+        - GEMINI_TPM: Tokens per minute across the deployment (0 = unmetered)
+        - LLM_QUOTA_SHARE: Fraction of the quota owned by this process (default 1)
+        - LLM_MAX_RETRIES: Retries for throttled calls (default 5)
+        - LLM_RETRY_BASE_DELAY / LLM_RETRY_MAX_DELAY: Backoff bounds in seconds
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            share = float(os.getenv("LLM_QUOTA_SHARE", "1"))
+            _limiter = QuotaLimiter(
+                requests_per_minute=float(os.getenv("GEMINI_RPM", "0")) * share,
+                tokens_per_minute=float(os.getenv("GEMINI_TPM", "0")) * share,
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", "5")),
+                base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0")),
+                max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "30.0"))
+            )
+        return _limiter
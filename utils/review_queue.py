@@ -0,0 +1,274 @@
+import os
+import re
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from datetime import datetime
+
+# Review SLA per HumanReviewAgent priority level, used when the priority text
+# does not state one ("Review within 24 hours")
+PRIORITY_SLA_HOURS = {
+    "HIGH": 4,
+    "MEDIUM": 24,
+    "STANDARD": 48
+}
+SLA_PATTERN = re.compile(r"within\s+(\d+(?:\.\d+)?)\s*hours?", re.IGNORECASE)
+
+DEFAULT_LEASE_SECONDS = 15 * 60
+
+
+def priority_level(priority):
+    """HIGH / MEDIUM / STANDARD out of a HumanReviewAgent priority string"""
+    text = str(priority or "").upper()
+    for level in PRIORITY_SLA_HOURS:
+        if level in text:
+            return level
+    return "STANDARD"
+
+
+def sla_seconds(priority):
+    """Review SLA for a priority string, in seconds"""
+    match = SLA_PATTERN.search(str(priority or ""))
+    hours = float(match.group(1)) if match else PRIORITY_SLA_HOURS[priority_level(priority)]
+    return hours * 3600
+
+
+class ReviewQueue:
+    """
+    Shared HITL Review Queue
+    One durable backlog for every reviewer, session and process, kept in a
+    WAL-mode SQLite table. Cases are ordered by their SLA deadline
+    (queued_at + SLA of their priority), earliest first: a fresh high
+    priority case jumps ahead of recent standard ones, while a standard case
+    ages upward as its own deadline approaches and is never starved.
+
+    The next case comes off the due_at index in O(log n). Reviewers claim a
+    case under a lease; until it expires (or is released) nobody else can
+    claim it, and a reviewer who walks away loses it automatically.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS review_queue (
+                application_id TEXT PRIMARY KEY,
+                priority TEXT NOT NULL,
+                level TEXT NOT NULL,
+                queued_at REAL NOT NULL,
+                due_at REAL NOT NULL,
+                lease_owner TEXT,
+                lease_expires REAL NOT NULL DEFAULT 0,
+                payload TEXT NOT NULL
+            )
+        """)
+        db.execute("CREATE INDEX IF NOT EXISTS idx_review_queue_due ON review_queue (due_at)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_review_queue_owner ON review_queue (lease_owner)")
+
+    def enqueue(self, app_id, application, results, review_data, queued_at=None):
+        """
+        Add (or re-queue) a case
+
+        Args:
+            - app_id: Application id
+            - application / results / review_data: Case payload shown to reviewers
+            - queued_at: Epoch seconds the case entered review (default now)
+        """
+        queued_at = queued_at or time.time()
+        priority = review_data.get("priority", "")
+        payload = _payload(application, results, review_data)
+        self._db().execute("""
+            INSERT INTO review_queue (application_id, priority, level, queued_at, due_at, lease_owner, lease_expires, payload)
+            VALUES (?, ?, ?, ?, ?, NULL, 0, ?)
+            ON CONFLICT (application_id) DO UPDATE SET
+                priority = excluded.priority,
+                level = excluded.level,
+                queued_at = excluded.queued_at,
+                due_at = excluded.due_at,
+                lease_owner = NULL,
+                lease_expires = 0,
+                payload = excluded.payload
+        """, (app_id, priority, priority_level(priority), queued_at, queued_at + sla_seconds(priority), payload))
+
+    def claim(self, reviewer, lease_seconds=DEFAULT_LEASE_SECONDS, app_id=None):
+        """
+        Lease the most urgent unclaimed case (or a specific one)
+
+        A reviewer that already holds a lease gets that case back (with the
+        lease renewed) instead of a second one.
+
+        Returns:
+            - Case dict, or None when nothing is available
+        """
+        db = self._db()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")  # Serialises claims across processes
+        try:
+            row = db.execute(
+                "SELECT application_id FROM review_queue WHERE lease_owner = ? AND lease_expires >= ? LIMIT 1",
+                (reviewer, now)
+            ).fetchone()
+            if row is None and app_id is not None:
+                row = db.execute(
+                    "SELECT application_id FROM review_queue WHERE application_id = ? "
+                    "AND (lease_expires < ? OR lease_owner = ?)",
+                    (app_id, now, reviewer)
+                ).fetchone()
+            elif row is None:
+                row = db.execute(
+                    "SELECT application_id FROM review_queue WHERE lease_expires < ? ORDER BY due_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+
+            if row is None:
+                db.execute("COMMIT")
+                return None
+
+            db.execute(
+                "UPDATE review_queue SET lease_owner = ?, lease_expires = ? WHERE application_id = ?",
+                (reviewer, now + lease_seconds, row[0])
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return self.get(row[0])
+
+    def renew(self, app_id, reviewer, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Extend a lease the reviewer still holds; returns False if it was lost"""
+        cursor = self._db().execute(
+            "UPDATE review_queue SET lease_expires = ? WHERE application_id = ? AND lease_owner = ? AND lease_expires >= ?",
+            (time.time() + lease_seconds, app_id, reviewer, time.time())
+        )
+        return cursor.rowcount == 1
+
+    def release(self, app_id, reviewer):
+        """Give a case back to the queue without deciding it"""
+        cursor = self._db().execute(
+            "UPDATE review_queue SET lease_owner = NULL, lease_expires = 0 WHERE application_id = ? AND lease_owner = ?",
+            (app_id, reviewer)
+        )
+        return cursor.rowcount == 1
+
+    def update(self, app_id, reviewer, application, results, review_data):
+        """
+        Replace the payload of a leased case (e.g. after a committed what-if)
+
+        The case keeps its place, SLA deadline and lease. Only the current
+        lease holder may update it; returns False if the lease was lost.
+        """
+        payload = _payload(application, results, review_data)
+        cursor = self._db().execute(
+            "UPDATE review_queue SET payload = ? WHERE application_id = ? AND lease_owner = ? AND lease_expires >= ?",
+            (payload, app_id, reviewer, time.time())
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, app_id, reviewer):
+        """Remove a decided case; only the current lease holder may do so"""
+        cursor = self._db().execute(
+            "DELETE FROM review_queue WHERE application_id = ? AND lease_owner = ? AND lease_expires >= ?",
+            (app_id, reviewer, time.time())
+        )
+        return cursor.rowcount == 1
+
+    def get(self, app_id):
+        row = self._db().execute(
+            "SELECT application_id, priority, level, queued_at, due_at, lease_owner, lease_expires, payload "
+            "FROM review_queue WHERE application_id = ?",
+            (app_id,)
+        ).fetchone()
+        return self._case(row, include_payload=True) if row else None
+
+    def list_cases(self, limit=50, offset=0):
+        """Cases in review order (payload omitted), for queue overviews"""
+        rows = self._db().execute(
+            "SELECT application_id, priority, level, queued_at, due_at, lease_owner, lease_expires, NULL "
+            "FROM review_queue ORDER BY due_at LIMIT ? OFFSET ?",
+            (limit, offset)
+        ).fetchall()
+        return [self._case(row) for row in rows]
+
+    def stats(self):
+        now = time.time()
+        db = self._db()
+        total, overdue, claimed = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(due_at < ?), 0), COALESCE(SUM(lease_expires >= ?), 0) FROM review_queue",
+            (now, now)
+        ).fetchone()
+        by_level = dict(db.execute("SELECT level, COUNT(*) FROM review_queue GROUP BY level").fetchall())
+        return {"total": total, "overdue": overdue, "claimed": claimed, "by_level": by_level}
+
+    def __len__(self):
+        return self._db().execute("SELECT COUNT(*) FROM review_queue").fetchone()[0]
+
+    def close(self):
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    def _case(self, row, include_payload=False):
+        now = time.time()
+        case = {
+            "application_id": row[0],
+            "priority": row[1],
+            "level": row[2],
+            "queued_at": _timestamp(row[3]),
+            "due_at": _timestamp(row[4]),
+            "overdue": row[4] < now,
+            "lease_owner": row[5] if row[6] >= now else None,
+            "lease_expires": _timestamp(row[6]) if row[6] >= now else None
+        }
+        if include_payload:
+            case.update(json.loads(row[7]))
+        return case
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # Autocommit; claim() opens its own write transaction
+            db = self._local.db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA busy_timeout=30000")
+        return db
+
+
+def _timestamp(epoch):
+    return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _payload(application, results, review_data):
+    return json.dumps(
+        {"application": application, "results": results, "review_data": review_data},
+        default=_encode, ensure_ascii=False
+    )
+
+
+def _encode(value):
+    # Stage records serialise themselves (see agents.stage_results)
+    return value.to_dict() if hasattr(value, "to_dict") else str(value)
+
+
+# Process-wide queue
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_review_queue():
+    """
+    Return the shared review queue
+
+    Environment:
+        - HITL_QUEUE_PATH: SQLite file (default "hitl_queue.sqlite3")
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ReviewQueue(os.getenv("HITL_QUEUE_PATH", "hitl_queue.sqlite3"))
+            atexit.register(_queue.close)
+        return _queue
@@ -0,0 +1,284 @@
+import json
+import math
+import random
+from datetime import datetime, timedelta
+
+# Choices offered by the New Application form
+INDUSTRIES = [
+    "SaaS", "E-commerce", "Restaurant", "Manufacturing",
+    "Consulting", "Healthcare", "Construction", "Retail",
+    "Crypto", "Gambling", "Other"
+]
+BUSINESS_AGES = ["Less than 1 year", "1-2 years", "3-5 years", "5+ years"]
+DOCUMENTS = ["tax_id", "license", "bank_statement", "financial_statement"]
+
+# Revenue band label -> annual revenue the form records for it
+REVENUE_VALUES = {
+    "Under $100K": 50000,
+    "$100K-$500K": 300000,
+    "$500K-$1M": 750000,
+    "$1M-$5M": 2500000,
+    "$5M-$10M": 7500000,
+    "Over $10M": 15000000
+}
+
+# Revenue band label -> (low, high) range generated applications draw from
+REVENUE_RANGES = {
+    "Under $100K": (20000, 100000),
+    "$100K-$500K": (100000, 500000),
+    "$500K-$1M": (500000, 1000000),
+    "$1M-$5M": (1000000, 5000000),
+    "$5M-$10M": (5000000, 10000000),
+    "Over $10M": (10000000, 50000000)
+}
+
+
+def demo_application():
+    """
+    The "StableTech Solutions" demo application
+
+    Same shape as the applications built by the New Application form. Used
+    by the Agent Demo page when nothing was submitted and by the benchmarks.
+    Returns a fresh dict on every call.
+    """
+    return {
+        "application_id": "APP-DEMO-001",
+        "business_name": "StableTech Solutions",
+        "industry": "Healthcare",
+        "revenue": "$5M-$10M",
+        "employees": 25,
+        "owner_name": "Dr. Sarah Johnson",
+        "owner_email": "sarah@stabletech.com",
+        "owner_ssn": "1234",
+        "business_age": "5+ years",
+        "documents": {
+            "tax_id": True,
+            "license": True,
+            "bank_statement": True,
+            "financial_statement": True
+        },
+        "business_profile": {
+            "avg_transaction": 15000,
+            "monthly_volume": 200,
+            "international": False,
+            "high_risk_countries": False
+        },
+        "identity": {
+            "id_verified": True,
+            "pep_check": "clear",
+            "sanctions_check": "clear",
+            "adverse_media": False
+        },
+        "financials": {
+            "revenue": 8000000,
+            "debt": 50000,
+            "cash_flow_positive": True,
+            "debt_to_income": 0.15
+        },
+        "submitted_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "status": "PENDING"
+    }
+
+
+# Default distributions of generated applications; weights need not sum to 1
+DEFAULT_DISTRIBUTIONS = {
+    "industries": {
+        "SaaS": 14, "E-commerce": 14, "Restaurant": 12, "Manufacturing": 9,
+        "Consulting": 12, "Healthcare": 9, "Construction": 9, "Retail": 12,
+        "Crypto": 3, "Gambling": 1, "Other": 5
+    },
+    "revenue_bands": {
+        "Under $100K": 20, "$100K-$500K": 30, "$500K-$1M": 20,
+        "$1M-$5M": 18, "$5M-$10M": 7, "Over $10M": 5
+    },
+    "business_ages": {"Less than 1 year": 20, "1-2 years": 25, "3-5 years": 25, "5+ years": 30},
+    # Probability that each document is provided
+    "documents": {"tax_id": 0.97, "license": 0.93, "bank_statement": 0.9, "financial_statement": 0.82},
+    # Probability of each identity/AML flag
+    "aml": {
+        "id_verified": 0.98,
+        "pep_flagged": 0.01,
+        "sanctions_flagged": 0.002,
+        "adverse_media": 0.03,
+        "international": 0.2,
+        "high_risk_countries": 0.03
+    },
+    "financials": {
+        "revenue_per_employee": 60000,     # Median, lognormal
+        "debt_to_income_mean": 0.35,       # Beta distributed (0-1)
+        "cash_flow_positive": 0.8,
+        "cash_flow_positive_new": 0.55     # For businesses under a year old
+    },
+    "activity": {
+        "avg_transaction": 2500,           # Median, lognormal
+        "monthly_volume": 150              # Median, lognormal
+    },
+    # Share of applications re-submitted by a recent applicant (same owner and business)
+    "resubmission_rate": 0.01,
+    # Mean submissions per hour; submitted_date follows a Poisson arrival process
+    "arrivals_per_hour": 120
+}
+
+FIRST_NAMES = [
+    "Sarah", "James", "Priya", "Michael", "Aisha", "David", "Mei", "Carlos", "Fatima", "Robert",
+    "Elena", "Kwame", "Laura", "Arjun", "Olivia", "Hiroshi", "Grace", "Mohammed", "Sofia", "Daniel",
+    "Chloe", "Ravi", "Isabel", "Thomas", "Nadia", "Samuel", "Hannah", "Luis", "Amara", "Peter"
+]
+LAST_NAMES = [
+    "Johnson", "Patel", "Garcia", "Chen", "Okafor", "Smith", "Nguyen", "Rossi", "Khan", "Williams",
+    "Kim", "Mueller", "Silva", "Brown", "Sato", "Lopez", "Mensah", "Davies", "Singh", "Cohen",
+    "Martin", "Ivanova", "Taylor", "Haddad", "Walker", "Novak", "Reyes", "Clarke", "Osei", "Lee"
+]
+NAME_PREFIXES = [
+    "Stable", "Summit", "Blue", "Northern", "Bright", "Harbor", "Granite", "Evergreen", "Silver", "Pioneer",
+    "Crescent", "Cedar", "Redwood", "Atlas", "Beacon", "Lakeside", "Urban", "Golden", "Prairie", "Keystone",
+    "Riverbend", "Maple", "Orbit", "Anchor", "Vertex", "Meridian", "Falcon", "Coastal", "Sterling", "Juniper"
+]
+INDUSTRY_WORDS = {
+    "SaaS": "Software", "E-commerce": "Commerce", "Restaurant": "Kitchen", "Manufacturing": "Manufacturing",
+    "Consulting": "Advisory", "Healthcare": "Health", "Construction": "Builders", "Retail": "Goods",
+    "Crypto": "Digital Assets", "Gambling": "Gaming", "Other": "Ventures"
+}
+NAME_SUFFIXES = ["Solutions", "Group", "Partners", "Co", "Labs", "Holdings", "Works", "Collective", "Services", "Company"]
+
+
+class ApplicationGenerator:
+    """
+    Synthetic Application Generator
+    Produces application dicts in the shape the New Application form builds
+    (documents, business_profile, identity and financials included), drawn
+    from configurable distributions. The same seed and distributions always
+    produce the same applications, and generation is lazy, so portfolios of
+    any size stream in constant memory.
+    """
+
+    def __init__(self, seed=0, distributions=None, start=None, id_prefix="SYN"):
+        """
+        Args:
+            - seed: Seed of every random draw
+            - distributions: Overrides of DEFAULT_DISTRIBUTIONS (nested dicts
+              are merged key by key; a weight of 0 removes a value)
+            - start: submitted_date of the first arrival (default 2026-01-01 09:00)
+            - id_prefix: Prefix of the generated application ids
+        """
+        self.seed = seed
+        self.distributions = _merged(DEFAULT_DISTRIBUTIONS, distributions or {})
+        self.start = start or datetime(2026, 1, 1, 9, 0, 0)
+        self.id_prefix = id_prefix
+
+        # Weighted choices as (values, cumulative weights) pairs
+        self._industries = _weighted(self.distributions["industries"])
+        self._revenue_bands = _weighted(self.distributions["revenue_bands"])
+        self._business_ages = _weighted(self.distributions["business_ages"])
+
+    def generate(self, count):
+        """Yield count applications"""
+        rng = random.Random(self.seed)
+        arrival = self.start
+        recent = []  # (owner, business) of recent applications, for resubmissions
+        mean_gap = 3600.0 / max(self.distributions["arrivals_per_hour"], 1e-9)
+
+        for index in range(count):
+            arrival += timedelta(seconds=rng.expovariate(1.0 / mean_gap))
+            app_data = self._application(rng, index, arrival)
+
+            if recent and rng.random() < self.distributions["resubmission_rate"]:
+                app_data.update(rng.choice(recent))
+            else:
+                recent.append({key: app_data[key] for key in (
+                    "business_name", "owner_name", "owner_email", "owner_ssn", "industry"
+                )})
+                if len(recent) > 1000:
+                    recent.pop(0)
+            yield app_data
+
+    def _application(self, rng, index, submitted):
+        dist = self.distributions
+        aml = dist["aml"]
+        financial = dist["financials"]
+        activity = dist["activity"]
+
+        industry = _choose(rng, self._industries)
+        revenue_label = _choose(rng, self._revenue_bands)
+        business_age = _choose(rng, self._business_ages)
+        low, high = REVENUE_RANGES[revenue_label]
+        revenue = int(round(math.exp(rng.uniform(math.log(low), math.log(high))), -3))
+
+        employees = int(min(5000, max(1, revenue / rng.lognormvariate(math.log(financial["revenue_per_employee"]), 0.5))))
+        mean = min(max(financial["debt_to_income_mean"], 0.01), 0.99)
+        debt_to_income = round(rng.betavariate(2 * mean / (1 - mean), 2), 3)
+        positive_rate = financial["cash_flow_positive_new" if business_age == "Less than 1 year" else "cash_flow_positive"]
+
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        business_name = f"{rng.choice(NAME_PREFIXES)} {INDUSTRY_WORDS.get(industry, 'Ventures')} {rng.choice(NAME_SUFFIXES)}"
+        domain = "".join(ch for ch in business_name.lower() if ch.isalnum())[:24]
+
+        return {
+            "application_id": f"{self.id_prefix}-{self.seed}-{index:07d}",
+            "business_name": business_name,
+            "industry": industry,
+            "revenue": revenue_label,
+            "employees": employees,
+            "owner_name": f"{first} {last}",
+            "owner_email": f"{first.lower()}.{last.lower()}{index}@{domain}.com",
+            "owner_ssn": f"{rng.randint(0, 9999):04d}",
+            "business_age": business_age,
+            "documents": {name: rng.random() < dist["documents"].get(name, 1.0) for name in DOCUMENTS},
+            "business_profile": {
+                "avg_transaction": int(rng.lognormvariate(math.log(activity["avg_transaction"]), 1.0)),
+                "monthly_volume": int(rng.lognormvariate(math.log(activity["monthly_volume"]), 1.0)),
+                "international": rng.random() < aml["international"],
+                "high_risk_countries": rng.random() < aml["high_risk_countries"]
+            },
+            "identity": {
+                "id_verified": rng.random() < aml["id_verified"],
+                "pep_check": "flagged" if rng.random() < aml["pep_flagged"] else "clear",
+                "sanctions_check": "flagged" if rng.random() < aml["sanctions_flagged"] else "clear",
+                "adverse_media": rng.random() < aml["adverse_media"]
+            },
+            "financials": {
+                "revenue": revenue,
+                "debt": int(round(revenue * debt_to_income, -2)),
+                "cash_flow_positive": rng.random() < positive_rate,
+                "debt_to_income": debt_to_income
+            },
+            "submitted_date": submitted.strftime("%Y-%m-%d %H:%M:%S"),
+            "status": "PENDING"
+        }
+
+
+def write_jsonl(applications, path):
+    """Write applications one JSON object per line; returns the number written"""
+    written = 0
+    with open(path, "w", encoding="utf-8") as output:
+        for app_data in applications:
+            output.write(json.dumps(app_data) + "\n")
+            written += 1
+    return written
+
+
+def _merged(defaults, overrides):
+    merged = dict(defaults)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(defaults.get(key), dict):
+            merged[key] = dict(defaults[key], **value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _weighted(weights):
+    values, cumulative, total = [], [], 0.0
+    for value, weight in weights.items():
+        if weight > 0:
+            total += weight
+            values.append(value)
+            cumulative.append(total)
+    if not values:
+        raise ValueError("A distribution needs at least one positive weight")
+    return values, cumulative
+
+
+def _choose(rng, weighted):
+    values, cumulative = weighted
+    return rng.choices(values, cum_weights=cumulative)[0]
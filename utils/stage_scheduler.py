@@ -0,0 +1,212 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class Stage:
+    """
+    Pipeline Stage Definition
+    Declares the callable that executes the stage, the earlier stages whose
+    outputs it consumes, and the rules that skip it or halt the pipeline
+    """
+
+    def __init__(self, name, run, requires=(), prepare=None, run_if=None, halt_when=None, reads=None):
+        """
+        Args:
+            - name: Unique stage name
+            - run: Callable taking the prepared input dict and returning a result dict
+            - requires: Names of earlier stages whose outputs this stage needs
+            - prepare: Optional callable (app_data, outputs) -> input dict.
+              Defaults to the application merged with the required outputs
+            - run_if: Optional callable (app_data, outputs) -> bool. A stage
+              whose predicate is False is skipped
+            - halt_when: Optional callable (result) -> reason string or None.
+              A non-empty reason stops the pipeline after this stage
+            - reads: Application fields (dotted paths) the stage input draws
+              on, besides the required outputs. None means any field
+        """
+        self.name = name
+        self.run = run
+        self.requires = tuple(requires)
+        self.prepare = prepare
+        self.run_if = run_if
+        self.halt_when = halt_when
+        self.reads = None if reads is None else tuple(reads)
+
+    def reads_any(self, fields):
+        """True when the stage reads any of the given dotted paths (or a parent or child of one)"""
+        if self.reads is None:
+            return bool(fields)
+        return any(
+            field == read or field.startswith(read + ".") or read.startswith(field + ".")
+            for field in fields for read in self.reads
+        )
+
+    def build_input(self, app_data, outputs):
+        """Build the stage input from the application and upstream outputs"""
+        if self.prepare:
+            return self.prepare(app_data, outputs)
+
+        stage_input = dict(app_data)
+        for name in self.requires:
+            stage_input.update(outputs.get(name) or {})
+        return stage_input
+
+
+def changed_fields(before, after, prefix=""):
+    """Dotted paths of the leaf values that differ between two application dicts"""
+    changed = set()
+    for key in set(before) | set(after):
+        path = f"{prefix}{key}"
+        old, new = before.get(key), after.get(key)
+        if isinstance(old, dict) and isinstance(new, dict):
+            changed |= changed_fields(old, new, path + ".")
+        elif old != new:
+            changed.add(path)
+    return changed
+
+
+class PipelineRun:
+    """
+    Result of a single pipeline execution
+
+    Attributes:
+        - outputs: Stage name -> result dict for every emitted stage
+        - completed: Emitted stage names in declaration order
+        - skipped: Stage names whose run_if predicate was False
+        - halted_at: Name of the stage that halted the pipeline (or None)
+        - halt_reason: Reason returned by the halting stage
+    """
+
+    def __init__(self):
+        self.outputs = {}
+        self.completed = []
+        self.skipped = []
+        self.halted_at = None
+        self.halt_reason = None
+
+    @property
+    def halted(self):
+        return self.halted_at is not None
+
+    def merged(self, names=None):
+        """Flatten stage outputs into one dict, later stages overriding earlier ones"""
+        merged = {}
+        for name in self.completed:
+            if names is None or name in names:
+                merged.update(self.outputs[name])
+        return merged
+
+
+class StageScheduler:
+    """
+    Dependency-Aware Stage Scheduler
+    Runs every stage as soon as the stages it requires have finished, so
+    independent stages execute concurrently on a bounded thread pool.
+
+    Stages are emitted (and halt rules applied) strictly in declaration
+    order, which keeps the observable behaviour of a sequential pipeline:
+    once a stage halts, no later stage is reported, even if it already ran.
+    """
+
+    def __init__(self, stages, max_workers=4):
+        self.stages = list(stages)
+        self.max_workers = max_workers
+        self._index = {}
+
+        for position, stage in enumerate(self.stages):
+            if stage.name in self._index:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            for required in stage.requires:
+                if required not in self._index:
+                    raise ValueError(f"Stage '{stage.name}' requires unknown or later stage '{required}'")
+            self._index[stage.name] = position
+
+    def run(self, app_data, on_stage=None):
+        """
+        Execute the pipeline for one application
+
+        Args:
+            - app_data: Raw application dict (read-only for the stages)
+            - on_stage: Optional callback (stage_name, result) invoked from the
+              calling thread, in declaration order, as each stage is emitted
+
+        Returns:
+            - PipelineRun with the emitted outputs and halt information
+        """
+        pipeline_run = PipelineRun()
+        finished = {}          # stage name -> result (None when skipped)
+        futures = {}           # future -> stage
+        started = set()
+        halt_index = len(self.stages)
+        next_emit = 0
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while next_emit < len(self.stages) and pipeline_run.halted_at is None:
+                progressed = False
+
+                # Launch every stage whose dependencies are satisfied
+                for position, stage in enumerate(self.stages):
+                    if position > halt_index or stage.name in started:
+                        continue
+                    if not all(name in finished for name in stage.requires):
+                        continue
+
+                    started.add(stage.name)
+                    progressed = True
+                    outputs = {name: result for name, result in finished.items() if result is not None}
+
+                    if stage.run_if and not stage.run_if(app_data, outputs):
+                        finished[stage.name] = None
+                        continue
+
+                    # Stages run in a copy of the caller's context (e.g. an active prompt batch)
+                    stage_input = stage.build_input(app_data, outputs)
+                    context = contextvars.copy_context()
+                    futures[executor.submit(context.run, stage.run, stage_input)] = stage
+
+                # Emit the finished prefix in declaration order
+                while next_emit < len(self.stages) and self.stages[next_emit].name in finished:
+                    stage = self.stages[next_emit]
+                    result = finished[stage.name]
+                    next_emit += 1
+
+                    if result is None:
+                        pipeline_run.skipped.append(stage.name)
+                        continue
+
+                    pipeline_run.outputs[stage.name] = result
+                    pipeline_run.completed.append(stage.name)
+                    if on_stage:
+                        on_stage(stage.name, result)
+
+                    reason = stage.halt_when(result) if stage.halt_when else None
+                    if reason:
+                        pipeline_run.halted_at = stage.name
+                        pipeline_run.halt_reason = reason
+                        break
+
+                if pipeline_run.halted_at is not None or next_emit >= len(self.stages):
+                    break
+
+                if not futures:
+                    if progressed:
+                        # Newly skipped stages may have unblocked others
+                        continue
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = futures.pop(future)
+                    result = future.result()  # Stage errors propagate to the caller
+                    finished[stage.name] = result
+
+                    # Stop launching work that a halt would discard anyway
+                    position = self._index[stage.name]
+                    if stage.halt_when and stage.halt_when(result):
+                        halt_index = min(halt_index, position)
+        finally:
+            # Discarded stages are not waited on; their results are dropped
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return pipeline_run
@@ -0,0 +1,470 @@
+import os
+import re
+import json
+import math
+import time
+import heapq
+import hashlib
+import threading
+import unicodedata
+from datetime import datetime
+from collections import OrderedDict
+
+from agents.features import FEATURES_KEY
+
+# Submission check outcomes
+ACCEPT = "ACCEPT"          # Run the pipeline
+FLAG = "FLAG"              # Run the pipeline, but the applicant re-applies unusually often
+DUPLICATE = "DUPLICATE"    # Identical to an earlier submission; do not run it again
+BLOCK = "BLOCK"            # Too many applications from this applicant in the window; do not run
+
+# Identity keys counted by the velocity windows, with their display labels. Names
+# alone are too common to count; owner and business together identify an applicant.
+KEY_LABELS = {"email": "email", "owner_business": "owner and business"}
+
+# Fields left out of the duplicate fingerprint (they differ between otherwise identical submissions)
+VOLATILE_FIELDS = {
+    "application_id", "submitted_date", "status", "processed_at", "submission_check", "human_review", FEATURES_KEY
+}
+
+HONORIFICS = {"dr", "mr", "mrs", "ms", "miss", "mx", "prof", "sir", "jr", "sr"}
+LEGAL_SUFFIXES = {"llc", "inc", "ltd", "co", "corp", "corporation", "company", "plc", "gmbh", "llp", "lp", "pvt", "limited"}
+
+
+def normalize_email(email):
+    """Lower-cased address without +tags (and without dots for Gmail)"""
+    email = str(email or "").strip().lower()
+    local, at, domain = email.partition("@")
+    if not at:
+        return email
+    local = local.split("+", 1)[0]
+    if domain in ("gmail.com", "googlemail.com"):
+        local, domain = local.replace(".", ""), "gmail.com"
+    return f"{local}@{domain}"
+
+
+def normalize_person(name):
+    """Lower-case ASCII words of a person's name, honorifics dropped"""
+    return " ".join(word for word in _words(name) if word not in HONORIFICS)
+
+
+def normalize_business(name):
+    """Lower-case ASCII words of a business name, leading "the" and trailing legal forms dropped"""
+    words = _words(name)
+    if words[:1] == ["the"]:
+        words = words[1:]
+    while words and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def _words(text):
+    ascii_text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode("ascii")
+    return re.findall(r"[a-z0-9]+", ascii_text.lower())
+
+
+def identity_keys(app_data):
+    """Key name (see KEY_LABELS) -> normalized identity of the applicant (keys without a value left out)"""
+    keys = {}
+    email = normalize_email(app_data.get("owner_email"))
+    if email:
+        keys["email"] = email
+    owner = normalize_person(app_data.get("owner_name"))
+    business = normalize_business(app_data.get("business_name"))
+    if owner and business:
+        keys["owner_business"] = f"{owner}|{business}"
+    return keys
+
+
+def application_fingerprint(app_data):
+    """Digest of the application's content with identities normalized and volatile fields ignored"""
+    content = {key: value for key, value in app_data.items() if key not in VOLATILE_FIELDS}
+    content["owner_email"] = normalize_email(app_data.get("owner_email"))
+    content["owner_name"] = normalize_person(app_data.get("owner_name"))
+    content["business_name"] = normalize_business(app_data.get("business_name"))
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def submitted_at(app_data):
+    """Unix time of the application's submitted_date (None when missing or malformed)"""
+    try:
+        return datetime.strptime(str(app_data.get("submitted_date")), "%Y-%m-%d %H:%M:%S").timestamp()
+    except ValueError:
+        return None
+
+
+class BloomFilter:
+    """
+    Fixed-Size Bloom Filter
+    Answers "definitely never added" without false negatives; the false
+    positive rate stays near error_rate up to capacity keys
+    """
+
+    def __init__(self, capacity=2000000, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing over one 128-bit digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SlidingWindowCounter:
+    """
+    Per-Key Event Counts over a Sliding Window
+    The window is split into fixed buckets, so recording and counting cost
+    the same for every key regardless of its history. Counts are exact to
+    within one bucket; keys idle for a whole window are dropped when their
+    last bucket expires, at a cost proportional to the keys it holds.
+    """
+
+    def __init__(self, window_seconds=86400, buckets=24):
+        self.window_seconds = window_seconds
+        self.buckets = buckets
+        self.bucket_seconds = window_seconds / buckets
+        self._rings = {}            # key -> [bucket counts, newest bucket number]
+        self._expiry = {}           # bucket number -> keys whose newest bucket it became
+        self._expiry_heap = []      # bucket numbers in _expiry, oldest first
+        self._swept_bucket = None
+
+    def add(self, key, now):
+        """Record one event for key at now; returns the key's count in the window"""
+        bucket = int(now // self.bucket_seconds)
+        self._sweep(bucket)
+
+        entry = self._rings.get(key)
+        if entry is None:
+            entry = self._rings[key] = [[0] * self.buckets, bucket]
+            self._expire_after(key, bucket)
+        ring, newest = entry
+        if bucket > newest:
+            if bucket - newest >= self.buckets:
+                ring[:] = [0] * self.buckets
+            else:
+                for stale in range(newest + 1, bucket + 1):
+                    ring[stale % self.buckets] = 0
+            entry[1] = newest = bucket
+            self._expire_after(key, bucket)
+        if newest - bucket < self.buckets:
+            ring[bucket % self.buckets] += 1  # Late events still count while inside the window
+        return sum(ring)
+
+    def discard(self, key, at):
+        """Withdraw one event recorded for key at `at` (nothing to do once it has left the window)"""
+        entry = self._rings.get(key)
+        if entry is None:
+            return
+        ring, newest = entry
+        bucket = int(at // self.bucket_seconds)
+        if 0 <= newest - bucket < self.buckets and ring[bucket % self.buckets]:
+            ring[bucket % self.buckets] -= 1
+
+    def count(self, key, now):
+        """Events recorded for key in the window ending at now"""
+        entry = self._rings.get(key)
+        if entry is None:
+            return 0
+        ring, newest = entry
+        bucket = int(now // self.bucket_seconds)
+        return sum(ring[b % self.buckets] for b in range(max(newest - self.buckets + 1, bucket - self.buckets + 1), newest + 1))
+
+    def __len__(self):
+        return len(self._rings)
+
+    def _expire_after(self, key, bucket):
+        keys = self._expiry.get(bucket)
+        if keys is None:
+            keys = self._expiry[bucket] = []
+            heapq.heappush(self._expiry_heap, bucket)
+        keys.append(key)
+
+    def _sweep(self, bucket):
+        if bucket == self._swept_bucket:
+            return
+        self._swept_bucket = bucket
+        # Only the keys listed under an expired bucket are looked at; those
+        # that have seen a newer bucket since are listed again there
+        while self._expiry_heap and bucket - self._expiry_heap[0] >= self.buckets:
+            expired = heapq.heappop(self._expiry_heap)
+            for key in self._expiry.pop(expired):
+                entry = self._rings.get(key)
+                if entry is not None and entry[1] == expired:
+                    del self._rings[key]
+
+
+class SubmissionCheck:
+    """
+    Outcome of a submission check
+
+    Attributes:
+        - action: ACCEPT, FLAG, DUPLICATE or BLOCK
+        - duplicate_of: application_id of the identical earlier submission
+        - reasons: Human-readable findings
+        - velocity: Identity key -> applications in the window, this one included
+        - returning: True when an identity key was seen before (possibly outside the window)
+    """
+
+    __slots__ = ("action", "duplicate_of", "reasons", "velocity", "returning")
+
+    def __init__(self, action=ACCEPT, duplicate_of=None, reasons=(), velocity=None, returning=False):
+        self.action = action
+        self.duplicate_of = duplicate_of
+        self.reasons = list(reasons)
+        self.velocity = dict(velocity or {})
+        self.returning = returning
+
+    @property
+    def short_circuit(self):
+        """True when the pipeline should not run for this submission"""
+        return self.action in (DUPLICATE, BLOCK)
+
+    def to_dict(self):
+        return {
+            "action": self.action,
+            "duplicate_of": self.duplicate_of,
+            "reasons": self.reasons,
+            "velocity": self.velocity,
+            "returning": self.returning
+        }
+
+    def __repr__(self):
+        return f"SubmissionCheck({self.action!r}, {self.reasons!r})"
+
+
+class SubmissionIndex:
+    """
+    Submission-Time Duplicate and Velocity Index
+    Checks an application before any agent runs, in constant time:
+
+        - Exact duplicates: content fingerprints (identities normalized) of
+          the submissions in the dedupe window, behind a Bloom filter that
+          lets never-seen fingerprints skip the lookup
+        - Velocity: sliding-window counts per normalized email and per
+          owner and business name pair; FLAG from flag_threshold applications
+          in the window, BLOCK from block_threshold
+        - Returning applicants: identity keys stay in the Bloom filter after
+          their window has passed
+
+    An application is counted once: checking it again under its own
+    application_id (a retry, or a corrected resubmission) neither counts
+    against its applicant again nor makes it a duplicate of itself.
+
+    The index lives in process memory; each process sees only the
+    submissions it checked or replayed. A restarted process starts empty
+    unless it is replayed from the application store (see
+    OnboardingService), and replicas behind a load balancer never see each
+    other's submissions, so duplicates and velocity spread across replicas
+    go undetected until the next restart.
+    """
+
+    def __init__(self, window_seconds=86400, flag_threshold=3, block_threshold=10,
+                 dedupe_seconds=30 * 86400, max_fingerprints=1000000, bloom_capacity=2000000):
+        """
+        Args:
+            - window_seconds: Velocity window
+            - flag_threshold / block_threshold: Applications per identity key
+              within the window that flag / block a submission (0 = never)
+            - dedupe_seconds: How long an identical submission counts as a duplicate
+            - max_fingerprints: Fingerprints held for deduplication, oldest evicted first
+            - bloom_capacity: Keys the Bloom filter holds at a 1% false positive rate
+        """
+        self.window_seconds = window_seconds
+        self.flag_threshold = flag_threshold
+        self.block_threshold = block_threshold
+        self.dedupe_seconds = dedupe_seconds
+        self.max_fingerprints = max_fingerprints
+
+        self._bloom = BloomFilter(bloom_capacity)
+        self._fingerprints = OrderedDict()  # fingerprint -> (application_id, submitted at)
+        self._applications = OrderedDict()  # application_id -> (fingerprint, submitted at, identity keys)
+        self._velocity = SlidingWindowCounter(window_seconds)
+        self._lock = threading.Lock()
+
+        # Counters
+        self.checked = 0
+        self.flagged = 0
+        self.duplicates = 0
+        self.blocked = 0
+
+    def check(self, app_data, now=None, record=True):
+        """
+        Check a submission and (with record) count it
+
+        Resubmitting an application under its own application_id (a retry)
+        is not a duplicate. Blocked and duplicate submissions are not added
+        to the fingerprints, so they never become the original of a duplicate.
+
+        Args:
+            - app_data: Application dict as submitted
+            - now: Unix time of the submission (default: the current time)
+            - record: Count the submission; False only inspects the index
+        """
+        return self._check(app_data, now, record, tally=True)
+
+    def replay(self, app_data, now=None):
+        """
+        Feed the index a submission checked in an earlier run (e.g. one a
+        resumed batch skips), leaving it in the state that check() left it
+        in then. The stats counters are not touched.
+        """
+        self._check(app_data, now, record=True, tally=False)
+
+    def forget(self, app_id):
+        """
+        Drop a recorded submission that did not go through (e.g. its save or
+        pipeline failed), so it is neither the original of later duplicates
+        nor counted against its applicant
+
+        Returns:
+            - True when the application was recorded
+        """
+        with self._lock:
+            entry = self._applications.pop(app_id, None)
+            if entry is None:
+                return False
+            fingerprint, recorded_at, keys = entry
+            if self._fingerprints.get(fingerprint, (None,))[0] == app_id:
+                del self._fingerprints[fingerprint]
+            for name, value in keys.items():
+                self._velocity.discard(f"{name}:{value}", recorded_at)
+            return True
+
+    def _check(self, app_data, now, record, tally):
+        now = time.time() if now is None else now
+        app_id = app_data.get("application_id")
+        keys = identity_keys(app_data)
+        fingerprint = application_fingerprint(app_data)
+
+        with self._lock:
+            self.checked += tally
+            returning = any(f"{name}:{value}" in self._bloom for name, value in keys.items())
+
+            if fingerprint in self._bloom:
+                earlier = self._fingerprints.get(fingerprint)
+                if earlier is not None and earlier[0] != app_id and now - earlier[1] <= self.dedupe_seconds:
+                    self.duplicates += tally
+                    return SubmissionCheck(DUPLICATE, earlier[0], [f"Identical to application {earlier[0]}"], returning=True)
+
+            # An application already counted is not counted again
+            counted = app_id is not None and app_id in self._applications
+            add = record and not counted
+            counter = self._velocity.add if add else self._velocity.count
+            velocity = {name: counter(f"{name}:{value}", now) + (0 if add or counted else 1) for name, value in keys.items()}
+            busiest = max(velocity.values(), default=0)
+            hours = self.window_seconds / 3600
+            reasons = [
+                f"{count} applications with this {KEY_LABELS[name]} in {hours:g}h"
+                for name, count in velocity.items()
+                if self.flag_threshold and count >= self.flag_threshold
+            ]
+
+            if self.block_threshold and busiest >= self.block_threshold:
+                self.blocked += tally
+                return SubmissionCheck(BLOCK, reasons=reasons, velocity=velocity, returning=returning)
+
+            action = FLAG if reasons else ACCEPT
+            if action == FLAG:
+                self.flagged += tally
+            if record:
+                self._remember(fingerprint, app_id, now, keys)
+            return SubmissionCheck(action, reasons=reasons, velocity=velocity, returning=returning)
+
+    def _remember(self, fingerprint, app_id, now, keys):
+        if app_id is not None:
+            earlier = self._applications.get(app_id)
+            if earlier is not None:
+                # A resubmission replaces the content its id was recorded with
+                now = earlier[1]
+                if earlier[0] != fingerprint and self._fingerprints.get(earlier[0], (None,))[0] == app_id:
+                    del self._fingerprints[earlier[0]]
+            self._applications[app_id] = (fingerprint, now, keys)
+            self._applications.move_to_end(app_id)
+            while len(self._applications) > self.max_fingerprints:
+                self._applications.popitem(last=False)
+
+        self._fingerprints[fingerprint] = (app_id, now)
+        self._fingerprints.move_to_end(fingerprint)
+        while len(self._fingerprints) > self.max_fingerprints:
+            self._fingerprints.popitem(last=False)
+        self._bloom.add(fingerprint)
+        for name, value in keys.items():
+            self._bloom.add(f"{name}:{value}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "checked": self.checked,
+                "flagged": self.flagged,
+                "duplicates": self.duplicates,
+                "blocked": self.blocked,
+                "fingerprints": len(self._fingerprints),
+                "tracked_keys": len(self._velocity)
+            }
+
+
+# Process-wide index
+_index = None
+_index_lock = threading.Lock()
+
+
+def new_submission_index():
+    """
+    Create a submission index configured from the environment
+
+    Environment:
+        - SUBMISSION_WINDOW_SECONDS: Velocity window (default 86400)
+        - SUBMISSION_FLAG_THRESHOLD: Applications per key in the window that flag (default 3)
+        - SUBMISSION_BLOCK_THRESHOLD: Applications per key in the window that block (default 10)
+        - SUBMISSION_DEDUPE_SECONDS: Duplicate horizon (default 2592000, 30 days)
+    """
+    return SubmissionIndex(
+        window_seconds=float(os.getenv("SUBMISSION_WINDOW_SECONDS", "86400")),
+        flag_threshold=int(os.getenv("SUBMISSION_FLAG_THRESHOLD", "3")),
+        block_threshold=int(os.getenv("SUBMISSION_BLOCK_THRESHOLD", "10")),
+        dedupe_seconds=float(os.getenv("SUBMISSION_DEDUPE_SECONDS", str(30 * 86400)))
+    )
+
+
+def get_submission_index():
+    """
+    Return the shared submission index (see new_submission_index), or None when disabled
+
+    Environment:
+        - SUBMISSION_INDEX_ENABLED: "0" disables the checks (default "1")
+    """
+    global _index
+    if os.getenv("SUBMISSION_INDEX_ENABLED", "1") == "0":
+        return None
+
+    with _index_lock:
+        if _index is None:
+            _index = new_submission_index()
+        return _index
+
+
+def check_submission(app_data, now=None):
+    """Check a submission against the shared index (always ACCEPT when the index is disabled)"""
+    index = get_submission_index()
+    if index is None:
+        return SubmissionCheck()
+    return index.check(app_data, now=now)
+
+
+def forget_submission(app_id):
+    """Drop a submission that did not go through from the shared index (see SubmissionIndex.forget)"""
+    index = get_submission_index()
+    return index is not None and index.forget(app_id)
@@ -0,0 +1,314 @@
+import os
+import sys
+import json
+import time
+import atexit
+import secrets
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Span open in this context; spans started in it become its children
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+# Wall clock anchor for the monotonic span timestamps
+_EPOCH_NS = time.time_ns()
+_PERF_NS = time.perf_counter_ns()
+
+SERVICE_NAME = "techventure-onboarding"
+
+
+def _now_ns():
+    return _EPOCH_NS + time.perf_counter_ns() - _PERF_NS
+
+
+class Span:
+    """
+    One Timed Operation of a Trace
+
+    Attributes:
+        - name: Operation name (e.g. agent.kyc, llm.prompt)
+        - trace_id / span_id / parent_id: Hex ids (parent_id None for a root span)
+        - start_ns / end_ns: Unix time in nanoseconds (end_ns None while open)
+        - attributes: Key -> str/int/float/bool
+        - error: "<Type>: <message>" when the operation raised
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_ns = _now_ns()
+        self.end_ns = None
+        self.attributes = {key: value for key, value in (attributes or {}).items() if value is not None}
+        self.error = None
+
+    def set(self, key, value):
+        """Set an attribute (None values are dropped)"""
+        if value is not None:
+            self.attributes[key] = value
+
+    @property
+    def duration_ms(self):
+        end_ns = self.end_ns if self.end_ns is not None else _now_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def to_otlp(self):
+        """The span as an OTLP/JSON span object"""
+        otlp = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        if self.parent_id:
+            otlp["parentSpanId"] = self.parent_id
+        return otlp
+
+    def __repr__(self):
+        return f"Span({self.name!r}, {self.duration_ms:.2f} ms)"
+
+
+class _NoSpan:
+    """Span handed out while tracing is disabled"""
+
+    trace_id = None
+    span_id = None
+
+    def set(self, key, value):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Tracer:
+    """
+    Span Collector
+    Keeps the spans of the most recent traces in memory (for the waterfall
+    view) and, with an export file, appends finished spans to it in
+    OTLP/JSON, one ExportTraceServiceRequest per line as the OpenTelemetry
+    Collector's file exporter writes them, so the file loads into any
+    OTLP-aware trace viewer.
+
+    Finishing a span only appends it to a list; a background exporter
+    thread encodes and writes the spans, so no span ever waits on the disk.
+    The file is rotated to <path>.1 once it would exceed max_bytes.
+    """
+
+    def __init__(self, path=None, max_traces=200, flush_every=64, flush_interval=1.0,
+                 max_bytes=50 * 1024 * 1024, max_pending=10000):
+        """
+        Args:
+            - path: Export file (None = memory only)
+            - max_traces: Traces kept in memory, oldest evicted first
+            - flush_every: Buffered spans that wake the exporter (a finished
+              root span always does)
+            - flush_interval: Seconds between exports otherwise
+            - max_bytes: Export file size that triggers a rotation (0 = unbounded)
+            - max_pending: Spans buffered for export; beyond it the oldest are dropped
+        """
+        self.path = path
+        self.max_traces = max_traces
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._traces = OrderedDict()  # trace id -> finished spans
+        self._pending = []            # finished spans not yet exported
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Serializes exports to the file
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+
+        self._exporter = None
+        if path:
+            self._exporter = threading.Thread(target=self._export_loop, name="trace-export", daemon=True)
+            self._exporter.start()
+
+    def finish(self, span):
+        """Record a finished span"""
+        wake = False
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(span)
+            if self.path:
+                self._pending.append(span)
+                if len(self._pending) > self.max_pending:
+                    del self._pending[0]
+                    self.dropped += 1
+                wake = span.parent_id is None or len(self._pending) >= self.flush_every
+        if wake:
+            self._wake.set()
+
+    def trace(self, trace_id):
+        """Finished spans of a trace in start order"""
+        with self._lock:
+            spans = list(self._traces.get(trace_id, ()))
+        return sorted(spans, key=lambda span: span.start_ns)
+
+    def flush(self):
+        """Export the buffered spans now, from the calling thread"""
+        with self._write_lock:
+            with self._lock:
+                spans, self._pending = self._pending, []
+            self._write(spans)
+
+    def close(self):
+        """Stop the exporter after a final export"""
+        self._closed.set()
+        self._wake.set()
+        if self._exporter is not None:
+            self._exporter.join()
+        self.flush()
+
+    def _export_loop(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Could not export traces to {self.path}: {e}", file=sys.stderr)
+
+    def _write(self, spans):
+        if not spans:
+            return
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+        line = json.dumps(request) + "\n"
+        if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+            os.replace(self.path, self.path + ".1")  # Keep one rotated file
+        with open(self.path, "a", encoding="utf-8") as output:
+            output.write(line)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time the enclosed block as a span of the trace active in this context
+
+    Work handed to other threads joins the trace when it runs in a copy of
+    this context (see utils.stage_scheduler). Yields the Span, whose
+    attributes can be set until the block exits.
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        yield _NO_SPAN
+        return
+
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = _now_ns()
+        tracer.finish(current)
+
+
+def current_span():
+    """Span open in this context (None outside any span)"""
+    return _current_span.get()
+
+
+def waterfall(spans):
+    """
+    Rows for a waterfall chart of one trace, parents before their children
+
+    Returns:
+        - Dicts with span, depth, start_ms and end_ms (relative to the trace
+          start), duration_ms and the span's attributes
+    """
+    if not spans:
+        return []
+    children = {}
+    for item in spans:
+        children.setdefault(item.parent_id, []).append(item)
+    known = {item.span_id for item in spans}
+    roots = [item for item in spans if item.parent_id not in known]
+    origin = min(item.start_ns for item in spans)
+
+    rows = []
+
+    def visit(item, depth):
+        rows.append(dict(
+            item.attributes,
+            span=item.name,
+            depth=depth,
+            start_ms=round((item.start_ns - origin) / 1e6, 3),
+            end_ms=round(((item.end_ns or item.start_ns) - origin) / 1e6, 3),
+            duration_ms=round(item.duration_ms, 3),
+            error=item.error
+        ))
+        for child in sorted(children.get(item.span_id, ()), key=lambda child: child.start_ns):
+            visit(child, depth + 1)
+
+    for root in sorted(roots, key=lambda root: root.start_ns):
+        visit(root, 0)
+    return rows
+
+
+# Process-wide tracer
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """
+    Return the shared tracer configured from the environment, or None when disabled
+
+    Environment:
+        - TRACING_ENABLED: "0" disables tracing (default "1")
+        - TRACE_PATH: OTLP/JSON export file, e.g. traces.otlp.jsonl (default "": memory only)
+        - TRACE_MAX_BYTES: Export file size at which it is rotated (default 52428800, 0 = unbounded)
+        - TRACE_MAX_TRACES: Traces kept in memory (default 200)
+    """
+    global _tracer
+    if os.getenv("TRACING_ENABLED", "1") == "0":
+        return None
+    if _tracer is not None:
+        return _tracer
+
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(
+                path=os.getenv("TRACE_PATH", "") or None,
+                max_traces=int(os.getenv("TRACE_MAX_TRACES", "200")),
+                max_bytes=int(os.getenv("TRACE_MAX_BYTES", str(50 * 1024 * 1024)))
+            )
+            atexit.register(_tracer.close)
+        return _tracer
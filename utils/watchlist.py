@@ -0,0 +1,356 @@
+import os
+import re
+import csv
+import json
+import mmap
+import zlib
+import struct
+import threading
+import unicodedata
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+
+import numpy as np
+
+# ========================================
+# Compiled watchlist file layout (little endian)
+#
+#   header    MAGIC, version, counts and section offsets (HEADER)
+#   entries   n_entries x (meta_offset u32, meta_length u32) -> JSON record in strings
+#   aliases   n_aliases x (entry u32, name_offset u32, name_length u32, trigrams u32)
+#   keys      n_keys x u32 trigram hashes, sorted
+#   starts    (n_keys + 1) x u32 posting list boundaries
+#   postings  u32 alias ids, grouped by trigram
+#   strings   UTF-8 blob (entry JSON records and normalized alias names)
+#   trailer   UTF-8 list version followed by its length (u32)
+#
+# Every section is read in place through np.frombuffer over a read-only
+# mmap, so all processes on a host share one copy in the page cache.
+# ========================================
+
+MAGIC = b"TVWLIST1"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIIIQQQQQQ")
+
+ENTRY_DTYPE = np.dtype([("meta_offset", "<u4"), ("meta_length", "<u4")])
+ALIAS_DTYPE = np.dtype([("entry", "<u4"), ("name_offset", "<u4"), ("name_length", "<u4"), ("trigrams", "<u4")])
+
+# Tokens that carry no identity (legal forms, honorifics, fillers)
+NOISE_TOKENS = {
+    "the", "of", "and", "co", "company", "corp", "corporation", "inc", "incorporated", "llc", "llp",
+    "ltd", "limited", "plc", "pvt", "private", "gmbh", "sa", "ag", "bv", "mr", "mrs", "ms", "dr", "sir"
+}
+
+
+def normalize_name(name):
+    """Lowercase ASCII tokens without accents, punctuation or noise words"""
+    text = unicodedata.normalize("NFKD", str(name or ""))
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    tokens = re.sub(r"[^a-z0-9]+", " ", text).split()
+    return [token for token in tokens if token not in NOISE_TOKENS]
+
+
+def trigrams(tokens):
+    """Padded character trigrams of every token, as a set of u32 hashes"""
+    grams = set()
+    for token in tokens:
+        padded = f"  {token} "
+        for i in range(len(padded) - 2):
+            grams.add(zlib.crc32(padded[i:i + 3].encode("ascii")))
+    return grams
+
+
+# ========================================
+# Compilation
+# ========================================
+
+def read_source(path):
+    """
+    Yield watchlist records from a JSONL or CSV source
+
+    Each record needs a name; optional fields are id, list (SANCTIONS/PEP),
+    aliases (list, or ';'-separated in CSV), program and country.
+    """
+    with open(path, encoding="utf-8", newline="") as source:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(source):
+                row["aliases"] = [alias.strip() for alias in (row.get("aliases") or "").split(";") if alias.strip()]
+                yield row
+        else:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def compile_watchlist(records, output_path, version=""):
+    """
+    Precompile watchlist records into the memory-mappable index format
+
+    Returns:
+        - Counts: entries, aliases, trigrams
+    """
+    strings = bytearray()
+    entries = []
+    aliases = []
+    postings = {}
+
+    def add_string(text):
+        data = text.encode("utf-8")
+        offset = len(strings)
+        strings.extend(data)
+        return offset, len(data)
+
+    for entry_id, record in enumerate(records):
+        meta = {
+            "id": str(record.get("id") or entry_id),
+            "name": record["name"],
+            "list": str(record.get("list") or "SANCTIONS").upper(),
+            "program": record.get("program") or "",
+            "country": record.get("country") or ""
+        }
+        entries.append(add_string(json.dumps(meta, ensure_ascii=False)))
+
+        seen = set()
+        for alias in [record["name"]] + list(record.get("aliases") or []):
+            tokens = normalize_name(alias)
+            normalized = " ".join(tokens)
+            if not tokens or normalized in seen:
+                continue
+            seen.add(normalized)
+
+            grams = trigrams(tokens)
+            alias_id = len(aliases)
+            name_offset, name_length = add_string(normalized)
+            aliases.append((entry_id, name_offset, name_length, len(grams)))
+            for gram in grams:
+                postings.setdefault(gram, []).append(alias_id)
+
+    keys = np.array(sorted(postings), dtype="<u4")
+    starts = np.zeros(len(keys) + 1, dtype="<u4")
+    np.cumsum([len(postings[int(key)]) for key in keys], out=starts[1:])
+    posting_data = np.fromiter((alias_id for key in keys for alias_id in postings[int(key)]), dtype="<u4", count=int(starts[-1]))
+
+    sections = [
+        np.array(entries, dtype=ENTRY_DTYPE).tobytes(),
+        np.array(aliases, dtype=ALIAS_DTYPE).tobytes(),
+        keys.tobytes(),
+        starts.tobytes(),
+        posting_data.tobytes(),
+        bytes(strings)
+    ]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        position += -position % 8  # Keep every section 8-byte aligned
+        offsets.append(position)
+        position += len(section)
+
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(entries), len(aliases), len(keys), *offsets))
+        for offset, section in zip(offsets, sections):
+            output.write(b"\0" * (offset - output.tell()))
+            output.write(section)
+        version_bytes = str(version).encode("utf-8")
+        output.write(version_bytes + struct.pack("<I", len(version_bytes)))
+    os.replace(tmp_path, output_path)  # Readers never see a half-written file
+
+    return {"entries": len(entries), "aliases": len(aliases), "trigrams": len(keys)}
+
+
+# ========================================
+# Screening
+# ========================================
+
+class Watchlist:
+    """
+    Memory-Mapped Sanctions/PEP Watchlist
+    Fuzzy name screening over a precompiled trigram index. Candidates are
+    gathered from the posting lists of the query's trigrams, ranked by Dice
+    overlap, and the best ones scored with a token-order-insensitive
+    string similarity.
+    """
+
+    def __init__(self, path, max_postings=None):
+        """
+        Args:
+            - path: Compiled watchlist file (see compile_watchlist)
+            - max_postings: Skip trigrams whose posting list is longer than this
+              (very common grams add little evidence). Default: 5% of aliases
+        """
+        self.path = path
+        self._users = 0           # Screens holding the mapping (see acquire)
+        self._retired = False
+        self._state_lock = threading.Lock()
+        with open(path, "rb") as source:
+            self._mmap = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n_entries, n_aliases, n_keys, *offsets = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a compiled watchlist (format {FORMAT_VERSION})")
+        entries_at, aliases_at, keys_at, starts_at, postings_at, strings_at = offsets
+
+        buffer = self._mmap
+        self.entries = np.frombuffer(buffer, dtype=ENTRY_DTYPE, count=n_entries, offset=entries_at)
+        self.aliases = np.frombuffer(buffer, dtype=ALIAS_DTYPE, count=n_aliases, offset=aliases_at)
+        self.keys = np.frombuffer(buffer, dtype="<u4", count=n_keys, offset=keys_at)
+        self.starts = np.frombuffer(buffer, dtype="<u4", count=n_keys + 1, offset=starts_at)
+        self.postings = np.frombuffer(buffer, dtype="<u4", count=int(self.starts[-1]) if n_keys else 0, offset=postings_at)
+        self._strings_at = strings_at
+        self._alias_trigrams = self.aliases["trigrams"]
+
+        self.max_postings = max_postings or max(1000, n_aliases // 20)
+        self.version = self._read_version(path, n_entries, n_aliases)
+
+    def __len__(self):
+        return len(self.aliases)
+
+    def screen(self, name, limit=5, min_score=0.8, candidates=50):
+        """
+        Screen one name
+
+        Args:
+            - name: Person or business name
+            - limit: Maximum hits returned
+            - min_score: Minimum final score (0-1) for a hit
+            - candidates: Aliases re-scored after the trigram pass
+
+        Returns:
+            - Hits sorted by score: dicts with entry id, listed name, list,
+              program, country, matched alias and score
+        """
+        tokens = normalize_name(name)
+        if not tokens:
+            return []
+        query = " ".join(sorted(tokens))
+        grams = np.fromiter(trigrams(tokens), dtype="<u4")
+
+        # Posting lists of the query's trigrams; very common grams are skipped
+        index = np.searchsorted(self.keys, grams)
+        found = index < len(self.keys)
+        found[found] = self.keys[index[found]] == grams[found]
+        index = index[found]
+        if not len(index):
+            return []
+        lengths = self.starts[index + 1] - self.starts[index]
+        usable = index[lengths <= self.max_postings]
+        if not len(usable):
+            usable = index[np.argsort(lengths)[:3]]
+
+        postings = np.concatenate([self.postings[self.starts[i]:self.starts[i + 1]] for i in usable])
+        alias_ids, shared = np.unique(postings, return_counts=True)
+
+        # Estimated Dice overlap on trigram sets, scaling up for the skipped grams
+        shared = shared * (len(grams) / len(usable))
+        dice = 2.0 * shared / (len(grams) + self._alias_trigrams[alias_ids])
+        keep = dice >= min_score * 0.5
+        alias_ids, dice = alias_ids[keep], dice[keep]
+        if len(alias_ids) > candidates:
+            top = np.argpartition(-dice, candidates)[:candidates]
+            alias_ids = alias_ids[top]
+
+        # Final score: similarity of the token-sorted names
+        best = {}
+        for alias_id in alias_ids.tolist():
+            alias = self.aliases[alias_id]
+            alias_name = self._string(alias["name_offset"], alias["name_length"])
+            score = round(SequenceMatcher(None, query, " ".join(sorted(alias_name.split()))).ratio(), 4)
+            entry = int(alias["entry"])
+            if score >= min_score and score > best.get(entry, (0,))[0]:
+                best[entry] = (score, alias_name)
+
+        hits = []
+        for entry, (score, alias_name) in sorted(best.items(), key=lambda item: -item[1][0])[:limit]:
+            meta = self.entry(entry)
+            meta.update({"matched_alias": alias_name, "score": score})
+            hits.append(meta)
+        return hits
+
+    def entry(self, entry_id):
+        record = self.entries[entry_id]
+        return json.loads(self._string(record["meta_offset"], record["meta_length"]))
+
+    def acquire(self):
+        """Keep the mapping open until the matching release(), even if the list is retired meanwhile"""
+        with self._state_lock:
+            if self._mmap.closed:
+                raise ValueError(f"Watchlist {self.path} is closed")
+            self._users += 1
+
+    def release(self):
+        with self._state_lock:
+            self._users -= 1
+            if self._retired and not self._users:
+                self.close()
+
+    def retire(self):
+        """Close the mapping once no screen holds it any more (the file was replaced)"""
+        with self._state_lock:
+            self._retired = True
+            if not self._users:
+                self.close()
+
+    def close(self):
+        # The array views must go first: an mmap with exported buffers cannot be closed
+        self.entries = self.aliases = self.keys = self.starts = self.postings = None
+        self._alias_trigrams = None
+        self._mmap.close()
+
+    def _string(self, offset, length):
+        start = self._strings_at + int(offset)
+        return self._mmap[start:start + int(length)].decode("utf-8")
+
+    def _read_version(self, path, n_entries, n_aliases):
+        (length,) = struct.unpack_from("<I", self._mmap, len(self._mmap) - 4)
+        version = self._mmap[len(self._mmap) - 4 - length:len(self._mmap) - 4].decode("utf-8")
+        return version or f"{os.path.basename(path)}:{n_entries}/{n_aliases}"
+
+
+# Process-wide watchlist (each process maps the same file)
+_watchlist = None
+_watchlist_path = None
+_watchlist_lock = threading.Lock()
+
+
+def get_watchlist():
+    """
+    Return the watchlist named by WATCHLIST_PATH, or None when none is configured
+
+    The file is re-mapped when it is replaced (e.g. after a list refresh),
+    and the previous mapping closed once its in-flight screens are done.
+    Screens that may span a refresh should hold the list through
+    using_watchlist() instead.
+    """
+    with _watchlist_lock:
+        return _current_watchlist()
+
+
+@contextmanager
+def using_watchlist():
+    """Yield the current watchlist (or None), kept mapped until the block exits"""
+    with _watchlist_lock:
+        watchlist = _current_watchlist()
+        if watchlist is not None:
+            watchlist.acquire()
+    try:
+        yield watchlist
+    finally:
+        if watchlist is not None:
+            watchlist.release()
+
+
+def _current_watchlist():
+    # Called with _watchlist_lock held
+    global _watchlist, _watchlist_path
+    path = os.getenv("WATCHLIST_PATH")
+    if not path or not os.path.exists(path):
+        return None
+
+    stamp = (path, os.stat(path).st_mtime_ns)
+    if _watchlist is None or _watchlist_path != stamp:
+        previous = _watchlist
+        _watchlist = Watchlist(path)
+        _watchlist_path = stamp
+        if previous is not None:
+            previous.retire()
+    return _watchlist